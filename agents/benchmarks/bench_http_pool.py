@@ -0,0 +1,91 @@
+"""
+Benchmark: reply-send latency with a fresh client per call vs pooled transport.
+
+Usage:
+    python -m benchmarks.bench_http_pool                      # local echo server
+    python -m benchmarks.bench_http_pool --url https://api.telegram.org/bot<token>/getMe
+
+The local server only shows the TCP connect cost; point --url at a real
+channel API to include the TLS handshake that pooling avoids.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from src.http.pool import close_http_clients, get_http_client
+
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Minimal keep-alive HTTP/1.1 server answering {"ok": true}."""
+    body = b'{"ok": true}'
+    try:
+        while True:
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in headers.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _per_call(url: str) -> float:
+    start = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        await client.post(url, json={"chat_id": 1, "text": "bench"})
+    return time.perf_counter() - start
+
+
+async def _pooled(url: str) -> float:
+    start = time.perf_counter()
+    await get_http_client(url).post(url, json={"chat_id": 1, "text": "bench"})
+    return time.perf_counter() - start
+
+
+def _report(name: str, samples: list[float]) -> None:
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(f"{name:<10} p50={statistics.median(ms):7.2f}ms  p95={p95:7.2f}ms  n={len(ms)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Target URL (default: local echo server)")
+    parser.add_argument("-n", type=int, default=200, help="Requests per mode")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = await asyncio.start_server(_serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/sendMessage"
+
+    try:
+        before = [await _per_call(url) for _ in range(args.n)]
+        after = [await _pooled(url) for _ in range(args.n)]
+    finally:
+        await close_http_clients()
+        if server:
+            server.close()
+            await server.wait_closed()
+
+    _report("per-call", before)
+    _report("pooled", after)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
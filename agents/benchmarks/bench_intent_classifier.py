@@ -0,0 +1,65 @@
+"""
+Benchmark: supervisor intent classifier inference vs keyword matcher.
+
+Usage:
+    python -m benchmarks.bench_intent_classifier                         # synthetic model
+    python -m benchmarks.bench_intent_classifier --model models/intent.npz
+
+Without --model a small model is trained on synthetic phrases; latency
+depends on hash dimension and message length, not on training data.
+"""
+
+import argparse
+import timeit
+
+from src.agents.classifier import IntentClassifier
+from src.agents.routing import match_intent
+
+
+MESSAGES = [
+    "Где купить устрицы к пятнице?",
+    "Где мой заказ? Уже два часа жду",
+    "Оформляем, адрес Ленина 1",
+    "Позовите, пожалуйста, менеджера",
+    "Спасибо, всё понятно",
+]
+
+SYNTHETIC = [
+    ("есть свежие устрицы", "sales"),
+    ("где купить креветки", "sales"),
+    ("сколько стоит икра", "sales"),
+    ("где мой заказ", "support"),
+    ("статус заказа", "support"),
+    ("привезли испорченное", "support"),
+    ("оформляем заказ", "checkout"),
+    ("адрес доставки ленина 1", "checkout"),
+    ("позовите менеджера", "escalate"),
+    ("соедините с оператором", "escalate"),
+]
+
+
+def _report(name: str, func, n: int) -> None:
+    per_call = min(timeit.repeat(
+        lambda: [func(m) for m in MESSAGES], number=n, repeat=5
+    )) / (n * len(MESSAGES))
+    print(f"{name:<10} {per_call * 1e6:7.2f}µs per message")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", help="Trained .npz model")
+    parser.add_argument("-n", type=int, default=2000, help="Iterations")
+    args = parser.parse_args()
+    
+    if args.model:
+        model = IntentClassifier.load(args.model)
+    else:
+        texts, labels = zip(*SYNTHETIC, strict=True)
+        model = IntentClassifier.train(list(texts), list(labels))
+    
+    _report("keywords", lambda m: match_intent(m, has_cart=True), args.n)
+    _report("model", lambda m: model.predict(m, has_cart=True), args.n)
+
+
+if __name__ == "__main__":
+    main()
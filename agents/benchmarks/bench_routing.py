@@ -0,0 +1,78 @@
+"""
+Benchmark: supervisor routing with substring loops vs the compiled matcher.
+
+Usage:
+    python -m benchmarks.bench_routing                 # built-in keyword table
+    python -m benchmarks.bench_routing --keywords 500  # padded with synthetic stems
+
+The legacy router scans the message once per keyword, so its cost grows
+with the table; the compiled regex makes one pass per message.
+"""
+
+import argparse
+import random
+import timeit
+
+from src.agents.routing import INTENT_KEYWORDS, IntentMatcher
+
+
+MESSAGES = [
+    "Где мой заказ? Уже два часа жду",
+    "Хочу заказать дюжину устриц на пятницу",
+    "Подскажите, какие морские ежи сейчас есть",
+    "Позовите, пожалуйста, менеджера",
+    "Спасибо, всё понятно",
+]
+
+
+def _padded_table(size: int) -> dict[str, dict[str, float]]:
+    """Built-in table plus random stems up to `size` keywords in total."""
+    table = {intent: dict(stems) for intent, stems in INTENT_KEYWORDS.items()}
+    rng = random.Random(0)
+    intents = list(table)
+    letters = "абвгдежзиклмнопрстуфхцчшщэюя"
+    total = sum(len(stems) for stems in table.values())
+    while total < size:
+        stem = "".join(rng.choice(letters) for _ in range(rng.randint(5, 9)))
+        table[rng.choice(intents)][stem] = 1.0
+        total += 1
+    return table
+
+
+def _legacy_router(table: dict[str, dict[str, float]]):
+    """Original supervisor approach: any(kw in text) per intent."""
+    lists = {intent: list(stems) for intent, stems in table.items()}
+    
+    def route(text: str) -> str:
+        lower = text.lower()
+        for intent, keywords in lists.items():
+            if any(kw in lower for kw in keywords):
+                return intent
+        return "sales"
+    return route
+
+
+def _report(name: str, func, n: int) -> None:
+    per_call = min(timeit.repeat(
+        lambda: [func(m) for m in MESSAGES], number=n, repeat=5
+    )) / (n * len(MESSAGES))
+    print(f"{name:<10} {per_call * 1e6:7.2f}µs per message")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keywords", type=int, default=0, help="Pad table to this many keywords")
+    parser.add_argument("-n", type=int, default=2000, help="Iterations")
+    args = parser.parse_args()
+    
+    table = _padded_table(args.keywords) if args.keywords else INTENT_KEYWORDS
+    size = sum(len(stems) for stems in table.values())
+    matcher = IntentMatcher(table)
+    
+    print(f"{size} keywords")
+    _report("legacy", _legacy_router(table), args.n)
+    _report("compiled", matcher.match, args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark: graph state handling with full-copy updates vs reducers.
+
+Usage:
+    python -m benchmarks.bench_state                  # 200-message conversation
+    python -m benchmarks.bench_state --messages 1000
+    python -m benchmarks.bench_state --graph          # also time whole graph turns
+
+The default measures one state step - building the agent node's update
+and validating the resulting state - which is what reducers change: the
+legacy node copies and returns the whole history and every message is
+re-validated, while with reducers the node returns only what it adds and
+messages are not validated again.
+
+`--graph` runs supervisor → agent through LangGraph with no LLM or tools.
+Its fixed overhead (~1ms per turn) is far larger than the state step, so
+whole-turn timings of the two schemas are within run-to-run noise.
+"""
+
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+from typing import Any, Optional
+
+from langgraph.graph import END, StateGraph
+from pydantic import BaseModel, Field
+
+from src.agents.state import CartItem, DeliveryAddress, SeafoodBusinessState, append_messages
+
+
+class LegacyState(BaseModel):
+    """State schema before reducers: every field is replaced on update."""
+    messages: list[dict[str, Any]] = Field(default_factory=list)
+    customer_id: str
+    channel: str
+    cart: list[CartItem] = Field(default_factory=list)
+    delivery_address: Optional[DeliveryAddress] = None
+    current_stage: str = "greeting"
+
+
+ITEM = CartItem(product_id="p1", name="Устрицы", quantity=6, unit="шт", unit_price=Decimal("350"))
+NEW_MESSAGES = [
+    {"role": "assistant", "content": "", "tool_calls": [{"name": "add_to_cart"}]},
+    {"role": "tool", "name": "add_to_cart", "content": "{\"success\": true}"},
+    {"role": "assistant", "content": "Добавил в корзину."},
+]
+
+
+async def supervisor(state) -> dict[str, Any]:
+    return {"current_stage": "sales"}
+
+
+async def legacy_sales(state: LegacyState) -> dict[str, Any]:
+    messages = list(state.messages)
+    messages.extend(NEW_MESSAGES)
+    return {"messages": messages, "cart": list(state.cart) + [ITEM]}
+
+
+async def reducer_sales(state: SeafoodBusinessState) -> dict[str, Any]:
+    return {"messages": list(NEW_MESSAGES), "cart": [ITEM]}
+
+
+def _graph(schema, sales):
+    graph = StateGraph(schema)
+    graph.add_node("supervisor", supervisor)
+    graph.add_node("sales", sales)
+    graph.set_entry_point("supervisor")
+    graph.add_edge("supervisor", "sales")
+    graph.add_edge("sales", END)
+    return graph.compile()
+
+
+def _conversation(size: int) -> list[dict[str, Any]]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Сообщение {i} " * 10}
+        for i in range(size)
+    ]
+
+
+def _legacy_step(values: dict[str, Any]) -> LegacyState:
+    messages = list(values["messages"])
+    messages.extend(NEW_MESSAGES)
+    return LegacyState.model_validate({**values, "messages": messages})
+
+
+def _reducer_step(values: dict[str, Any]) -> SeafoodBusinessState:
+    messages = append_messages(values["messages"], list(NEW_MESSAGES))
+    return SeafoodBusinessState.model_validate({**values, "messages": messages})
+
+
+def _report_step(name: str, step, values: dict[str, Any], n: int) -> None:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(n):
+            step(values)
+        best = min(best, (time.perf_counter() - start) / n)
+    print(f"{name:<10} {best * 1e6:8.1f}µs per state step")
+
+
+async def _report(name: str, graph, state, n: int) -> None:
+    await graph.ainvoke(state)  # warm up
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(n):
+            await graph.ainvoke(state)
+        best = min(best, (time.perf_counter() - start) / n)
+    print(f"{name:<10} {best * 1e6:8.1f}µs per graph turn")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200, help="Conversation length")
+    parser.add_argument("-n", type=int, default=200, help="Iterations")
+    parser.add_argument("--graph", action="store_true", help="Also time whole graph turns")
+    args = parser.parse_args()
+    
+    messages = _conversation(args.messages)
+    print(f"{args.messages} messages")
+    values = {"customer_id": "c1", "channel": "telegram", "messages": messages, "cart": [ITEM]}
+    _report_step("legacy", _legacy_step, values, args.n)
+    _report_step("reducers", _reducer_step, values, args.n)
+    if not args.graph:
+        return
+    
+    await _report(
+        "legacy",
+        _graph(LegacyState, legacy_sales),
+        LegacyState(customer_id="c1", channel="telegram", messages=messages),
+        args.n,
+    )
+    await _report(
+        "reducers",
+        _graph(SeafoodBusinessState, reducer_sales),
+        SeafoodBusinessState(customer_id="c1", channel="telegram", messages=messages),
+        args.n,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
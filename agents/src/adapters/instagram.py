@@ -5,10 +5,10 @@ import hmac
 from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException, Request, Response
-import httpx
 
 from src.config import settings
-from src.agents.graph import run_agent
+from src.http.pool import GRAPH_API_URL, get_http_client
+from src.agents.dispatcher import dispatch_turn
 from src.agents.state import AgentRunRequest
 
 
@@ -111,10 +111,12 @@ async def _process_instagram_message(messaging: dict) -> None:
             }
         )
         
-        response = await run_agent(request_data)
+        # None: merged into the customer's next message, which gets the reply
+        response = await dispatch_turn(request_data)
         
         # Send reply
-        await send_instagram_message(sender_id, response.reply)
+        if response is not None:
+            await send_instagram_message(sender_id, response.reply)
         
     except Exception as e:
         print(f"Instagram webhook error: {e}")
@@ -138,7 +140,7 @@ async def send_instagram_message(
         print("Instagram page token not configured")
         return {"ok": False, "error": "Token not configured"}
     
-    url = f"https://graph.facebook.com/v18.0/me/messages"
+    url = f"{GRAPH_API_URL}/v18.0/me/messages"
     
     headers = {
         "Authorization": f"Bearer {settings.instagram_page_token}",
@@ -150,9 +152,8 @@ async def send_instagram_message(
         "message": {"text": text},
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload, headers=headers)
-        return response.json()
+    response = await get_http_client(url).post(url, json=payload, headers=headers)
+    return response.json()
 
 
 async def send_instagram_generic_template(
@@ -173,7 +174,7 @@ async def send_instagram_generic_template(
     if not settings.instagram_page_token:
         return {"ok": False, "error": "Token not configured"}
     
-    url = f"https://graph.facebook.com/v18.0/me/messages"
+    url = f"{GRAPH_API_URL}/v18.0/me/messages"
     
     headers = {
         "Authorization": f"Bearer {settings.instagram_page_token}",
@@ -193,9 +194,8 @@ async def send_instagram_generic_template(
         },
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload, headers=headers)
-        return response.json()
+    response = await get_http_client(url).post(url, json=payload, headers=headers)
+    return response.json()
 
 
 # Note: Until app review is complete, you can use this auto-reply
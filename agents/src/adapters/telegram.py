@@ -2,18 +2,23 @@
 
 import hashlib
 import hmac
+import time
 from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException, Request, Response
-import httpx
 
 from src.config import settings
-from src.agents.graph import run_agent
+from src.http.pool import TELEGRAM_API_URL, get_http_client
+from src.agents.dispatcher import dispatch_turn
+from src.agents.graph import run_agent_stream
 from src.agents.state import AgentRunRequest
 
 
 router = APIRouter(prefix="/telegram", tags=["telegram"])
 
+ERROR_REPLY = "Извините, произошла ошибка. Попробуйте ещё раз или напишите нам напрямую."
+PLACEHOLDER_REPLY = "✍️ Печатаю…"
+
 
 def verify_telegram_signature(token: str, body: bytes) -> bool:
     """Verify Telegram webhook signature (secret_token header)."""
@@ -73,22 +78,80 @@ async def telegram_webhook(request: Request) -> Response:
             }
         )
         
-        response = await run_agent(request_data)
+        if settings.telegram_progressive_replies:
+            await _reply_progressively(chat_id, request_data)
+            return Response(status_code=200)
+        
+        # None: merged into the customer's next message, which gets the reply
+        response = await dispatch_turn(request_data)
         
         # Send reply
-        await send_telegram_message(chat_id, response.reply)
+        if response is not None:
+            await send_telegram_message(chat_id, response.reply)
         
     except Exception as e:
         # Send error message
-        await send_telegram_message(
-            chat_id, 
-            "Извините, произошла ошибка. Попробуйте ещё раз или напишите нам напрямую."
-        )
+        await send_telegram_message(chat_id, ERROR_REPLY)
         print(f"Telegram webhook error: {e}")
     
     return Response(status_code=200)
 
 
+async def _reply_progressively(chat_id: int, request_data: AgentRunRequest) -> None:
+    """
+    Deliver the reply while it is generated.
+    
+    Sends a placeholder right away, then edits it with the streamed text
+    at most once per `telegram_edit_interval` seconds (Telegram throttles
+    frequent edits), and finally replaces it with the complete reply.
+    """
+    placeholder = await send_telegram_message(chat_id, PLACEHOLDER_REPLY, parse_mode="")
+    message_id = placeholder.get("result", {}).get("message_id")
+    
+    if not message_id:
+        # Could not send placeholder - deliver in one piece
+        response = await dispatch_turn(request_data)
+        if response is not None:
+            await send_telegram_message(chat_id, response.reply)
+        return
+    
+    text = ""
+    shown = PLACEHOLDER_REPLY
+    next_edit_at = time.monotonic() + settings.telegram_edit_interval
+    
+    try:
+        async for event in run_agent_stream(request_data, dispatch_turn):
+            if event["type"] == "tool_call":
+                # Text before a tool call is an intermediate message
+                text = ""
+                continue
+            if event["type"] == "final":
+                if event["response"] is None:
+                    # Answered together with the customer's next message
+                    await delete_telegram_message(chat_id, message_id)
+                    return
+                text = event["response"].reply
+                break
+            
+            text += event["text"]
+            if time.monotonic() < next_edit_at or not text.strip() or text == shown:
+                continue
+            
+            # Plain text while streaming: partial Markdown may not parse
+            result = await edit_telegram_message(chat_id, message_id, text, parse_mode="")
+            shown = text
+            retry_after = result.get("parameters", {}).get("retry_after", 0)
+            next_edit_at = time.monotonic() + max(settings.telegram_edit_interval, retry_after)
+    except Exception as e:
+        print(f"Telegram streaming error: {e}")
+        text = ERROR_REPLY
+    
+    result = await edit_telegram_message(chat_id, message_id, text)
+    if not result.get("ok") and text != shown:
+        # Markdown rejected - fall back to plain text
+        await edit_telegram_message(chat_id, message_id, text, parse_mode="")
+
+
 async def send_telegram_message(
     chat_id: int,
     text: str,
@@ -100,7 +163,7 @@ async def send_telegram_message(
         print("Telegram bot token not configured")
         return {"ok": False, "error": "Bot token not configured"}
     
-    url = f"https://api.telegram.org/bot{settings.telegram_bot_token}/sendMessage"
+    url = f"{TELEGRAM_API_URL}/bot{settings.telegram_bot_token}/sendMessage"
     
     payload: dict[str, Any] = {
         "chat_id": chat_id,
@@ -113,9 +176,51 @@ async def send_telegram_message(
     if reply_markup:
         payload["reply_markup"] = reply_markup
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
-        return response.json()
+    response = await get_http_client(url).post(url, json=payload)
+    return response.json()
+
+
+async def edit_telegram_message(
+    chat_id: int,
+    message_id: int,
+    text: str,
+    parse_mode: str = "Markdown",
+    reply_markup: Optional[dict] = None,
+) -> dict:
+    """Edit text of a message previously sent by the bot."""
+    if not settings.telegram_bot_token:
+        return {"ok": False, "error": "Bot token not configured"}
+    
+    url = f"{TELEGRAM_API_URL}/bot{settings.telegram_bot_token}/editMessageText"
+    
+    payload: dict[str, Any] = {
+        "chat_id": chat_id,
+        "message_id": message_id,
+        "text": text,
+    }
+    
+    if parse_mode:
+        payload["parse_mode"] = parse_mode
+    
+    if reply_markup:
+        payload["reply_markup"] = reply_markup
+    
+    response = await get_http_client(url).post(url, json=payload)
+    return response.json()
+
+
+async def delete_telegram_message(chat_id: int, message_id: int) -> dict:
+    """Delete a message previously sent by the bot."""
+    if not settings.telegram_bot_token:
+        return {"ok": False, "error": "Bot token not configured"}
+    
+    url = f"{TELEGRAM_API_URL}/bot{settings.telegram_bot_token}/deleteMessage"
+    
+    response = await get_http_client(url).post(url, json={
+        "chat_id": chat_id,
+        "message_id": message_id,
+    })
+    return response.json()
 
 
 async def send_telegram_typing(chat_id: int) -> None:
@@ -123,13 +228,12 @@ async def send_telegram_typing(chat_id: int) -> None:
     if not settings.telegram_bot_token:
         return
     
-    url = f"https://api.telegram.org/bot{settings.telegram_bot_token}/sendChatAction"
+    url = f"{TELEGRAM_API_URL}/bot{settings.telegram_bot_token}/sendChatAction"
     
-    async with httpx.AsyncClient() as client:
-        await client.post(url, json={
-            "chat_id": chat_id,
-            "action": "typing",
-        })
+    await get_http_client(url).post(url, json={
+        "chat_id": chat_id,
+        "action": "typing",
+    })
 
 
 async def setup_telegram_webhook(webhook_url: str) -> dict:
@@ -141,7 +245,7 @@ async def setup_telegram_webhook(webhook_url: str) -> dict:
     if not settings.telegram_bot_token:
         return {"ok": False, "error": "Bot token not configured"}
     
-    url = f"https://api.telegram.org/bot{settings.telegram_bot_token}/setWebhook"
+    url = f"{TELEGRAM_API_URL}/bot{settings.telegram_bot_token}/setWebhook"
     
     payload = {
         "url": webhook_url,
@@ -151,9 +255,8 @@ async def setup_telegram_webhook(webhook_url: str) -> dict:
     if settings.telegram_webhook_secret:
         payload["secret_token"] = settings.telegram_webhook_secret
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
-        return response.json()
+    response = await get_http_client(url).post(url, json=payload)
+    return response.json()
 
 
 async def delete_telegram_webhook() -> dict:
@@ -161,8 +264,7 @@ async def delete_telegram_webhook() -> dict:
     if not settings.telegram_bot_token:
         return {"ok": False, "error": "Bot token not configured"}
     
-    url = f"https://api.telegram.org/bot{settings.telegram_bot_token}/deleteWebhook"
+    url = f"{TELEGRAM_API_URL}/bot{settings.telegram_bot_token}/deleteWebhook"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url)
-        return response.json()
+    response = await get_http_client(url).post(url)
+    return response.json()
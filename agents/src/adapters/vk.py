@@ -5,10 +5,10 @@ import json
 from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException, Request, Response
-import httpx
 
 from src.config import settings
-from src.agents.graph import run_agent
+from src.http.pool import VK_API_URL, get_http_client
+from src.agents.dispatcher import dispatch_turn
 from src.agents.state import AgentRunRequest
 
 
@@ -78,10 +78,12 @@ async def _process_vk_message(obj: dict) -> None:
             }
         )
         
-        response = await run_agent(request_data)
+        # None: merged into the customer's next message, which gets the reply
+        response = await dispatch_turn(request_data)
         
         # Send reply
-        await send_vk_message(peer_id, response.reply)
+        if response is not None:
+            await send_vk_message(peer_id, response.reply)
         
     except Exception as e:
         print(f"VK webhook error: {e}")
@@ -107,7 +109,7 @@ async def send_vk_message(
     
     import random
     
-    url = "https://api.vk.com/method/messages.send"
+    url = f"{VK_API_URL}/method/messages.send"
     
     params = {
         "access_token": settings.vk_api_token,
@@ -120,9 +122,8 @@ async def send_vk_message(
     if keyboard:
         params["keyboard"] = json.dumps(keyboard)
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, data=params)
-        return response.json()
+    response = await get_http_client(url).post(url, data=params)
+    return response.json()
 
 
 async def get_vk_user_info(user_id: int) -> Optional[dict]:
@@ -130,7 +131,7 @@ async def get_vk_user_info(user_id: int) -> Optional[dict]:
     if not settings.vk_api_token:
         return None
     
-    url = "https://api.vk.com/method/users.get"
+    url = f"{VK_API_URL}/method/users.get"
     
     params = {
         "access_token": settings.vk_api_token,
@@ -139,12 +140,11 @@ async def get_vk_user_info(user_id: int) -> Optional[dict]:
         "fields": "first_name,last_name,phone",
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, data=params)
-        data = response.json()
-        
-        users = data.get("response", [])
-        return users[0] if users else None
+    response = await get_http_client(url).post(url, data=params)
+    data = response.json()
+    
+    users = data.get("response", [])
+    return users[0] if users else None
 
 
 def create_vk_keyboard(
@@ -5,10 +5,10 @@ import hmac
 from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException, Request, Response
-import httpx
 
 from src.config import settings
-from src.agents.graph import run_agent
+from src.http.pool import GRAPH_API_URL, get_http_client
+from src.agents.dispatcher import dispatch_turn
 from src.agents.state import AgentRunRequest
 
 
@@ -126,10 +126,12 @@ async def _process_whatsapp_message(message: dict, value: dict) -> None:
             }
         )
         
-        response = await run_agent(request_data)
+        # None: merged into the customer's next message, which gets the reply
+        response = await dispatch_turn(request_data)
         
         # Send reply
-        await send_whatsapp_message(phone_number_id, phone, response.reply)
+        if response is not None:
+            await send_whatsapp_message(phone_number_id, phone, response.reply)
         
     except Exception as e:
         print(f"WhatsApp webhook error: {e}")
@@ -155,7 +157,7 @@ async def send_whatsapp_message(
         print("WhatsApp API token not configured")
         return {"ok": False, "error": "Token not configured"}
     
-    url = f"https://graph.facebook.com/v18.0/{phone_number_id}/messages"
+    url = f"{GRAPH_API_URL}/v18.0/{phone_number_id}/messages"
     
     headers = {
         "Authorization": f"Bearer {settings.whatsapp_api_token}",
@@ -170,9 +172,8 @@ async def send_whatsapp_message(
         "text": {"body": text},
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload, headers=headers)
-        return response.json()
+    response = await get_http_client(url).post(url, json=payload, headers=headers)
+    return response.json()
 
 
 async def send_whatsapp_template(
@@ -190,7 +191,7 @@ async def send_whatsapp_template(
     if not settings.whatsapp_api_token:
         return {"ok": False, "error": "Token not configured"}
     
-    url = f"https://graph.facebook.com/v18.0/{phone_number_id}/messages"
+    url = f"{GRAPH_API_URL}/v18.0/{phone_number_id}/messages"
     
     headers = {
         "Authorization": f"Bearer {settings.whatsapp_api_token}",
@@ -210,6 +211,5 @@ async def send_whatsapp_template(
     if components:
         payload["template"]["components"] = components
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload, headers=headers)
-        return response.json()
+    response = await get_http_client(url).post(url, json=payload, headers=headers)
+    return response.json()
@@ -0,0 +1,148 @@
+"""Per-conversation state checkpoints in Redis."""
+
+import logging
+from typing import Any, Optional
+
+from src.agents.state import SeafoodBusinessState
+from src.config import settings
+from src.db.redis import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationCheckpointer:
+    """
+    Loads the conversation state before a turn and saves it after.
+    
+    Messages are an append-only Redis list and the other fields (stage,
+    cart, address, ...) a hash, each value in the binary encoding of
+    `src.db.codec`. A save writes only this turn's new messages and the
+    fields that changed - not the whole history. A load reads the
+    fields and the last `agent_state_window` messages; the number of
+    older messages left in Redis becomes `message_offset`.
+    
+    One read and one write per turn (the graph runs supervisor → agent
+    once, so per-node checkpoints would only add writes), both with a
+    sliding TTL of `agent_state_ttl_hours`.
+    """
+    
+    # Re-derived every turn - persisting them would replay stale data.
+    # is_paused_for_human is stored: a handed-off conversation stays paused.
+    TRANSIENT_FIELDS = {
+        "escalate_to_human",
+        "available_products",
+        "next_supply_dates",
+        "customer_history",
+        "conversation_id",
+    }
+    
+    # Stored in the message list, not in the field hash
+    LOG_FIELDS = {"messages", "message_offset"}
+    
+    # Fields that can be read back with `read(fields=...)`
+    FIELDS = set(SeafoodBusinessState.model_fields) - TRANSIENT_FIELDS - {"message_offset"}
+    
+    def encode(self, state: SeafoodBusinessState) -> dict[str, Any]:
+        """Hash fields of `state`; defaults are omitted."""
+        return state.model_dump(
+            mode="json",
+            exclude_defaults=True,
+            exclude=self.TRANSIENT_FIELDS | self.LOG_FIELDS,
+        )
+    
+    async def read(
+        self,
+        conversation_id: str,
+        fields: Optional[list[str]] = None,
+        window: Optional[int] = None,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Saved state, or None if the conversation does not exist.
+        
+        `fields` projects the state to the given fields ("messages" for
+        the message tail, with defaults filled in for projected fields
+        that are not stored); `window` overrides how many messages are
+        read, 0 reads them all. Redis errors are raised.
+        """
+        if window is None:
+            window = settings.agent_state_window
+        with_messages = fields is None or "messages" in fields
+        stored_fields = None
+        if fields is not None:
+            stored_fields = [f for f in fields if f not in self.LOG_FIELDS]
+        
+        redis_client = await get_redis()
+        stored, messages, total = await redis_client.get_conversation(
+            conversation_id, window if with_messages else None, stored_fields
+        )
+        if not stored and not total:
+            return None
+        if stored_fields is not None:
+            # Defaults are not stored (see `encode`)
+            model_fields = SeafoodBusinessState.model_fields
+            stored = {
+                **{
+                    name: model_fields[name].get_default(call_default_factory=True)
+                    for name in stored_fields
+                    if not model_fields[name].is_required()
+                },
+                **stored,
+            }
+        if not with_messages:
+            return stored
+        return {
+            **stored,
+            "messages": messages,
+            "message_offset": total - len(messages),
+        }
+    
+    async def load(self, conversation_id: str) -> Optional[dict[str, Any]]:
+        """Saved state fields with the message tail, or None for a new conversation."""
+        try:
+            return await self.read(conversation_id)
+        except Exception as e:
+            logger.warning(f"State load failed for {conversation_id}: {e}")
+            return None
+    
+    async def save(
+        self,
+        conversation_id: str,
+        state: SeafoodBusinessState,
+        saved: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """
+        Persist the delta between `saved` (as returned by `load`) and `state`.
+        
+        Messages are only ever appended, so everything after the loaded
+        tail is new.
+        """
+        saved = saved or {}
+        previous = {k: v for k, v in saved.items() if k not in self.LOG_FIELDS}
+        fields = self.encode(state)
+        changed = {k: v for k, v in fields.items() if previous.get(k) != v}
+        removed = [k for k in previous if k not in fields]
+        new_messages = state.messages[len(saved.get("messages", [])):]
+        try:
+            redis_client = await get_redis()
+            await redis_client.append_conversation(
+                conversation_id,
+                new_messages,
+                changed,
+                removed,
+                ttl_hours=settings.agent_state_ttl_hours,
+            )
+        except Exception as e:
+            logger.warning(f"State save failed for {conversation_id}: {e}")
+
+
+# Global checkpointer instance
+_checkpointer: Optional[ConversationCheckpointer] = None
+
+
+def get_checkpointer() -> ConversationCheckpointer:
+    """Get or create conversation checkpointer."""
+    global _checkpointer
+    if _checkpointer is None:
+        _checkpointer = ConversationCheckpointer()
+    return _checkpointer
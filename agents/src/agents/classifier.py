@@ -0,0 +1,177 @@
+"""Hashed n-gram linear intent classifier (offline-trained, NumPy inference)."""
+
+import logging
+import math
+import os
+import random
+import re
+import zlib
+from functools import lru_cache
+from itertools import pairwise
+from typing import Optional
+
+import numpy as np
+
+from src.agents.routing import normalize
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+INTENTS = ["sales", "checkout", "support", "escalate"]
+
+WORD = re.compile(r"\w+")
+
+# Intents that only make sense with a non-empty cart
+CART_INTENTS = {"checkout"}
+
+
+def _hash(gram: str, dim: int) -> int:
+    # CRC32 instead of hash() - stable across processes
+    return zlib.crc32(gram.encode()) & (dim - 1)
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str, dim: int) -> tuple[int, ...]:
+    """Hashed word unigram and character 3/4-grams (padded with spaces)."""
+    padded = f" {word} "
+    grams = [f"w:{word}"]
+    for n in (3, 4):
+        grams += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+    return tuple(_hash(g, dim) for g in grams)
+
+
+def featurize(text: str, dim: int) -> tuple[np.ndarray, float]:
+    """
+    Hashed sparse features: indices (repeats allowed) and their weight.
+    
+    Features are words, word bigrams and character 3/4-grams of each
+    word, so prefixes and endings are visible. Every occurrence weighs
+    1/sqrt(count). Per-word features are memoized - the vocabulary of a
+    shop chat is small.
+    """
+    words = WORD.findall(normalize(text))
+    indices: list[int] = []
+    for word in words:
+        indices.extend(_word_features(word, dim))
+    indices.extend(_hash(f"b:{a} {b}", dim) for a, b in pairwise(words))
+    
+    if not indices:
+        return np.zeros(0, dtype=np.int64), 0.0
+    return np.array(indices, dtype=np.int64), 1.0 / np.sqrt(len(indices))
+
+
+class IntentClassifier:
+    """
+    Multinomial logistic regression over hashed features.
+    
+    Weights are a dense (dim, classes) matrix; a prediction gathers the
+    rows of the message's features, so inference cost depends on the
+    message length, not the vocabulary.
+    """
+    
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: list[str]):
+        self.weights = weights
+        self.bias = bias
+        self.labels = labels
+        self.dim = weights.shape[0]
+    
+    def probabilities(self, text: str) -> list[float]:
+        """Class probabilities in `labels` order."""
+        indices, value = featurize(text, self.dim)
+        row = self.weights[indices].sum(axis=0) if len(indices) else 0.0
+        # A handful of classes - plain floats beat NumPy call overhead here
+        logits = (value * row + self.bias).tolist()
+        top = max(logits)
+        exp = [math.exp(x - top) for x in logits]
+        total = sum(exp)
+        return [e / total for e in exp]
+    
+    def predict(self, text: str, has_cart: bool = False) -> tuple[str, float]:
+        """Most likely eligible intent and its probability."""
+        probs = self.probabilities(text)
+        for index in sorted(range(len(probs)), key=probs.__getitem__, reverse=True):
+            label = self.labels[index]
+            if has_cart or label not in CART_INTENTS:
+                return label, probs[index]
+        return "sales", 0.0
+    
+    @classmethod
+    def train(
+        cls,
+        texts: list[str],
+        labels: list[str],
+        dim: int = 2 ** 16,
+        epochs: int = 10,
+        lr: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 0,
+    ) -> "IntentClassifier":
+        """Fit with plain SGD on the softmax loss."""
+        classes = [c for c in INTENTS if c in set(labels)]
+        targets = [classes.index(label) for label in labels]
+        features = [featurize(text, dim) for text in texts]
+        
+        weights = np.zeros((dim, len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+        order = list(range(len(texts)))
+        rng = random.Random(seed)
+        
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            step = lr / (1 + epoch)
+            for i in order:
+                indices, value = features[i]
+                logits = value * weights[indices].sum(axis=0) + bias
+                logits -= logits.max()
+                grad = np.exp(logits)
+                grad /= grad.sum()
+                grad[targets[i]] -= 1.0
+                # add.at accumulates repeated indices
+                np.add.at(weights, indices, -step * (value * grad + l2 * weights[indices]))
+                bias -= step * grad
+        
+        return cls(weights, bias, classes)
+    
+    def accuracy(self, texts: list[str], labels: list[str]) -> float:
+        if not texts:
+            return 0.0
+        hits = sum(
+            self.predict(text, has_cart=True)[0] == label
+            for text, label in zip(texts, labels, strict=True)
+        )
+        return hits / len(texts)
+    
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path, weights=self.weights, bias=self.bias, labels=np.array(self.labels)
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        data = np.load(path)
+        return cls(data["weights"], data["bias"], [str(label) for label in data["labels"]])
+
+
+# Global classifier instance (None = keyword routing)
+_intent_classifier: Optional[IntentClassifier] = None
+
+
+def load_intent_classifier() -> Optional[IntentClassifier]:
+    """Load the model from `agent_intent_model_path`, if configured."""
+    global _intent_classifier
+    path = settings.agent_intent_model_path
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logger.warning(f"Intent model {path} not found, using keyword routing")
+        return None
+    _intent_classifier = IntentClassifier.load(path)
+    logger.info(f"Loaded intent model {path} ({_intent_classifier.labels})")
+    return _intent_classifier
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """Loaded classifier, or None if routing falls back to keywords."""
+    return _intent_classifier
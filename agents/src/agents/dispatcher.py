@@ -0,0 +1,132 @@
+"""Per-conversation turn ordering with burst coalescing."""
+
+import asyncio
+import contextvars
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.agents.graph import run_agent
+from src.agents.state import AgentRunRequest, AgentRunResponse
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Submission:
+    """A message waiting for its conversation's next turn."""
+    request: AgentRunRequest
+    future: asyncio.Future
+    received: float = field(default_factory=time.monotonic)
+    # Context of the caller - the turn runs in the last caller's context,
+    # so its stream sink receives the reply
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+
+class TurnDispatcher:
+    """
+    Serializes `run_agent` per conversation and merges message bursts.
+    
+    Customers often send several short messages in a row. Each conversation
+    gets one worker task. A message to an idle conversation starts its turn
+    right away - no waiting, so streamed replies keep their latency.
+    Messages arriving while a turn runs are queued and answered together
+    by the next turn, with their texts joined. Turns never race on the
+    same conversation state and run in arrival order.
+    
+    With `agent_debounce_window` > 0 a turn first waits until no new
+    message has arrived for that long (at most `agent_debounce_max_wait`
+    after the first one), so a burst to an idle conversation is merged
+    too - at the cost of that delay on every turn, streamed or not.
+    
+    The last message of a burst gets the response; the earlier ones get
+    None and their callers must not send a reply.
+    
+    Ordering and coalescing are per process: with several workers, one
+    customer's messages can reach different processes and still run
+    concurrent turns on the same conversation.
+    """
+    
+    def __init__(self):
+        self._pending: dict[str, list[_Submission]] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self.turns = 0
+        self.coalesced = 0
+    
+    async def submit(self, request: AgentRunRequest) -> Optional[AgentRunResponse]:
+        """Queue a message; returns the turn response, or None if merged into a later one."""
+        key = request.state_id or request.customer_id
+        submission = _Submission(request, asyncio.get_running_loop().create_future())
+        self._pending.setdefault(key, []).append(submission)
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._work(key))
+        return await submission.future
+    
+    async def _work(self, key: str) -> None:
+        try:
+            # Everything that arrived during the previous turn is one batch
+            while self._pending.get(key):
+                if settings.agent_debounce_window > 0:
+                    await self._debounce(self._pending[key])
+                batch = self._pending.pop(key)
+                await self._run_turn(batch)
+        finally:
+            # No await between the empty check and here, so nothing is lost
+            self._workers.pop(key, None)
+    
+    @staticmethod
+    async def _debounce(pending: list[_Submission]) -> None:
+        """Wait until the burst is quiet; `pending` may grow meanwhile."""
+        while True:
+            ready_at = min(
+                pending[-1].received + settings.agent_debounce_window,
+                pending[0].received + settings.agent_debounce_max_wait,
+            )
+            delay = ready_at - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+    
+    async def _run_turn(self, batch: list[_Submission]) -> None:
+        last = batch[-1]
+        request = last.request
+        if len(batch) > 1:
+            request = request.model_copy(update={
+                "message": "\n".join(s.request.message for s in batch),
+            })
+            logger.info(f"Coalesced {len(batch)} messages for {request.customer_id}")
+        
+        for submission in batch[:-1]:
+            if not submission.future.done():
+                submission.future.set_result(None)
+        
+        self.turns += 1
+        self.coalesced += len(batch) - 1
+        try:
+            response = await asyncio.create_task(run_agent(request), context=last.context)
+        except Exception as e:
+            if not last.future.done():
+                last.future.set_exception(e)
+        else:
+            if not last.future.done():
+                last.future.set_result(response)
+
+
+# Global dispatcher instance
+_dispatcher: Optional[TurnDispatcher] = None
+
+
+def get_dispatcher() -> TurnDispatcher:
+    """Get or create turn dispatcher."""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = TurnDispatcher()
+    return _dispatcher
+
+
+async def dispatch_turn(request: AgentRunRequest) -> Optional[AgentRunResponse]:
+    """Convenience function: run the message in order with its burst."""
+    return await get_dispatcher().submit(request)
@@ -1,15 +1,29 @@
 """LangGraph agent graph definition."""
 
-import uuid
-from typing import Any, Literal
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Literal, Optional
 
 from langgraph.graph import StateGraph, END
 
+from src.agents.checkpoint import get_checkpointer
 from src.agents.state import AgentRunRequest, AgentRunResponse, SeafoodBusinessState
 from src.agents.nodes.supervisor import supervisor_node
 from src.agents.nodes.sales import sales_node
 from src.agents.nodes.checkout import checkout_node
 from src.agents.nodes.support import support_node
+from src.config import settings
+from src.deadline import Deadline, DeadlineExceeded, current_deadline
+from src.llm.client import llm_stream_sink
+
+
+logger = logging.getLogger(__name__)
+
+# Sent when the turn deadline passes before the agents finish
+DEADLINE_REPLY = (
+    "Извините, ответ занимает больше времени, чем обычно. "
+    "Пожалуйста, повторите сообщение через минуту."
+)
 
 
 # Define the graph state type for LangGraph
@@ -82,34 +96,71 @@ async def run_agent(request: AgentRunRequest) -> AgentRunResponse:
     """
     Run the agent graph with the given request.
     
-    This is the main entry point for processing messages.
+    This is the main entry point for processing messages. State is
+    restored from and saved to the conversation checkpoint (keyed by
+    `state_id` or `customer_id`), so cart and history survive between
+    turns; only the recent message tail is loaded and only this turn's
+    changes are written back. The whole turn runs under
+    `agent_turn_deadline`; if it passes, DEADLINE_REPLY is returned
+    instead of waiting for slow LLM fallbacks.
+    
+    The graph is never cancelled from outside - LLM calls and read-only
+    tools check the deadline themselves, while writes (create_order) are
+    allowed to finish, so a late turn cannot drop a committed order.
     """
-    # Initialize or restore state
-    state = GraphState(
-        customer_id=request.customer_id,
-        channel=request.channel,
-        messages=[{"role": "user", "content": request.message}],
-        current_stage="greeting",
-    )
+    # Restore the conversation (cart, address, history) or start a new one
+    conversation_id = request.state_id or request.customer_id
+    checkpointer = get_checkpointer()
+    saved = await checkpointer.load(conversation_id)
+    if saved:
+        state = GraphState(**{
+            **saved, "channel": request.channel, "conversation_id": conversation_id,
+        })
+    else:
+        state = GraphState(
+            customer_id=request.customer_id,
+            channel=request.channel,
+            conversation_id=conversation_id,
+            current_stage="greeting",
+        )
+    # A new list - the loaded one is what the checkpointer diffs against
+    state.messages = state.messages + [{"role": "user", "content": request.message}]
+    turn_start = len(state.messages)
     
-    # Run the graph
-    result = await agent_graph.ainvoke(state)
+    # Run the graph; nodes, tools and LLM calls see the deadline via context
+    token = current_deadline.set(Deadline(settings.agent_turn_deadline))
+    try:
+        result = await agent_graph.ainvoke(state)
+    except DeadlineExceeded:
+        logger.warning(f"Turn deadline exceeded for {request.customer_id}")
+        # Keep the message and the canned reply so the history stays in order
+        state.messages = state.messages + [{"role": "assistant", "content": DEADLINE_REPLY}]
+        await checkpointer.save(conversation_id, state, saved)
+        return AgentRunResponse(
+            reply=DEADLINE_REPLY,
+            state_id=conversation_id,
+            current_stage=state.current_stage,
+            escalate_to_human=False,
+        )
+    finally:
+        current_deadline.reset(token)
     
     # LangGraph returns dict with updated fields
     # Access results carefully - could be dict or Pydantic
     if isinstance(result, dict):
-        messages = result.get("messages", [])
-        current_stage = result.get("current_stage", "greeting")
-        escalate = result.get("escalate_to_human", False)
+        final_state = GraphState(**result)
     else:
         # Pydantic model
-        messages = result.messages
-        current_stage = result.current_stage
-        escalate = result.escalate_to_human
+        final_state = result
+    messages = final_state.messages
+    current_stage = final_state.current_stage
+    escalate = final_state.escalate_to_human
     
-    # Extract response from the last assistant message
+    await checkpointer.save(conversation_id, final_state, saved)
+    
+    # Extract response from the last assistant message of this turn
     reply = ""
-    for msg in reversed(messages):
+    for msg in reversed(messages[turn_start:]):
         if isinstance(msg, dict) and msg.get("role") == "assistant":
             reply = msg.get("content", "")
             break
@@ -117,14 +168,46 @@ async def run_agent(request: AgentRunRequest) -> AgentRunResponse:
     if not reply:
         reply = "Извините, произошла ошибка. Попробуйте снова или напишите нам напрямую."
     
-    # Generate state ID for continuation
-    state_id = str(uuid.uuid4())
-    
     return AgentRunResponse(
         reply=reply,
-        state_id=state_id,
+        state_id=conversation_id,
         current_stage=current_stage,
         escalate_to_human=escalate,
         cart_summary=None,  # TODO: Generate cart summary
         order_id=None,  # TODO: Return order ID if created
     )
+
+
+async def run_agent_stream(
+    request: AgentRunRequest,
+    runner: Callable[[AgentRunRequest], Awaitable[Optional[AgentRunResponse]]] = run_agent,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Run the agent graph, yielding LLM events as they are generated.
+    
+    Yields the `LLMClient.generate_stream` events ("delta", "tool_call")
+    of every LLM call in the turn, then a final
+    {"type": "final", "response": AgentRunResponse}. The final reply is
+    authoritative: text streamed before a tool call is only a preview.
+    
+    `runner` may be `dispatch_turn`; the final response is then None if
+    the message was merged into a later message's turn.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    # The task copies the current context, so the sink is visible to all nodes
+    token = llm_stream_sink.set(queue)
+    try:
+        task = asyncio.create_task(runner(request))
+    finally:
+        llm_stream_sink.reset(token)
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+        
+        yield {"type": "final", "response": await task}
+    finally:
+        if not task.done():
+            task.cancel()
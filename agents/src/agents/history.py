@@ -0,0 +1,221 @@
+"""Conversation history token budget with rolling summarization."""
+
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+from src.config import settings
+from src.db.redis import get_redis
+from src.deadline import current_deadline
+from src.llm.client import get_llm_client
+from src.llm.prompts import SUMMARY_PROMPT
+from src.llm.tokens import estimate_tokens
+
+
+logger = logging.getLogger(__name__)
+
+
+def _is_tool_message(msg: dict[str, Any]) -> bool:
+    return msg.get("role") == "tool" or bool(msg.get("tool_calls"))
+
+
+class HistoryManager:
+    """
+    Keeps the LLM context within `agent_history_token_budget`.
+    
+    When the history is over budget:
+    - the last `agent_history_keep_turns` user turns are kept verbatim;
+    - tool calls and tool results are kept for the current turn only;
+    - older turns are replaced with a rolling summary.
+    
+    The summary is computed in the background and cached per
+    conversation in Redis, so a turn never waits for it. It is refreshed
+    only once `agent_summary_refresh_turns` user turns fall outside it -
+    one extra LLM call per several turns, not per turn. Until then the
+    uncovered user messages are included as short excerpts.
+    
+    Positions are absolute: `offset` is the number of earlier messages
+    that were not loaded (see ConversationCheckpointer), so the summary
+    stays aligned while the loaded window slides.
+    """
+    
+    SUMMARY_KEY = "agent:summary:{conversation_id}"
+    EXCERPT_CHARS = 200
+    
+    def __init__(self):
+        self._pending: dict[str, asyncio.Task] = {}
+        self.tokens_before = 0
+        self.tokens_after = 0
+    
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+    
+    @staticmethod
+    def _split(messages: list[dict[str, Any]], keep_turns: int) -> int:
+        """Index where the last `keep_turns` user turns start."""
+        user_indexes = [i for i, m in enumerate(messages) if m.get("role") == "user"]
+        if len(user_indexes) <= keep_turns:
+            return 0
+        return user_indexes[-keep_turns]
+    
+    async def prepare(
+        self,
+        conversation_id: str,
+        messages: list[dict[str, Any]],
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """Return the message list to send to the LLM."""
+        before = estimate_tokens(messages)
+        if before <= settings.agent_history_token_budget:
+            return messages
+        
+        cut = self._split(messages, settings.agent_history_keep_turns)
+        older, recent = messages[:cut], messages[cut:]
+        
+        # Tool payloads are only useful within the turn that produced them
+        current = self._split(recent, 1)
+        recent = [
+            m for i, m in enumerate(recent)
+            if i >= current or not _is_tool_message(m)
+        ]
+        
+        result = recent
+        if older:
+            summary = await self._summary(conversation_id, older, offset)
+            if summary:
+                result = [{
+                    "role": "user",
+                    "content": f"Краткое содержание предыдущего разговора:\n{summary}",
+                }] + recent
+        
+        after = estimate_tokens(result)
+        self.tokens_before += before
+        self.tokens_after += after
+        logger.info(
+            f"History for {conversation_id}: {before} -> {after} tokens "
+            f"(saved {before - after}, total saved {self.tokens_saved})"
+        )
+        return result
+    
+    async def _summary(
+        self,
+        conversation_id: str,
+        older: list[dict[str, Any]],
+        offset: int = 0,
+    ) -> str:
+        """Cached summary of `older`, scheduling a refresh if it lags behind."""
+        cached = await self._load(conversation_id)
+        covered = cached.get("covered", 0) - offset if cached else 0
+        text = cached.get("text", "") if cached else ""
+        
+        if covered > len(older):
+            # History was reset or trimmed - start over
+            covered, text = 0, ""
+        elif covered < 0:
+            # Messages between the summary and the window were never loaded
+            logger.info(f"Summary for {conversation_id} skips {-covered} messages")
+            covered = 0
+        
+        if covered < len(older):
+            uncovered_turns = sum(1 for m in older[covered:] if m.get("role") == "user")
+            if uncovered_turns >= settings.agent_summary_refresh_turns:
+                self._schedule(conversation_id, older, covered, text, offset)
+            excerpts = [
+                f"- Клиент: {m.get('content', '')[:self.EXCERPT_CHARS]}"
+                for m in older[covered:]
+                if m.get("role") == "user" and m.get("content")
+            ]
+            text = "\n".join(filter(None, [text, *excerpts]))
+        
+        return text
+    
+    def _schedule(
+        self,
+        conversation_id: str,
+        older: list[dict[str, Any]],
+        covered: int,
+        previous: str,
+        offset: int = 0,
+    ) -> None:
+        task = self._pending.get(conversation_id)
+        if task and not task.done():
+            return
+        self._pending[conversation_id] = asyncio.create_task(
+            self._refresh(conversation_id, list(older), covered, previous, offset)
+        )
+    
+    async def _refresh(
+        self,
+        conversation_id: str,
+        older: list[dict[str, Any]],
+        covered: int,
+        previous: str,
+        offset: int = 0,
+    ) -> None:
+        """Fold messages `older[covered:]` into the summary."""
+        # Runs in the background, not bound by the turn that scheduled it
+        current_deadline.set(None)
+        transcript = "\n".join(
+            f"{'Клиент' if m.get('role') == 'user' else 'Консультант'}: {m.get('content')}"
+            for m in older[covered:]
+            if not _is_tool_message(m) and m.get("content")
+        )
+        try:
+            response = await get_llm_client().generate(
+                SUMMARY_PROMPT,
+                [{
+                    "role": "user",
+                    "content": f"Предыдущее краткое содержание:\n{previous or '-'}\n\n"
+                               f"Новые сообщения:\n{transcript}",
+                }],
+            )
+            await self._store(conversation_id, {
+                "covered": offset + len(older),
+                "text": response.get("content", "").strip(),
+            })
+        except Exception as e:
+            logger.warning(f"History summary failed for {conversation_id}: {e}")
+        finally:
+            self._pending.pop(conversation_id, None)
+    
+    async def _load(self, conversation_id: str) -> Optional[dict[str, Any]]:
+        try:
+            redis_client = await get_redis()
+            data = await redis_client.client.get(
+                self.SUMMARY_KEY.format(conversation_id=conversation_id)
+            )
+        except Exception as e:
+            logger.warning(f"Summary cache unavailable: {e}")
+            return None
+        return json.loads(data) if data else None
+    
+    async def _store(self, conversation_id: str, summary: dict[str, Any]) -> None:
+        redis_client = await get_redis()
+        await redis_client.client.set(
+            self.SUMMARY_KEY.format(conversation_id=conversation_id),
+            json.dumps(summary, ensure_ascii=False),
+            ex=settings.agent_summary_ttl_hours * 3600,
+        )
+
+
+# Global history manager
+_history_manager: Optional[HistoryManager] = None
+
+
+def get_history_manager() -> HistoryManager:
+    """Get or create history manager."""
+    global _history_manager
+    if _history_manager is None:
+        _history_manager = HistoryManager()
+    return _history_manager
+
+
+async def prepare_history(
+    conversation_id: str,
+    messages: list[dict[str, Any]],
+    offset: int = 0,
+) -> list[dict[str, Any]]:
+    """Convenience function: fit conversation history into the token budget."""
+    return await get_history_manager().prepare(conversation_id, messages, offset)
@@ -0,0 +1,87 @@
+"""LLM routing fallback for messages the local router is unsure about."""
+
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from src.agents.routing import normalize
+from src.config import settings
+from src.db.redis import get_redis
+from src.deadline import deadline_timeout
+from src.llm.client import get_llm_client
+from src.llm.prompts import SUPERVISOR_PROMPT
+from src.llm.tiering import LIGHT
+
+
+logger = logging.getLogger(__name__)
+
+
+# SUPERVISOR_PROMPT answers -> stages
+LLM_INTENTS = {"SALES": "sales", "CHECKOUT": "checkout", "SUPPORT": "support"}
+
+
+class LLMIntentFallback:
+    """
+    Asks the light model with SUPERVISOR_PROMPT which agent should answer.
+    
+    Answers are cached in Redis by normalized text and current stage, so
+    a repeated ambiguous phrase costs one LLM call per TTL. Any failure,
+    timeout (`agent_intent_llm_timeout`) or unexpected answer returns
+    None and the local decision stands.
+    """
+    
+    KEY = "agent:intent:{stage}:{digest}"
+    
+    def _key(self, text: str, stage: str) -> str:
+        digest = hashlib.sha256(normalize(text).encode()).hexdigest()[:32]
+        return self.KEY.format(stage=stage, digest=digest)
+    
+    async def classify(self, text: str, stage: str) -> Optional[str]:
+        """Stage for the message, or None if the LLM gave no usable answer."""
+        key = self._key(text, stage)
+        try:
+            redis_client = await get_redis()
+            cached = await redis_client.client.get(key)
+            if cached:
+                return cached
+        except Exception as e:
+            logger.warning(f"Intent cache unavailable: {e}")
+        
+        try:
+            response = await asyncio.wait_for(
+                get_llm_client().generate(
+                    SUPERVISOR_PROMPT,
+                    [{"role": "user", "content": f"Текущий этап: {stage}\nСообщение: {text}"}],
+                    tier=LIGHT,
+                ),
+                timeout=deadline_timeout(settings.agent_intent_llm_timeout),
+            )
+        except Exception as e:
+            logger.warning(f"LLM intent fallback failed: {e}")
+            return None
+        
+        answer = (response.get("content") or "").strip().upper().strip(".!")
+        intent = LLM_INTENTS.get(answer.split()[0] if answer else "")
+        if intent is None:
+            logger.warning(f"Unexpected supervisor answer: {answer[:50]!r}")
+            return None
+        
+        try:
+            redis_client = await get_redis()
+            await redis_client.client.set(key, intent, ex=settings.agent_intent_cache_ttl)
+        except Exception:
+            pass
+        return intent
+
+
+# Global fallback instance
+_intent_fallback: Optional[LLMIntentFallback] = None
+
+
+def get_intent_fallback() -> LLMIntentFallback:
+    """Get or create LLM intent fallback."""
+    global _intent_fallback
+    if _intent_fallback is None:
+        _intent_fallback = LLMIntentFallback()
+    return _intent_fallback
@@ -6,9 +6,17 @@ from datetime import datetime
 
 from src.llm.client import get_llm_response
 from src.llm.prompts import CHECKOUT_PROMPT
-from src.agents.state import SeafoodBusinessState, DeliveryAddress
+from src.agents.state import CartItem, SeafoodBusinessState, DeliveryAddress
+from src.agents.history import prepare_history
+from src.agents.templates import get_reply_templates, render_tool_reply
 from src.tools.order import create_order
+from src.tools.executor import execute_tool_calls
 from src.db.session import async_session_maker
+from src.deadline import DeadlineExceeded, check_deadline
+
+
+# Confirmation when the order was saved but the turn ran out of time
+ORDER_CREATED_REPLY = "Заказ оформлен! Мы свяжемся с вами для подтверждения."
 
 
 async def checkout_node(state: SeafoodBusinessState) -> dict[str, Any]:
@@ -16,15 +24,18 @@ async def checkout_node(state: SeafoodBusinessState) -> dict[str, Any]:
     Checkout agent that handles order finalization.
     Executes make_order tool if called.
     """
-    messages = list(state.messages)
+    # Only new messages and cart/address changes are returned (see state reducers)
+    messages: list[dict[str, Any]] = []
     cart = list(state.cart)
+    cart_update: list[CartItem] = []
+    order_result = None
     # Convert Pydantic model to dict for tools/logic if needed, or access directly
     delivery_address = state.delivery_address
     
     async with async_session_maker() as session:
         if not cart:
             return {
-                "messages": messages + [{"role": "assistant", "content": "Корзина пуста."}],
+                "messages": [{"role": "assistant", "content": "Корзина пуста."}],
                 "current_stage": "sales"
             }
 
@@ -44,10 +55,14 @@ async def checkout_node(state: SeafoodBusinessState) -> dict[str, Any]:
         
         system_prompt += context
         
-        # Call LLM
+        # Call LLM - older turns are summarized to keep the prompt within budget
+        history = await prepare_history(
+            state.conversation_id or state.customer_id, state.messages, state.message_offset
+        )
+        
         response = await get_llm_response(
             system_prompt=system_prompt,
-            messages=messages,
+            messages=history,
             tools=["create_order", "calculate_delivery_fee"],
         )
         
@@ -60,15 +75,8 @@ async def checkout_node(state: SeafoodBusinessState) -> dict[str, Any]:
                 "tool_calls": tool_calls
             })
             
-            for tool_call in tool_calls:
-                function_name = tool_call.get("name")
-                args = tool_call.get("arguments", {})
-                if isinstance(args, str):
-                    try: 
-                        args = json.loads(args)
-                    except: 
-                        pass
-                
+            async def run_tool(session, function_name: str, args: dict) -> Any:
+                nonlocal cart, cart_update, delivery_address, order_result
                 tool_result = None
                 
                 if function_name == "create_order":
@@ -82,6 +90,8 @@ async def checkout_node(state: SeafoodBusinessState) -> dict[str, Any]:
                         # Convert Pydantic items to dicts for tool
                         cart_dicts = [item.model_dump() for item in cart]
                         
+                        # Never cancel a write halfway - only refuse to start it late
+                        check_deadline()
                         tool_result = await create_order(
                             session=session,
                             customer_id=state.customer_id,
@@ -92,26 +102,44 @@ async def checkout_node(state: SeafoodBusinessState) -> dict[str, Any]:
                             channel=state.channel,
                             phone=state.phone
                         )
-                        # Order created!
-                        # Clear cart?
-                        cart = [] 
+                        # Order created - quantity 0 removes the items from the cart
+                        order_result = tool_result
+                        cart_update = [item.model_copy(update={"quantity": 0}) for item in cart]
+                        cart = []
                     else:
                         tool_result = {"error": "Delivery address missing"}
-
+                
+                return tool_result
+            
+            results = await execute_tool_calls(tool_calls, run_tool, session)
+            
+            for tool_call, tool_result in zip(tool_calls, results):
                 messages.append({
                     "role": "tool",
-                    "name": function_name,
+                    "name": tool_call.get("name"),
                     "content": json.dumps(tool_result, default=str)
                 })
             
-            # Final response
-            final_response = await get_llm_response(
-                system_prompt=system_prompt,
-                messages=messages
-            )
+            # Final response - from a template when the outcome is simple
+            reply = await render_tool_reply(tool_calls, results)
+            if reply is None:
+                try:
+                    final_response = await get_llm_response(
+                        system_prompt=system_prompt,
+                        messages=history + messages
+                    )
+                    reply = final_response.get("content", "")
+                except DeadlineExceeded:
+                    if order_result is None:
+                        raise
+                    # The order is committed - finish the turn so the cart
+                    # clear is saved and a resent message can't order twice
+                    reply = get_reply_templates().render(
+                        [{"name": "create_order"}], [order_result]
+                    ) or ORDER_CREATED_REPLY
             messages.append({
                 "role": "assistant",
-                "content": final_response.get("content", "")
+                "content": reply
             })
         else:
             messages.append({
@@ -121,7 +149,7 @@ async def checkout_node(state: SeafoodBusinessState) -> dict[str, Any]:
             
         return {
             "messages": messages,
-            "cart": cart,
+            "cart": cart_update,
             "delivery_address": delivery_address,
             "current_stage": "checkout" # Or end?
         }
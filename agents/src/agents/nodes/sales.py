@@ -5,10 +5,14 @@ from typing import Any
 
 from src.llm.client import get_llm_response
 from src.llm.prompts import SALES_PROMPT
-from src.agents.state import SeafoodBusinessState
+from src.agents.state import CartItem, SeafoodBusinessState
+from src.agents.history import prepare_history
+from src.agents.templates import render_tool_reply
 from src.tools.stock import check_stock, get_product_price
 from src.tools.cart import add_to_cart
+from src.tools.executor import execute_tool_calls
 from src.db.session import async_session_maker
+from src.deadline import within_deadline
 
 
 async def sales_node(state: SeafoodBusinessState) -> dict[str, Any]:
@@ -16,9 +20,10 @@ async def sales_node(state: SeafoodBusinessState) -> dict[str, Any]:
     Sales agent that handles product inquiries and recommendations.
     Uses ReAct pattern: LLM -> Tool -> LLM.
     """
-    # Convert Pydantic state to access fields easier in loop
-    messages = list(state.messages)
+    # Only new messages and changed cart items are returned (see state reducers)
+    messages: list[dict[str, Any]] = []
     cart = list(state.cart)
+    changed_items: dict[str, CartItem] = {}
     
     # Get database session for tools
     async with async_session_maker() as session:
@@ -33,9 +38,14 @@ async def sales_node(state: SeafoodBusinessState) -> dict[str, Any]:
             ])
             system_prompt += f"\n\nТекущая корзина клиента:\n{cart_text}"
         
+        # Older turns are summarized to keep the prompt within budget
+        history = await prepare_history(
+            state.conversation_id or state.customer_id, state.messages, state.message_offset
+        )
+        
         response = await get_llm_response(
             system_prompt=system_prompt,
-            messages=messages,
+            messages=history,
             tools=["check_stock", "get_product_price", "add_to_cart"],
         )
         
@@ -50,33 +60,28 @@ async def sales_node(state: SeafoodBusinessState) -> dict[str, Any]:
                 "tool_calls": tool_calls
             })
             
-            for tool_call in tool_calls:
-                function_name = tool_call.get("name")
-                args = tool_call.get("arguments", {})
-                if isinstance(args, str):
-                    try:
-                        args = json.loads(args)
-                    except:
-                        pass
-                
+            async def run_tool(session, function_name: str, args: dict) -> Any:
+                nonlocal cart
                 tool_result = None
                 
                 # Execute tools
                 if function_name == "check_stock":
-                    tool_result = await check_stock(
+                    tool_result = await within_deadline(check_stock(
                         session, 
                         product_name=args.get("product_name"),
                         delivery_date=args.get("delivery_date")
-                    )
+                    ))
                 elif function_name == "get_product_price":
-                    tool_result = await get_product_price(
+                    tool_result = await within_deadline(get_product_price(
                         session,
                         product_id=args.get("product_id")
-                    )
+                    ))
                 elif function_name == "add_to_cart":
                     # For add_to_cart, we need to handle it specially as it updates state
                     # We first get price validation
-                    price_info = await get_product_price(session, args.get("product_id"))
+                    price_info = await within_deadline(
+                        get_product_price(session, args.get("product_id"))
+                    )
                     
                     if price_info.get("found"):
                         # Use updated state.cart
@@ -93,33 +98,52 @@ async def sales_node(state: SeafoodBusinessState) -> dict[str, Any]:
                         cart_dicts = result_state["cart"]
                         # We need to reflect this in the final return
                         # But for the conversation, we just say "added"
-                        tool_result = {"success": True, "message": "Item added to cart"}
+                        tool_result = {
+                            "success": True,
+                            "message": "Item added to cart",
+                            "name": price_info["name"],
+                            "quantity": int(args.get("quantity", 1)),
+                            "unit": price_info["unit"],
+                        }
                         
-                        # IMPORTANT: We must return the new cart in the final state
-                        # We'll re-construct cart objects at standard return
-                        from src.agents.state import CartItem
+                        # Keep the local cart current for later calls in this turn;
+                        # only the changed item is returned
                         cart = [CartItem(**c) for c in cart_dicts]
+                        for item in cart:
+                            if item.product_id == args.get("product_id"):
+                                changed_items[item.product_id] = item
                     else:
                         tool_result = {"error": "Product not found"}
                 
+                return tool_result
+            
+            # Lookups run concurrently, add_to_cart calls in order
+            results = await execute_tool_calls(tool_calls, run_tool, session)
+            
+            for tool_call, tool_result in zip(tool_calls, results):
                 # Append tool result
                 messages.append({
                     "role": "tool",
-                    "name": function_name,
+                    "name": tool_call.get("name"),
                     "content": json.dumps(tool_result, default=str),
                     "tool_call_id": tool_call.get("id")
                 })
             
-            # 3. Second LLM call (generate final response)
-            final_response = await get_llm_response(
-                system_prompt=system_prompt,
-                messages=messages,
-                tools=None, # Don't loop infinitely for now
-            )
+            # 3. Simple outcomes are phrased from a template
+            reply = await render_tool_reply(tool_calls, results)
+            
+            if reply is None:
+                # Second LLM call (generate final response)
+                final_response = await get_llm_response(
+                    system_prompt=system_prompt,
+                    messages=history + messages,
+                    tools=None, # Don't loop infinitely for now
+                )
+                reply = final_response.get("content", "")
             
             messages.append({
                 "role": "assistant",
-                "content": final_response.get("content", "")
+                "content": reply
             })
             
         else:
@@ -131,6 +155,6 @@ async def sales_node(state: SeafoodBusinessState) -> dict[str, Any]:
             
         return {
             "messages": messages,
-            "cart": cart,
+            "cart": list(changed_items.values()),
             "current_stage": "sales",  # Stay in sales
         }
@@ -1,7 +1,16 @@
 """Supervisor node - routes messages to appropriate agents."""
 
+import logging
 from typing import Any
+
 from src.agents.state import SeafoodBusinessState
+from src.agents.classifier import get_intent_classifier
+from src.agents.intent_fallback import get_intent_fallback
+from src.agents.routing import match_intent
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
 
 
 async def supervisor_node(state: SeafoodBusinessState) -> dict[str, Any]:
@@ -10,7 +19,6 @@ async def supervisor_node(state: SeafoodBusinessState) -> dict[str, Any]:
     """
     # Access Pydantic fields directly
     messages = state.messages
-    current_stage = state.current_stage
     cart = state.cart
     
     last_message = ""
@@ -22,38 +30,31 @@ async def supervisor_node(state: SeafoodBusinessState) -> dict[str, Any]:
     if not last_message:
         return {"current_stage": "sales"}
     
-    last_lower = last_message.lower()
-    
-    # Support keywords
-    support_keywords = [
-        "статус", "заказ", "где", "когда", "доставка", "жалоба", 
-        "проблема", "помощь", "оператор", "человек"
-    ]
-    
-    # Checkout keywords
-    checkout_keywords = [
-        "адрес", "оформ", "заказать", "подтверд", "оплат", 
-        "доставить", "куда", "слот", "время"
-    ]
-    
-    # Check for support intent
-    if any(kw in last_lower for kw in support_keywords):
-        if "статус" in last_lower or "где" in last_lower or "заказ" in last_lower:
-            return {"current_stage": "support"}
-    
-    # Check for checkout intent (only if cart has items)
-    if cart and any(kw in last_lower for kw in checkout_keywords):
-        # Only switch to checkout if we are not already there? 
-        # Or always route to checkout agent if intent matches?
-        return {"current_stage": "checkout"}
-    
-    # Check if we should escalate
-    escalate_keywords = ["человек", "оператор", "менеджер", "позвоните"]
-    if any(kw in last_lower for kw in escalate_keywords):
+    # Trained classifier first, keywords if it is unsure or not loaded.
+    # Checkout intent only counts if the cart has items.
+    intent, confidence, source = None, 0.0, "model"
+    classifier = get_intent_classifier()
+    if classifier is not None:
+        intent, confidence = classifier.predict(last_message, has_cart=bool(cart))
+    
+    if intent is None or confidence < settings.agent_intent_min_confidence:
+        match = match_intent(last_message, has_cart=bool(cart))
+        intent, confidence, source = match.intent, match.confidence, "keywords"
+        
+        # Conflicting or weak keywords: ask the LLM rather than risk a
+        # whole turn in the wrong agent. No keywords at all means sales.
+        ambiguous = match.keywords and confidence < settings.agent_intent_min_confidence
+        if ambiguous and settings.agent_intent_llm_fallback:
+            llm_intent = await get_intent_fallback().classify(last_message, state.current_stage)
+            if llm_intent and (cart or llm_intent != "checkout"):
+                intent, source = llm_intent, "llm"
+    
+    logger.debug(f"Routing {state.customer_id}: {intent} ({source}, confidence {confidence:.2f})")
+    
+    if intent == "escalate":
         return {
             "current_stage": "support",
             "escalate_to_human": True,
         }
     
-    # Default to sales
-    return {"current_stage": "sales"}
+    return {"current_stage": intent}
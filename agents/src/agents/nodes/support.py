@@ -6,16 +6,21 @@ from typing import Any
 from src.llm.client import get_llm_response
 from src.llm.prompts import SUPPORT_PROMPT
 from src.agents.state import SeafoodBusinessState
+from src.agents.history import prepare_history
+from src.agents.templates import render_tool_reply
 from src.tools.order import get_order_status
 from src.tools.escalate import escalate_to_human
+from src.tools.executor import execute_tool_calls
 from src.db.session import async_session_maker
+from src.deadline import within_deadline
 
 
 async def support_node(state: SeafoodBusinessState) -> dict[str, Any]:
     """
     Support agent that handles order status and complaints.
     """
-    messages = list(state.messages)
+    # Only new messages are returned (see state reducers)
+    messages: list[dict[str, Any]] = []
     escalate = state.escalate_to_human
     phone = state.phone
     
@@ -29,9 +34,14 @@ async def support_node(state: SeafoodBusinessState) -> dict[str, Any]:
         if phone:
             system_prompt += f"\n\nТелефон клиента: {phone}"
         
+        # Older turns are summarized to keep the prompt within budget
+        history = await prepare_history(
+            state.conversation_id or state.customer_id, state.messages, state.message_offset
+        )
+        
         response = await get_llm_response(
             system_prompt=system_prompt,
-            messages=messages,
+            messages=history,
             tools=["get_order_status", "escalate_to_human"],
         )
         
@@ -43,44 +53,49 @@ async def support_node(state: SeafoodBusinessState) -> dict[str, Any]:
                 "tool_calls": tool_calls
             })
             
-            for tool_call in tool_calls:
-                function_name = tool_call.get("name")
-                args = tool_call.get("arguments", {})
-                if isinstance(args, str):
-                    try: args = json.loads(args)
-                    except: pass
-                
+            async def run_tool(session, function_name: str, args: dict) -> Any:
+                nonlocal escalate
                 tool_result = None
                 
                 if function_name == "get_order_status":
-                    tool_result = await get_order_status(
+                    tool_result = await within_deadline(get_order_status(
                         session,
                         phone=phone,
                         order_number=args.get("order_number")
-                    )
+                    ))
                 elif function_name == "escalate_to_human":
                     tool_result = await escalate_to_human(
                         customer_id=state.customer_id,
                         channel=state.channel,
                         reason=args.get("reason", "User requested"),
-                        context=messages,
+                        context=state.messages + messages,
                         phone=phone
                     )
                     escalate = True
                 
+                return tool_result
+            
+            # Status lookups run concurrently, escalation in order
+            results = await execute_tool_calls(tool_calls, run_tool, session)
+            
+            for tool_call, tool_result in zip(tool_calls, results):
                 messages.append({
                     "role": "tool",
-                    "name": function_name,
+                    "name": tool_call.get("name"),
                     "content": json.dumps(tool_result, default=str)
                 })
             
-            final_response = await get_llm_response(
-                system_prompt=system_prompt,
-                messages=messages
-            )
+            # Final response - from a template when the outcome is simple
+            reply = await render_tool_reply(tool_calls, results)
+            if reply is None:
+                final_response = await get_llm_response(
+                    system_prompt=system_prompt,
+                    messages=history + messages
+                )
+                reply = final_response.get("content", "")
             messages.append({
                 "role": "assistant",
-                "content": final_response.get("content", "")
+                "content": reply
             })
         else:
              messages.append({
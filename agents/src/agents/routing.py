@@ -0,0 +1,174 @@
+"""Keyword intent matcher for supervisor routing."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+# Intent -> {stem: weight}. Stems match at the start of a word, so one
+# entry covers all inflections ("оформ" - оформить, оформление, ...).
+# Multi-word entries match with any whitespace between words.
+INTENT_KEYWORDS: dict[str, dict[str, float]] = {
+    "support": {
+        "статус": 1.0,
+        "заказ": 0.6,
+        "где": 0.5,  # "где купить" is sales - ambiguous alone
+        "когда": 0.3,
+        "жалоб": 1.0,
+        "претензи": 1.0,
+        "проблем": 0.8,
+        "помощ": 0.5,
+        "помоги": 0.5,
+        "опозда": 0.8,
+        "не привез": 1.0,
+        "не доставил": 1.0,
+        "испорч": 1.0,
+        "возврат": 1.0,
+        "верните": 1.0,
+    },
+    "checkout": {
+        "адрес": 1.0,
+        "оформ": 1.0,
+        "заказать": 1.0,
+        "закажу": 1.0,
+        "подтверд": 0.8,
+        "оплат": 1.0,
+        "доставить": 0.8,
+        "доставк": 0.4,
+        "куда": 0.5,
+        "слот": 0.8,
+        "врем": 0.4,
+    },
+    "escalate": {
+        # "человек" alone is a headcount ("на 6 человек") - phrases only
+        "живой человек": 1.0,
+        "живого человек": 1.0,
+        "живым человек": 1.0,
+        "позови человек": 1.0,
+        "позовите человек": 1.0,
+        "с человек": 1.0,  # поговорить/соедините с человеком
+        "оператор": 1.0,
+        "менеджер": 1.0,
+        "позвоните": 1.0,
+        "перезвоните": 1.0,
+        "живой": 0.3,  # below MIN_SCORE alone - "живой краб" is an order
+    },
+}
+
+# Intents that only make sense with a non-empty cart
+CART_INTENTS = {"checkout"}
+
+# Below this total weight the message is not a clear signal for any intent
+MIN_SCORE = 0.5
+
+DEFAULT_INTENT = "sales"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold ё to е and collapse whitespace."""
+    return " ".join(text.lower().replace("ё", "е").split())
+
+
+def _trie_pattern(stems: list[str]) -> str:
+    """
+    Regex for a set of stems, factored as a prefix trie.
+    
+    "заказ", "заказать" -> "заказ(?:ать)?". Shared prefixes are matched
+    once instead of retrying every alternative, and the greedy optional
+    groups prefer the longest stem.
+    """
+    trie: dict = {}
+    for stem in stems:
+        node = trie
+        for char in stem:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: dict) -> str:
+        ends_here = "" in node
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if ends_here:
+            return f"(?:{body})?" if len(branches) == 1 else f"{body}?"
+        return body
+    
+    return build(trie)
+
+
+@dataclass
+class IntentMatch:
+    """Routing decision with the evidence behind it."""
+    intent: str
+    confidence: float
+    scores: dict[str, float] = field(default_factory=dict)
+    keywords: list[str] = field(default_factory=list)
+
+
+class IntentMatcher:
+    """
+    Weighted keyword matcher compiled into a single regex.
+    
+    All stems go into one regex factored as a prefix trie (longest stem
+    wins, so "заказать" beats "заказ"), anchored at word starts. One
+    `finditer` pass over the
+    normalized message collects the matched stems; each adds its weight
+    to its intent. The best eligible intent wins if its score reaches
+    MIN_SCORE; confidence is its share of all matched weight, scaled
+    down for weak evidence.
+    """
+    
+    def __init__(self, keywords: dict[str, dict[str, float]]):
+        self._lookup: dict[str, tuple[str, float]] = {}
+        for intent, stems in keywords.items():
+            for stem, weight in stems.items():
+                self._lookup[normalize(stem)] = (intent, weight)
+        
+        self._pattern = re.compile(rf"(?<!\w){_trie_pattern(self._lookup)}")
+    
+    def scores(self, text: str) -> tuple[dict[str, float], list[str]]:
+        """Total weight per intent and the stems that matched."""
+        scores: dict[str, float] = {}
+        matched: list[str] = []
+        lookup = self._lookup
+        for m in self._pattern.finditer(normalize(text)):
+            stem = m.group()
+            if stem not in lookup:
+                # Multi-word stem matched across a line break
+                stem = " ".join(stem.split())
+            intent, weight = lookup[stem]
+            scores[intent] = scores.get(intent, 0.0) + weight
+            matched.append(stem)
+        return scores, matched
+    
+    def match(self, text: str, has_cart: bool = False) -> IntentMatch:
+        """Pick the intent for a user message."""
+        scores, matched = self.scores(text)
+        
+        best: Optional[str] = None
+        best_score = total = 0.0
+        for intent, score in scores.items():
+            if not has_cart and intent in CART_INTENTS:
+                continue
+            total += score
+            if score > best_score:
+                best, best_score = intent, score
+        
+        if best is None or best_score < MIN_SCORE:
+            return IntentMatch(DEFAULT_INTENT, 0.0, scores, matched)
+        
+        confidence = (best_score / total) * min(1.0, best_score)
+        return IntentMatch(best, round(confidence, 3), scores, matched)
+
+
+# Built once at import
+intent_matcher = IntentMatcher(INTENT_KEYWORDS)
+
+
+def match_intent(text: str, has_cart: bool = False) -> IntentMatch:
+    """Match a user message against the default keyword table."""
+    return intent_matcher.match(text, has_cart)
@@ -1,9 +1,9 @@
 """State definitions for the agent graph."""
 
 from decimal import Decimal
-from typing import Any, Optional
+from typing import Annotated, Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, SkipValidation
 
 
 class CartItem(BaseModel):
@@ -25,14 +25,57 @@ class DeliveryAddress(BaseModel):
     comment: Optional[str] = None
 
 
+# Reducers: LangGraph combines a node's update with the current value, so
+# nodes return only what changed instead of copying the whole state.
+
+def append_messages(
+    current: list[dict[str, Any]],
+    new: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """Append the messages a node added."""
+    return current + new if new else current
+
+
+def merge_cart(current: list[CartItem], update: list[CartItem]) -> list[CartItem]:
+    """Replace items by product_id; quantity 0 removes the item."""
+    if not update:
+        return current
+    items = {item.product_id: item for item in current}
+    for item in update:
+        if item.quantity > 0:
+            items[item.product_id] = item
+        else:
+            items.pop(item.product_id, None)
+    return list(items.values())
+
+
+def merge_address(
+    current: Optional[DeliveryAddress],
+    update: Optional[DeliveryAddress],
+) -> Optional[DeliveryAddress]:
+    """Add details (flat, floor, ...) to the same street/house, else replace."""
+    if update is None:
+        return current
+    if current is None or (current.street, current.house) != (update.street, update.house):
+        return update
+    return current.model_copy(update=update.model_dump(exclude_unset=True))
+
+
 class SeafoodBusinessState(BaseModel):
     """
     Main state for the seafood ordering agent.
     
     This state is passed through the LangGraph and updated by each node.
+    Nodes return deltas: new messages, changed cart items, address details.
+    Messages are not re-validated on every step (they only ever come from
+    our own code), so nodes must not mutate `state.messages` in place.
     """
     # Conversation
-    messages: list[dict[str, Any]] = Field(default_factory=list)
+    messages: Annotated[list[dict[str, Any]], SkipValidation, append_messages] = Field(
+        default_factory=list
+    )
+    message_offset: int = 0  # Earlier messages kept in Redis, not loaded
+    conversation_id: Optional[str] = None  # state_id or customer_id, set per turn
     
     # Customer
     customer_id: str  # unified_customer_id
@@ -40,11 +83,11 @@ class SeafoodBusinessState(BaseModel):
     phone: Optional[str] = None
     
     # Shopping cart
-    cart: list[CartItem] = Field(default_factory=list)
+    cart: Annotated[list[CartItem], merge_cart] = Field(default_factory=list)
     order_total: Optional[Decimal] = None
     
     # Delivery
-    delivery_address: Optional[DeliveryAddress] = None
+    delivery_address: Annotated[Optional[DeliveryAddress], merge_address] = None
     delivery_date: Optional[str] = None
     delivery_slot: Optional[str] = None  # MORNING/DAY/EVENING or hourly
     
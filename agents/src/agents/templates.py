@@ -0,0 +1,155 @@
+"""Reply templates for deterministic tool outcomes."""
+
+import logging
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from src.config import settings
+from src.db.redis import get_redis
+from src.llm.client import llm_stream_sink
+
+
+logger = logging.getLogger(__name__)
+
+
+SLOT_LABELS = {
+    "MORNING": "утром",
+    "DAY": "днём",
+    "EVENING": "вечером",
+}
+
+
+def _format_date(value: str) -> str:
+    return datetime.fromisoformat(value).strftime("%d.%m")
+
+
+def _add_to_cart(result: Any) -> Optional[str]:
+    if not isinstance(result, dict) or not result.get("success") or "name" not in result:
+        return None
+    return (
+        f"Добавил в корзину: {result['name']} — {result['quantity']} {result['unit']}. "
+        f"Добавить что-то ещё или оформляем заказ?"
+    )
+
+
+def _create_order(result: Any) -> Optional[str]:
+    if not isinstance(result, dict) or not result.get("success"):
+        return None
+    slot = SLOT_LABELS.get(result.get("slot"), "")
+    return (
+        f"Заказ {result['order_number']} оформлен! "
+        f"Сумма: {result['total_amount']:.0f}₽, доставка "
+        f"{_format_date(result['delivery_date'])} {slot}".rstrip()
+        + ". Мы свяжемся с вами для подтверждения."
+    )
+
+
+def _get_order_status(result: Any) -> Optional[str]:
+    # No orders found: the LLM asks for the order number or phone
+    if not isinstance(result, list) or not result:
+        return None
+    lines = [
+        f"Заказ {o['order_number']}: {o['status_label']}, "
+        f"доставка {_format_date(o['delivery_date'])}"
+        for o in result
+    ]
+    return "\n".join(lines)
+
+
+def _escalate_to_human(result: Any) -> Optional[str]:
+    if not isinstance(result, dict) or not result.get("success"):
+        return None
+    return "Передал ваш вопрос менеджеру — он свяжется с вами в ближайшее время."
+
+
+# Tool name -> renderer; None from a renderer means "needs the LLM"
+TEMPLATES: dict[str, Callable[[Any], Optional[str]]] = {
+    "add_to_cart": _add_to_cart,
+    "create_order": _create_order,
+    "get_order_status": _get_order_status,
+    "escalate_to_human": _escalate_to_human,
+}
+
+
+class ReplyTemplates:
+    """
+    Renders the reply after tool calls without a second LLM call.
+    
+    A reply is rendered only if every tool in the batch has a template
+    and each result has the simple shape the template expects (success,
+    found orders, ...). Anything open-ended - recommendations after
+    check_stock, errors, empty lookups - is left to the LLM.
+    """
+    
+    STATS_KEY = "agent:templates:stats"  # HASH: rendered / llm / rendered:{tool}
+    
+    def render(self, tool_calls: list[dict], results: list[Any]) -> Optional[str]:
+        """Reply for the tool results, or None if the LLM is needed."""
+        parts = []
+        for tool_call, result in zip(tool_calls, results, strict=True):
+            template = TEMPLATES.get(tool_call.get("name"))
+            if template is None:
+                return None
+            try:
+                text = template(result)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Template for {tool_call.get('name')} failed: {e}")
+                return None
+            if text is None:
+                return None
+            parts.append(text)
+        return "\n\n".join(parts) or None
+    
+    async def _count(self, *fields: str) -> None:
+        try:
+            redis_client = await get_redis()
+            async with redis_client.client.pipeline(transaction=False) as pipe:
+                for field in fields:
+                    pipe.hincrby(self.STATS_KEY, field, 1)
+                await pipe.execute()
+        except Exception:
+            pass
+    
+    async def reply(self, tool_calls: list[dict], results: list[Any]) -> Optional[str]:
+        """Render and count; streams the reply to the sink if one is set."""
+        text = self.render(tool_calls, results) if settings.agent_reply_templates_enabled else None
+        
+        if text is None:
+            await self._count("llm")
+            return None
+        
+        await self._count("rendered", *(f"rendered:{tc.get('name')}" for tc in tool_calls))
+        sink = llm_stream_sink.get()
+        if sink is not None:
+            await sink.put({"type": "delta", "text": text})
+        return text
+    
+    async def stats(self) -> dict[str, float]:
+        """Second LLM calls avoided vs made."""
+        redis_client = await get_redis()
+        data = await redis_client.client.hgetall(self.STATS_KEY)
+        rendered = int(data.get("rendered", 0))
+        llm = int(data.get("llm", 0))
+        return {
+            **{k: int(v) for k, v in data.items()},
+            "rendered": rendered,
+            "llm": llm,
+            "avoided_rate": rendered / (rendered + llm) if rendered + llm else 0.0,
+        }
+
+
+# Global templates instance
+_reply_templates: Optional[ReplyTemplates] = None
+
+
+def get_reply_templates() -> ReplyTemplates:
+    """Get or create reply templates."""
+    global _reply_templates
+    if _reply_templates is None:
+        _reply_templates = ReplyTemplates()
+    return _reply_templates
+
+
+async def render_tool_reply(tool_calls: list[dict], results: list[Any]) -> Optional[str]:
+    """Templated reply after tools, or None to ask the LLM."""
+    return await get_reply_templates().reply(tool_calls, results)
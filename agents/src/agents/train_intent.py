@@ -0,0 +1,125 @@
+"""
+Train the supervisor intent classifier.
+
+Usage:
+    python -m src.agents.train_intent --out models/intent.npz
+    python -m src.agents.train_intent --jsonl labeled.jsonl --out models/intent.npz
+
+By default examples come from logged `agent_messages`: each incoming
+message is labeled by the tools called in the next outgoing message of
+the same customer (see TOOL_INTENTS); turns without tool calls are
+skipped as ambiguous. A JSONL file of {"text": ..., "intent": ...}
+lines can be used instead or in addition.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Optional
+
+from sqlalchemy import select
+
+from src.agents.classifier import INTENTS, IntentClassifier
+from src.db.models import AgentMessage, MessageDirection
+from src.db.session import async_session_maker
+
+
+# Tool called in the reply -> intent of the message that triggered it
+TOOL_INTENTS = {
+    "escalate_to_human": "escalate",
+    "create_order": "checkout",
+    "calculate_delivery_fee": "checkout",
+    "get_order_status": "support",
+    "add_to_cart": "sales",
+    "check_stock": "sales",
+    "get_product_price": "sales",
+}
+
+
+def label_from_tool_calls(tool_calls: Optional[list]) -> Optional[str]:
+    """Intent implied by a reply's tool calls (first match in priority order)."""
+    names = {
+        tc.get("name") or tc.get("function", {}).get("name")
+        for tc in tool_calls or []
+        if isinstance(tc, dict)
+    }
+    for tool, intent in TOOL_INTENTS.items():
+        if tool in names:
+            return intent
+    return None
+
+
+async def load_logged_examples(limit: int) -> list[tuple[str, str]]:
+    """(text, intent) pairs from the latest `limit` agent_messages."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(AgentMessage)
+            .order_by(AgentMessage.created_at.desc())
+            .limit(limit)
+        )
+        # Pair each reply with the customer's preceding message
+        rows = sorted(result.scalars().all(), key=lambda r: (r.customer_id, r.created_at))
+    
+    examples = []
+    pending: dict[str, str] = {}  # customer_id -> last incoming text
+    for row in rows:
+        if row.direction == MessageDirection.IN:
+            pending[row.customer_id] = row.text
+            continue
+        text = pending.pop(row.customer_id, None)
+        intent = label_from_tool_calls(row.tool_calls)
+        if text and intent:
+            examples.append((text, intent))
+    return examples
+
+
+def load_jsonl_examples(path: str) -> list[tuple[str, str]]:
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                if item.get("intent") in INTENTS:
+                    examples.append((item["text"], item["intent"]))
+    return examples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", required=True, help="Output .npz model path")
+    parser.add_argument("--jsonl", help="Labeled examples file")
+    parser.add_argument("--no-db", action="store_true", help="Skip agent_messages")
+    parser.add_argument("--limit", type=int, default=200000, help="Max logged messages")
+    parser.add_argument("--dim", type=int, default=2 ** 16, help="Hash space (power of 2)")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--holdout", type=float, default=0.1, help="Share kept for evaluation")
+    args = parser.parse_args()
+    
+    examples = []
+    if not args.no_db:
+        examples += await load_logged_examples(args.limit)
+    if args.jsonl:
+        examples += load_jsonl_examples(args.jsonl)
+    if not examples:
+        raise SystemExit("No labeled examples found")
+    
+    random.Random(0).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    train, test = examples[:split], examples[split:]
+    
+    model = IntentClassifier.train(
+        [t for t, _ in train], [i for _, i in train], dim=args.dim, epochs=args.epochs
+    )
+    model.save(args.out)
+    
+    counts = {intent: sum(1 for _, i in examples if i == intent) for intent in INTENTS}
+    print(f"examples: {counts}")
+    print(f"train accuracy: {model.accuracy(*map(list, zip(*train, strict=True))):.3f}")
+    if test:
+        print(f"holdout accuracy: {model.accuracy(*map(list, zip(*test, strict=True))):.3f}")
+    print(f"saved to {args.out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
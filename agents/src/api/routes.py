@@ -1,29 +1,86 @@
 """API routes for the agents service."""
 
-from typing import Any
+import hmac
+import json
+from typing import Any, AsyncIterator, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from src.agents.graph import run_agent
+from src.agents.checkpoint import get_checkpointer
+from src.agents.dispatcher import dispatch_turn
+from src.agents.graph import run_agent_stream
 from src.agents.state import AgentRunRequest, AgentRunResponse
+from src.config import settings
+from src.queue.consumer import get_queue_stats
 
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
 
-@router.post("/run", response_model=AgentRunResponse)
-async def run_agent_endpoint(request: AgentRunRequest) -> AgentRunResponse:
+@router.post("/run", response_model=AgentRunResponse, responses={204: {"description": "Merged"}})
+async def run_agent_endpoint(request: AgentRunRequest) -> Any:
     """
     Process a message through the agent graph.
     
     This is the main endpoint for all channel adapters (TG, WA, VK, IG).
+    Messages of one customer are processed in order; a quick burst is
+    answered once, in the response to its last message. The earlier ones
+    get 204 No Content and need no reply.
     """
     try:
-        result = await run_agent(request)
-        return result
+        result = await dispatch_turn(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        return Response(status_code=204)
+    return result
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post("/run/stream")
+async def run_agent_stream_endpoint(request: AgentRunRequest) -> StreamingResponse:
+    """
+    Process a message through the agent graph, streaming the reply (SSE).
+    
+    Events:
+    - delta: {"text": ...} - reply chunk as generated by the LLM
+    - tool_call: {"name": ...} - agent is calling a tool; text streamed
+      so far was an intermediate message
+    - final: AgentRunResponse - authoritative final reply
+    - merged: {} - the message was answered together with the customer's
+      next one; no reply for this request
+    - error: {"detail": ...}
+    
+    Used by the site widget to show the reply as it is generated.
+    """
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event in run_agent_stream(request, dispatch_turn):
+                if event["type"] == "delta":
+                    yield _sse("delta", {"text": event["text"]})
+                elif event["type"] == "tool_call":
+                    yield _sse("tool_call", {"name": event["tool_call"]["name"]})
+                elif event["type"] == "final" and event["response"] is None:
+                    yield _sse("merged", {})
+                elif event["type"] == "final":
+                    yield _sse("final", event["response"].model_dump())
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        },
+    )
 
 
 class StateResponse(BaseModel):
@@ -33,7 +90,52 @@ class StateResponse(BaseModel):
 
 
 @router.get("/state/{state_id}", response_model=StateResponse)
-async def get_state_endpoint(state_id: str) -> StateResponse:
-    """Get agent state by ID for debugging/retry."""
-    # TODO: Implement state retrieval from Redis
-    raise HTTPException(status_code=501, detail="State retrieval not implemented yet")
+async def get_state_endpoint(
+    state_id: str,
+    fields: Optional[str] = None,
+    window: int = Query(default=settings.agent_state_window, ge=0, le=1000),
+    x_api_key: str = Header(default=""),
+) -> StateResponse:
+    """
+    Get agent state by ID for debugging/retry.
+    
+    The state holds the customer's cart, address and messages, so the
+    `X-API-Key` header must match STATE_API_KEY; with no key configured
+    the route is closed.
+    
+    `fields` is a comma-separated projection, e.g. `cart,current_stage`;
+    the message history is only read if `messages` is listed (or no
+    projection is given), limited to the last `window` messages (0 for
+    all). Fields left at their default are returned with that default.
+    """
+    if not settings.state_api_key or not hmac.compare_digest(
+        x_api_key.encode(), settings.state_api_key.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid API key")
+    
+    checkpointer = get_checkpointer()
+    projection = None
+    if fields is not None:
+        projection = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(projection) - checkpointer.FIELDS
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+    
+    try:
+        state = await checkpointer.read(state_id, projection, window)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"State store unavailable: {e}") from e
+    if state is None:
+        raise HTTPException(status_code=404, detail="State not found")
+    return StateResponse(state_id=state_id, state=state)
+
+
+@router.get("/queue/stats")
+async def queue_stats_endpoint() -> dict[str, int]:
+    """Queue consumer metrics: reclaimed and dead-lettered entries, backlog."""
+    try:
+        return await get_queue_stats()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Queue unavailable: {e}") from e
@@ -11,6 +11,8 @@ class Settings(BaseSettings):
 
     # Redis
     redis_url: str = "redis://localhost:6379/0"
+    # zstd-compress stored values above this many bytes, 0 = off
+    redis_compress_threshold: int = 1024
 
     # LLM Keys
     gemini_api_key: str = ""
@@ -20,6 +22,8 @@ class Settings(BaseSettings):
     telegram_bot_token: str = ""
     telegram_webhook_secret: str = ""
     admin_chat_id: str = ""  # For escalation alerts
+    telegram_progressive_replies: bool = False  # Stream replies via editMessageText
+    telegram_edit_interval: float = 1.5  # Min seconds between edits of one message
 
     # WhatsApp Cloud API
     whatsapp_api_token: str = ""  # Permanent token from Meta Business
@@ -45,12 +49,106 @@ class Settings(BaseSettings):
 
     # Security
     hmac_secret: str = ""
+    state_api_key: str = ""  # X-API-Key for GET /agents/state; empty disables the route
     allowed_hosts: str = "localhost,127.0.0.1"
 
     # LLM Settings
     llm_max_tokens: int = 2048
     llm_timeout: int = 30
     llm_temperature: float = 0.7
+    llm_latency_window: int = 100  # Latency samples kept per provider
+
+    # LLM routing: order the fallback chain by observed latency/success
+    llm_routing_policy: str = "latency"  # "latency" or "static"
+    llm_routing_alpha: float = 0.2  # EWMA smoothing, higher = reacts faster
+    llm_routing_exploration: float = 0.05  # Share of requests trying a fallback first
+    llm_routing_prior_latency: float = 3.0  # Assumed latency of unseen models, seconds
+
+    # LLM tiering: trivial turns (greetings, thanks) go to a light model
+    llm_tiering_enabled: bool = True
+    llm_light_model: str = "gemini-2.0-flash-lite"
+    llm_light_max_tokens: int = 256
+    llm_light_max_words: int = 6  # Longer messages always use the heavy model
+
+    # LLM hedging: start the next provider if the current one is slow
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 0.95  # Hedge after this latency percentile
+    llm_hedge_min_samples: int = 20  # Samples needed before using the percentile
+    llm_hedge_default_delay: float = 4.0  # Seconds, until enough samples
+
+    # LLM circuit breaker (per provider/model)
+    llm_breaker_enabled: bool = True
+    llm_breaker_shared: bool = True  # Share state across workers via Redis
+    llm_breaker_window: int = 60  # Rolling window, seconds
+    llm_breaker_bucket: int = 10  # Bucket size within the window, seconds
+    llm_breaker_min_calls: int = 5  # Calls in window before the breaker can open
+    llm_breaker_failure_rate: float = 0.5  # Open at this error rate
+    llm_breaker_slow_call: float = 10.0  # Calls slower than this (s) count as slow
+    llm_breaker_slow_rate: float = 0.8  # Open at this slow-call rate
+    llm_breaker_open_seconds: int = 30  # Time before a half-open probe
+
+    # LLM provider rate limits (token buckets shared via Redis, 0 = unlimited)
+    llm_ratelimit_enabled: bool = True
+    llm_ratelimit_max_wait: float = 2.0  # Max queueing before trying next provider
+    llm_ratelimit_output_reserve: int = 500  # Tokens reserved for the answer
+    llm_gemini_rpm: int = 15
+    llm_gemini_tpm: int = 1000000
+    llm_openrouter_rpm: int = 0
+    llm_openrouter_tpm: int = 0
+
+    # LLM response cache (exact match on prompt + normalized history)
+    llm_cache_enabled: bool = True
+    llm_cache_ttl: int = 600  # Seconds
+    llm_cache_max_entries: int = 10000
+
+    # Gemini context caching of static prompts + tool declarations
+    llm_context_cache_enabled: bool = True
+    llm_context_cache_ttl: int = 3600  # Seconds
+    llm_context_cache_refresh: int = 300  # Extend when less than this remains
+    llm_context_cache_retry: int = 3600  # Wait after a failed create, seconds
+    llm_context_cache_min_tokens: int = 4096  # Gemini's minimum for gemini-2.0-flash
+
+    # Agent turn deadline (bounds LLM retries, fallbacks and tools)
+    agent_turn_deadline: float = 25.0  # Seconds before a canned reply is sent
+    
+    # Per-customer turn ordering: a burst of messages becomes one turn
+    agent_debounce_window: float = 0.0  # Quiet time before a turn starts, 0 = no wait
+    agent_debounce_max_wait: float = 5.0  # Max delay after the first message of a burst
+
+    # Supervisor intent classifier (see src/agents/train_intent.py)
+    agent_intent_model_path: str = ""  # .npz model; empty = keyword routing
+    agent_intent_min_confidence: float = 0.6  # Below this keywords, then LLM decide
+    agent_intent_llm_fallback: bool = True  # Ask SUPERVISOR_PROMPT on ambiguous keywords
+    agent_intent_llm_timeout: float = 3.0  # Seconds
+    agent_intent_cache_ttl: int = 86400  # Seconds
+
+    # Agent tool execution
+    agent_tool_concurrency: int = 4  # Parallel read-only tool calls per turn
+    agent_reply_templates_enabled: bool = True  # Skip 2nd LLM call for simple outcomes
+
+    # Agent conversation history
+    agent_state_ttl_hours: int = 72  # Conversation checkpoint, refreshed every turn
+    agent_state_window: int = 40  # Recent messages loaded per turn; older stay in Redis
+    agent_history_token_budget: int = 3000  # Summarize older turns above this
+    agent_history_keep_turns: int = 4  # User turns always sent verbatim
+    agent_summary_ttl_hours: int = 24
+    agent_summary_refresh_turns: int = 4  # Re-summarize once this many user turns are uncovered
+
+    # Redis Streams consumer
+    queue_concurrency: int = 8  # Handlers running at once (different customers)
+    queue_drain_timeout: float = 30.0  # stop() waits this long for in-flight entries
+    queue_retry_backoff: float = 1.0  # First retry delay, seconds, doubled per attempt
+    queue_retry_poll_interval: float = 0.5  # How often due retries are re-queued
+    queue_retry_batch: int = 100  # Max retries re-queued per poll
+    queue_reclaim_interval: float = 15.0  # How often stuck entries are reclaimed, seconds
+    queue_reclaim_min_idle: int = 60000  # ms pending before another worker takes an entry
+    
+    # Outbound HTTP (shared pools for LLM providers and channel APIs)
+    http_max_connections: int = 100  # Per host
+    http_max_keepalive_connections: int = 20  # Per host
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept
+    http_timeout: float = 10.0  # Default timeout for channel API calls
+    http_http2: bool = True  # Used only if `h2` is installed
 
     class Config:
         env_file = ".env"
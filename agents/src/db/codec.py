@@ -0,0 +1,42 @@
+"""Compact binary encoding for values stored in Redis."""
+
+from typing import Any
+
+import ormsgpack
+import zstandard
+
+from src.config import settings
+
+
+# First byte of every stored value
+RAW = b"\x00"
+ZSTD = b"\x01"
+
+_compressor = zstandard.ZstdCompressor(level=3)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def pack(value: Any) -> bytes:
+    """
+    MessagePack-encode `value`, zstd-compressed above `redis_compress_threshold`.
+    
+    Unknown types (Decimal, datetime) are stored as strings, like the
+    `json.dumps(default=str)` encoding this replaces.
+    """
+    data = ormsgpack.packb(value, default=str, option=ormsgpack.OPT_NON_STR_KEYS)
+    threshold = settings.redis_compress_threshold
+    if threshold and len(data) > threshold:
+        compressed = _compressor.compress(data)
+        if len(compressed) < len(data):
+            return ZSTD + compressed
+    return RAW + data
+
+
+def unpack(data: bytes) -> Any:
+    """Decode a value written by `pack`."""
+    header, body = data[:1], data[1:]
+    if header == ZSTD:
+        body = _decompressor.decompress(body)
+    elif header != RAW:
+        raise ValueError(f"Unknown value encoding: {header!r}")
+    return ormsgpack.unpackb(body)
@@ -7,6 +7,7 @@ from typing import Any, Optional
 import redis.asyncio as redis
 
 from src.config import settings
+from src.db.codec import pack, unpack
 
 
 class RedisClient:
@@ -15,10 +16,14 @@ class RedisClient:
     - Session/state storage with TTL
     - Message queue (Redis Streams)
     - Caching (products, delivery slots)
+    
+    Agent state is stored in a compact binary encoding (see
+    `src.db.codec`) through a second connection that returns raw bytes.
     """
     
     def __init__(self):
         self._client: Optional[redis.Redis] = None
+        self._binary: Optional[redis.Redis] = None
     
     async def connect(self) -> None:
         """Connect to Redis."""
@@ -27,6 +32,7 @@ class RedisClient:
             encoding="utf-8",
             decode_responses=True,
         )
+        self._binary = redis.from_url(settings.redis_url)
         # Test connection
         await self._client.ping()
     
@@ -34,6 +40,8 @@ class RedisClient:
         """Close Redis connection."""
         if self._client:
             await self._client.close()
+        if self._binary:
+            await self._binary.close()
     
     @property
     def client(self) -> redis.Redis:
@@ -42,35 +50,83 @@ class RedisClient:
             raise RuntimeError("Redis not connected. Call connect() first.")
         return self._client
     
-    # === State Management ===
+    @property
+    def binary(self) -> redis.Redis:
+        """Get Redis client for binary values (no response decoding)."""
+        if not self._binary:
+            raise RuntimeError("Redis not connected. Call connect() first.")
+        return self._binary
+    
+    # === Conversation Log ===
     
-    async def save_state(
+    async def get_conversation(
         self,
-        state_id: str,
-        state: dict[str, Any],
+        conversation_id: str,
+        window: Optional[int],
+        fields: Optional[list[str]] = None,
+    ) -> tuple[dict[str, Any], list[dict[str, Any]], int]:
+        """
+        Get conversation fields and the last `window` messages.
+        
+        `window` 0 reads all messages, None none of them. `fields`
+        limits which hash fields are read (None = all).
+        Returns (fields, messages, total message count) in one round trip.
+        """
+        fields_key = f"agent:conv:{conversation_id}:fields"
+        messages_key = f"agent:conv:{conversation_id}:messages"
+        pipe = self.binary.pipeline(transaction=False)
+        if fields is None:
+            pipe.hgetall(fields_key)
+        elif fields:
+            pipe.hmget(fields_key, fields)
+        if window is not None:
+            # LRANGE -0 -1 is the whole list, as 0 -1
+            pipe.lrange(messages_key, -window, -1)
+        pipe.llen(messages_key)
+        results = await pipe.execute()
+        
+        if fields is None:
+            stored = {name.decode(): value for name, value in results.pop(0).items()}
+        elif fields:
+            stored = dict(zip(fields, results.pop(0)))
+        else:
+            stored = {}
+        messages = results.pop(0) if window is not None else []
+        return (
+            {name: unpack(value) for name, value in stored.items() if value is not None},
+            [unpack(m) for m in messages],
+            results.pop(0),
+        )
+    
+    async def append_conversation(
+        self,
+        conversation_id: str,
+        messages: list[dict[str, Any]],
+        fields: dict[str, Any],
+        removed: list[str],
         ttl_hours: int = 24,
     ) -> None:
-        """Save agent state with TTL."""
-        key = f"agent:state:{state_id}"
-        await self.client.set(
-            key,
-            json.dumps(state, default=str),
-            ex=timedelta(hours=ttl_hours),
+        """Append new messages and update changed fields, refreshing the TTL."""
+        fields_key = f"agent:conv:{conversation_id}:fields"
+        messages_key = f"agent:conv:{conversation_id}:messages"
+        pipe = self.binary.pipeline(transaction=True)
+        if messages:
+            pipe.rpush(messages_key, *[pack(m) for m in messages])
+        if fields:
+            pipe.hset(fields_key, mapping={k: pack(v) for k, v in fields.items()})
+        if removed:
+            pipe.hdel(fields_key, *removed)
+        pipe.expire(fields_key, timedelta(hours=ttl_hours))
+        pipe.expire(messages_key, timedelta(hours=ttl_hours))
+        await pipe.execute()
+    
+    async def delete_conversation(self, conversation_id: str) -> None:
+        """Delete conversation fields and messages."""
+        await self.client.delete(
+            f"agent:conv:{conversation_id}:fields",
+            f"agent:conv:{conversation_id}:messages",
         )
     
-    async def get_state(self, state_id: str) -> Optional[dict[str, Any]]:
-        """Get agent state by ID."""
-        key = f"agent:state:{state_id}"
-        data = await self.client.get(key)
-        if data:
-            return json.loads(data)
-        return None
-    
-    async def delete_state(self, state_id: str) -> None:
-        """Delete agent state."""
-        key = f"agent:state:{state_id}"
-        await self.client.delete(key)
-    
     # === Customer Identity Mapping ===
     
     async def get_customer_id(
@@ -0,0 +1,77 @@
+"""Per-turn deadline shared by nodes, tools and LLM calls."""
+
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """The turn ran out of time."""
+    pass
+
+
+class Deadline:
+    """Absolute point in time by which the current turn must finish."""
+    
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+    
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    def check(self) -> None:
+        """Raise DeadlineExceeded if no time is left."""
+        if self.expired:
+            raise DeadlineExceeded("turn deadline exceeded")
+
+
+# Set by run_agent; tasks created during the turn inherit it
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded if the current turn is out of time."""
+    deadline = current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def deadline_passed() -> bool:
+    """Whether the current turn is out of time."""
+    deadline = current_deadline.get()
+    return deadline is not None and deadline.expired
+
+
+def deadline_timeout(timeout: float) -> float:
+    """
+    Cap a timeout by the time left in the current turn.
+    
+    Raises DeadlineExceeded if nothing is left, so callers never start
+    work they cannot finish.
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return timeout
+    deadline.check()
+    return min(timeout, deadline.remaining())
+
+
+async def within_deadline(awaitable: Awaitable[T]) -> T:
+    """Await with the remaining turn time as timeout."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=deadline.remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("turn deadline exceeded") from None
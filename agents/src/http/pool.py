@@ -0,0 +1,128 @@
+"""Process-wide pooled HTTP transport shared by LLM providers and channel adapters."""
+
+import logging
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Hosts we talk to on every turn - warmed up on startup
+TELEGRAM_API_URL = "https://api.telegram.org"
+GRAPH_API_URL = "https://graph.facebook.com"
+VK_API_URL = "https://api.vk.com"
+GEMINI_API_URL = "https://generativelanguage.googleapis.com"
+OPENROUTER_API_URL = "https://openrouter.ai"
+
+KNOWN_HOSTS = [
+    TELEGRAM_API_URL,
+    GRAPH_API_URL,
+    VK_API_URL,
+    GEMINI_API_URL,
+    OPENROUTER_API_URL,
+]
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HTTPClientRegistry:
+    """
+    Registry of long-lived httpx clients, one per origin.
+    
+    Each origin gets its own connection pool so a burst of Telegram
+    replies cannot starve LLM calls (and vice versa). Connections are
+    kept alive between requests, so only the first call to a host pays
+    the TCP + TLS handshake.
+    """
+    
+    def __init__(self):
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._http2 = settings.http_http2 and _http2_available()
+    
+    @staticmethod
+    def _origin(url: str) -> str:
+        """Normalize URL to scheme://host[:port]."""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+        return httpx.AsyncClient(
+            http2=self._http2,
+            limits=limits,
+            timeout=settings.http_timeout,
+        )
+    
+    def get(self, url: str) -> httpx.AsyncClient:
+        """
+        Get pooled client for the origin of `url`, creating it on first use.
+        
+        Callers with different latency budgets (e.g. LLM calls) pass
+        `timeout=` per request instead of owning a separate client.
+        """
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._create_client()
+            self._clients[origin] = client
+        return client
+    
+    def warm_up(self, urls: list[str]) -> None:
+        """Pre-create clients for the given hosts."""
+        for url in urls:
+            self.get(url)
+        logger.info(
+            f"HTTP pools ready for {len(self._clients)} hosts (http2={self._http2})"
+        )
+    
+    async def close(self) -> None:
+        """Close all pooled clients."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Global registry instance
+_registry: Optional[HTTPClientRegistry] = None
+
+
+def get_http_registry() -> HTTPClientRegistry:
+    """Get or create HTTP client registry."""
+    global _registry
+    if _registry is None:
+        _registry = HTTPClientRegistry()
+    return _registry
+
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """Get pooled HTTP client for the host of `url`."""
+    return get_http_registry().get(url)
+
+
+async def init_http_clients() -> None:
+    """Warm up pools for known hosts. Call this on startup."""
+    get_http_registry().warm_up(KNOWN_HOSTS)
+
+
+async def close_http_clients() -> None:
+    """Close all pooled HTTP clients."""
+    global _registry
+    if _registry:
+        await _registry.close()
+        _registry = None
@@ -0,0 +1,277 @@
+"""Per-provider circuit breaker with health scoring, shared across workers via Redis."""
+
+import logging
+import time
+from collections import defaultdict
+from enum import Enum
+from typing import Optional
+
+from src.config import settings
+from src.db.redis import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class MemoryBreakerStore:
+    """In-process breaker storage (single worker, tests, Redis outages)."""
+    
+    def __init__(self):
+        self._buckets: dict[str, dict[int, list[int]]] = defaultdict(dict)
+        self._states: dict[str, tuple[str, float]] = {}
+        self._probes: dict[str, float] = {}
+    
+    async def record(self, name: str, bucket: int, failed: bool, slow: bool) -> None:
+        counters = self._buckets[name].setdefault(bucket, [0, 0, 0])
+        counters[0] += 1
+        counters[1] += int(failed)
+        counters[2] += int(slow)
+    
+    async def window(self, name: str, buckets: list[int]) -> tuple[int, int, int]:
+        stored = self._buckets[name]
+        # Drop buckets that fell out of the window
+        for bucket in [b for b in stored if b < buckets[0]]:
+            del stored[bucket]
+        totals = [0, 0, 0]
+        for bucket in buckets:
+            for i, value in enumerate(stored.get(bucket, (0, 0, 0))):
+                totals[i] += value
+        return totals[0], totals[1], totals[2]
+    
+    async def get_state(self, name: str) -> Optional[tuple[str, float]]:
+        return self._states.get(name)
+    
+    async def set_state(self, name: str, state: str, opened_at: float) -> None:
+        self._states[name] = (state, opened_at)
+    
+    async def reset(self, name: str, buckets: list[int]) -> None:
+        self._states.pop(name, None)
+        self._buckets.pop(name, None)
+        self._probes.pop(name, None)
+    
+    async def acquire_probe(self, name: str, ttl: float) -> bool:
+        now = time.time()
+        if self._probes.get(name, 0) > now:
+            return False
+        self._probes[name] = now + ttl
+        return True
+
+
+class RedisBreakerStore:
+    """
+    Redis breaker storage shared by all workers.
+    
+    Keys:
+    - llm:breaker:{name}:{bucket} - hash with calls/failures/slow counters
+    - llm:breaker:{name} - hash with state/opened_at while not closed
+    - llm:breaker:{name}:probe - half-open probe lock
+    
+    Falls back to in-process storage if Redis is unavailable.
+    """
+    
+    PREFIX = "llm:breaker"
+    
+    def __init__(self):
+        self._fallback = MemoryBreakerStore()
+    
+    async def record(self, name: str, bucket: int, failed: bool, slow: bool) -> None:
+        key = f"{self.PREFIX}:{name}:{bucket}"
+        try:
+            redis_client = await get_redis()
+            pipe = redis_client.client.pipeline(transaction=False)
+            pipe.hincrby(key, "calls", 1)
+            if failed:
+                pipe.hincrby(key, "failures", 1)
+            if slow:
+                pipe.hincrby(key, "slow", 1)
+            pipe.expire(key, settings.llm_breaker_window + settings.llm_breaker_bucket)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Breaker store unavailable, using local state: {e}")
+            await self._fallback.record(name, bucket, failed, slow)
+    
+    async def window(self, name: str, buckets: list[int]) -> tuple[int, int, int]:
+        try:
+            redis_client = await get_redis()
+            pipe = redis_client.client.pipeline(transaction=False)
+            for bucket in buckets:
+                pipe.hgetall(f"{self.PREFIX}:{name}:{bucket}")
+            rows = await pipe.execute()
+        except Exception:
+            return await self._fallback.window(name, buckets)
+        
+        calls = sum(int(r.get("calls", 0)) for r in rows)
+        failures = sum(int(r.get("failures", 0)) for r in rows)
+        slow = sum(int(r.get("slow", 0)) for r in rows)
+        return calls, failures, slow
+    
+    async def get_state(self, name: str) -> Optional[tuple[str, float]]:
+        try:
+            redis_client = await get_redis()
+            data = await redis_client.client.hgetall(f"{self.PREFIX}:{name}")
+        except Exception:
+            return await self._fallback.get_state(name)
+        
+        if not data:
+            return None
+        return data["state"], float(data["opened_at"])
+    
+    async def set_state(self, name: str, state: str, opened_at: float) -> None:
+        key = f"{self.PREFIX}:{name}"
+        try:
+            redis_client = await get_redis()
+            pipe = redis_client.client.pipeline(transaction=True)
+            pipe.hset(key, mapping={"state": state, "opened_at": opened_at})
+            # Stale open state must not outlive a dead deployment
+            pipe.expire(key, settings.llm_breaker_open_seconds * 10)
+            await pipe.execute()
+        except Exception:
+            await self._fallback.set_state(name, state, opened_at)
+    
+    async def reset(self, name: str, buckets: list[int]) -> None:
+        try:
+            redis_client = await get_redis()
+            # Counters of the window too, or old failures re-open the circuit
+            keys = [f"{self.PREFIX}:{name}", f"{self.PREFIX}:{name}:probe"]
+            keys += [f"{self.PREFIX}:{name}:{bucket}" for bucket in buckets]
+            await redis_client.client.delete(*keys)
+        except Exception:
+            pass
+        await self._fallback.reset(name, buckets)
+    
+    async def acquire_probe(self, name: str, ttl: float) -> bool:
+        try:
+            redis_client = await get_redis()
+            acquired = await redis_client.client.set(
+                f"{self.PREFIX}:{name}:probe", "1", nx=True, px=int(ttl * 1000)
+            )
+            return bool(acquired)
+        except Exception:
+            return await self._fallback.acquire_probe(name, ttl)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider/model.
+    
+    - CLOSED: calls pass; outcomes are counted in time buckets
+    - OPEN: calls are rejected until `open_seconds` have passed
+    - HALF_OPEN: a single probe call is let through; success closes
+      the breaker, failure re-opens it
+    
+    The breaker opens when, over the rolling window and with at least
+    `min_calls` calls, the error rate or the slow-call rate crosses
+    its threshold.
+    """
+    
+    # How long a worker trusts its cached view of the shared state
+    STATE_CACHE_SECONDS = 1.0
+    
+    def __init__(self, name: str, store: MemoryBreakerStore | RedisBreakerStore):
+        self.name = name
+        self.store = store
+        self._cached_state: Optional[tuple[str, float]] = None
+        self._cached_at = float("-inf")
+    
+    def _bucket(self, now: float) -> int:
+        return int(now // settings.llm_breaker_bucket)
+    
+    def _window_buckets(self, now: float) -> list[int]:
+        current = self._bucket(now)
+        count = max(1, settings.llm_breaker_window // settings.llm_breaker_bucket)
+        return list(range(current - count + 1, current + 1))
+    
+    async def _state(self) -> Optional[tuple[str, float]]:
+        now = time.monotonic()
+        if now - self._cached_at > self.STATE_CACHE_SECONDS:
+            self._cached_state = await self.store.get_state(self.name)
+            self._cached_at = now
+        return self._cached_state
+    
+    def _invalidate(self) -> None:
+        self._cached_at = float("-inf")
+    
+    async def state(self) -> BreakerState:
+        """Current breaker state."""
+        stored = await self._state()
+        if not stored:
+            return BreakerState.CLOSED
+        _, opened_at = stored
+        if time.time() - opened_at >= settings.llm_breaker_open_seconds:
+            return BreakerState.HALF_OPEN
+        return BreakerState.OPEN
+    
+    async def allow(self) -> bool:
+        """Whether a call may be sent to this provider now."""
+        state = await self.state()
+        if state == BreakerState.CLOSED:
+            return True
+        if state == BreakerState.OPEN:
+            return False
+        # Half-open: one probe across all workers
+        return await self.store.acquire_probe(self.name, settings.llm_timeout)
+    
+    async def record_success(self, latency: float) -> None:
+        """Record successful call."""
+        slow = latency >= settings.llm_breaker_slow_call
+        await self.store.record(self.name, self._bucket(time.time()), False, slow)
+        
+        if await self.state() == BreakerState.HALF_OPEN:
+            await self.store.reset(self.name, self._window_buckets(time.time()))
+            self._invalidate()
+            logger.info(f"Circuit {self.name} closed after successful probe")
+            return
+        
+        if slow:
+            await self._evaluate()
+    
+    async def record_failure(self, latency: float) -> None:
+        """Record failed call."""
+        await self.store.record(self.name, self._bucket(time.time()), True, False)
+        
+        if await self.state() == BreakerState.HALF_OPEN:
+            await self._open()
+            return
+        
+        await self._evaluate()
+    
+    async def _evaluate(self) -> None:
+        calls, failures, slow = await self.store.window(
+            self.name, self._window_buckets(time.time())
+        )
+        if calls < settings.llm_breaker_min_calls:
+            return
+        if (
+            failures / calls >= settings.llm_breaker_failure_rate
+            or slow / calls >= settings.llm_breaker_slow_rate
+        ):
+            await self._open()
+    
+    async def _open(self) -> None:
+        await self.store.set_state(self.name, BreakerState.OPEN.value, time.time())
+        self._invalidate()
+        logger.warning(
+            f"Circuit {self.name} opened for {settings.llm_breaker_open_seconds}s"
+        )
+    
+    async def health(self) -> float:
+        """
+        Health score in [0, 1].
+        
+        1.0 means no errors and no slow calls in the window; an open
+        breaker scores 0.
+        """
+        if await self.state() == BreakerState.OPEN:
+            return 0.0
+        calls, failures, slow = await self.store.window(
+            self.name, self._window_buckets(time.time())
+        )
+        if not calls:
+            return 1.0
+        return (1 - failures / calls) * (1 - 0.5 * slow / calls)
@@ -0,0 +1,147 @@
+"""Exact-match LLM response cache in Redis."""
+
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import Any, Optional
+
+from src.config import settings
+from src.db.redis import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Cache of LLM responses keyed by prompt, tool set and normalized history.
+    
+    Rules:
+    - Requests that carry tool results are never cached: the answer is
+      built from live prices/stock/order data.
+    - Responses that call state-changing tools or quote prices are not
+      stored.
+    - Entries expire after `llm_cache_ttl`; the oldest entries are evicted
+      once `llm_cache_max_entries` is exceeded.
+    """
+    
+    KEY_PREFIX = "llm:cache"
+    INDEX_KEY = "llm:cache:index"  # ZSET: cache key -> created timestamp
+    STATS_KEY = "llm:cache:stats"  # HASH: hits / misses / bypass
+    
+    # Calling these changes state - replaying them from cache is unsafe
+    MUTATING_TOOLS = {"add_to_cart", "create_order", "escalate_to_human"}
+    
+    PRICE_PATTERN = re.compile(r"\d[\d\s.,]*\s*(₽|руб)", re.IGNORECASE)
+    WHITESPACE = re.compile(r"\s+")
+    TRAILING_PUNCT = re.compile(r"[\s!?.,)…]+$")
+    
+    @classmethod
+    def normalize_text(cls, text: str) -> str:
+        """Lowercase, collapse whitespace, drop trailing punctuation."""
+        text = cls.WHITESPACE.sub(" ", text.lower().replace("ё", "е")).strip()
+        return cls.TRAILING_PUNCT.sub("", text)
+    
+    @classmethod
+    def make_key(
+        cls,
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+    ) -> str:
+        """Hash of system prompt, tool set and normalized message history."""
+        history = [
+            [m.get("role"), cls.normalize_text(m.get("content") or "")]
+            for m in messages
+        ]
+        material = json.dumps(
+            [system_prompt, sorted(tools or []), history],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        digest = hashlib.sha256(material.encode()).hexdigest()
+        return f"{cls.KEY_PREFIX}:{digest}"
+    
+    @staticmethod
+    def is_cacheable_request(messages: list[dict]) -> bool:
+        """Requests with tool calls/results depend on live data."""
+        return not any(m.get("role") == "tool" or m.get("tool_calls") for m in messages)
+    
+    @classmethod
+    def is_cacheable_response(cls, response: dict[str, Any]) -> bool:
+        """Skip state-changing tool calls and replies that quote prices."""
+        for tc in response.get("tool_calls") or []:
+            name = tc.get("name") or tc.get("function", {}).get("name")
+            if name in cls.MUTATING_TOOLS:
+                return False
+        content = response.get("content") or ""
+        return bool(content or response.get("tool_calls")) and not cls.PRICE_PATTERN.search(content)
+    
+    async def _count(self, field: str) -> None:
+        try:
+            redis_client = await get_redis()
+            await redis_client.client.hincrby(self.STATS_KEY, field, 1)
+        except Exception:
+            pass
+    
+    async def count_bypass(self) -> None:
+        await self._count("bypass")
+    
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Get cached response, counting hit/miss."""
+        try:
+            redis_client = await get_redis()
+            data = await redis_client.client.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache unavailable: {e}")
+            return None
+        
+        await self._count("hits" if data else "misses")
+        return json.loads(data) if data else None
+    
+    async def set(self, key: str, response: dict[str, Any]) -> None:
+        """Store response and evict the oldest entries above the size limit."""
+        try:
+            redis_client = await get_redis()
+            pipe = redis_client.client.pipeline(transaction=False)
+            pipe.set(key, json.dumps(response, default=str), ex=settings.llm_cache_ttl)
+            pipe.zadd(self.INDEX_KEY, {key: time.time()})
+            # Expired keys leave stale index entries - drop them too
+            pipe.zremrangebyscore(self.INDEX_KEY, 0, time.time() - settings.llm_cache_ttl)
+            pipe.zcard(self.INDEX_KEY)
+            size = (await pipe.execute())[-1]
+            
+            excess = size - settings.llm_cache_max_entries
+            if excess > 0:
+                evicted = await redis_client.client.zpopmin(self.INDEX_KEY, excess)
+                if evicted:
+                    await redis_client.client.delete(*[k for k, _ in evicted])
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+    
+    async def stats(self) -> dict[str, float]:
+        """Hit/miss/bypass counters and hit rate."""
+        redis_client = await get_redis()
+        data = await redis_client.client.hgetall(self.STATS_KEY)
+        hits = int(data.get("hits", 0))
+        misses = int(data.get("misses", 0))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "bypass": int(data.get("bypass", 0)),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
+# Global cache instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
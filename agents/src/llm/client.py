@@ -1,11 +1,25 @@
 """LLM client with fallback chain: Gemini → DeepSeek → Qwen."""
 
 import asyncio
-from typing import Any, Optional
+import json
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Optional
 
 import httpx
 
 from src.config import settings
+from src.deadline import DeadlineExceeded, check_deadline, deadline_passed, deadline_timeout
+from src.http.pool import get_http_client
+from src.llm.breaker import CircuitBreaker, MemoryBreakerStore, RedisBreakerStore
+from src.llm.cache import get_response_cache
+from src.llm.context_cache import GeminiContextCache
+from src.llm.prompts import CHECKOUT_PROMPT, SALES_PROMPT, SUPPORT_PROMPT
+from src.llm.ratelimit import ProviderRateLimiter
+from src.llm.router import ModelRouter
+from src.llm.tiering import HEAVY, LIGHT, classify_turn
+from src.llm.tokens import estimate_tokens
 
 
 class LLMError(Exception):
@@ -20,32 +34,57 @@ class LLMClient:
     Primary: Gemini 2.0 Flash (free tier)
     Fallback 1: DeepSeek V3.2 via OpenRouter
     Fallback 2: Qwen via OpenRouter
+    
+    With `llm_routing_policy = "latency"` the order adapts to observed
+    latency and success rate per request class. Trivial turns
+    (tier "light") try `llm_light_model` first with a low token cap.
     """
     
-    GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+    GEMINI_MODEL = "gemini-2.0-flash"
+    GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models"
     OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
     
+    FALLBACK_CHAIN: list[tuple[str, Optional[str]]] = [
+        ("gemini", None),
+        ("openrouter", "deepseek/deepseek-chat"),
+        ("openrouter", "qwen/qwen-2.5-72b-instruct"),
+    ]
+    
     def __init__(self):
-        self.http_client = httpx.AsyncClient(timeout=settings.llm_timeout)
         self.max_retries = 3
         self.backoff_base = 1.0
+        # Recent successful latencies per provider/model (seconds)
+        self._latencies: dict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=settings.llm_latency_window)
+        )
+        self._breaker_store = (
+            RedisBreakerStore() if settings.llm_breaker_shared else MemoryBreakerStore()
+        )
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.rate_limiter = ProviderRateLimiter()
+        self.router = ModelRouter(self.FALLBACK_CHAIN)
+        self.context_cache = GeminiContextCache(
+            self.GEMINI_MODEL, [SALES_PROMPT, CHECKOUT_PROMPT, SUPPORT_PROMPT]
+        )
     
-    async def close(self):
-        """Close HTTP client."""
-        await self.http_client.aclose()
-    
-    async def _call_gemini(
+    def _build_gemini_payload(
         self,
         system_prompt: str,
         messages: list[dict],
         tools: Optional[list[str]] = None,
+        cached_content: Optional[str] = None,
+        model: Optional[str] = None,
     ) -> dict[str, Any]:
-        """Call Gemini API with function calling support."""
-        if not settings.gemini_api_key:
-            raise LLMError("Gemini API key not configured")
+        """
+        Build Gemini request payload from chat messages.
         
+        With `cached_content`, the system instruction and tools come from
+        the cache and `system_prompt` is only the per-turn context.
+        """
         # Convert messages to Gemini format
         contents = []
+        if cached_content and system_prompt:
+            contents.append({"role": "user", "parts": [{"text": system_prompt}]})
         for msg in messages:
             if msg.get("role") == "tool":
                 # Tool result message
@@ -81,23 +120,92 @@ class LLMClient:
         
         payload = {
             "contents": contents,
-            "systemInstruction": {
-                "parts": [{"text": system_prompt}]
-            },
             "generationConfig": {
                 "temperature": settings.llm_temperature,
-                "maxOutputTokens": settings.llm_max_tokens,
+                "maxOutputTokens": self._max_tokens(model or self.GEMINI_MODEL),
             }
         }
         
+        if cached_content:
+            payload["cachedContent"] = cached_content
+            return payload
+        
+        payload["systemInstruction"] = {
+            "parts": [{"text": system_prompt}]
+        }
+        
         # Add function declarations if tools provided
         if tools:
             payload["tools"] = [{
                 "functionDeclarations": self._get_tool_declarations(tools)
             }]
         
-        url = f"{self.GEMINI_URL}?key={settings.gemini_api_key}"
-        response = await self.http_client.post(url, json=payload)
+        return payload
+    
+    async def _prepare_gemini_payload(
+        self,
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+        model: Optional[str] = None,
+    ) -> tuple[dict[str, Any], Optional[str]]:
+        """
+        Build Gemini payload, referencing cached static prompt when possible.
+        
+        Returns (payload, cached content name or None). Context caches
+        are per model, so only the primary model uses them.
+        """
+        if model:
+            return self._build_gemini_payload(system_prompt, messages, tools, model=model), None
+        
+        if settings.llm_context_cache_enabled:
+            static, context = self.context_cache.split_prompt(system_prompt)
+            if static:
+                declarations = self._get_tool_declarations(tools) if tools else []
+                name = await self.context_cache.get(static, declarations)
+                if name:
+                    payload = self._build_gemini_payload(context, messages, tools, name)
+                    return payload, name
+        
+        return self._build_gemini_payload(system_prompt, messages, tools), None
+    
+    def _gemini_url(self, model: Optional[str], method: str) -> str:
+        """Endpoint URL for a Gemini model (default: GEMINI_MODEL)."""
+        return f"{self.GEMINI_API_URL}/{model or self.GEMINI_MODEL}:{method}"
+    
+    def _max_tokens(self, model: Optional[str]) -> int:
+        """Output token cap - lower for the light tier model."""
+        if model == settings.llm_light_model:
+            return settings.llm_light_max_tokens
+        return settings.llm_max_tokens
+    
+    async def _call_gemini(
+        self,
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+        model: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Call Gemini API with function calling support."""
+        if not settings.gemini_api_key:
+            raise LLMError("Gemini API key not configured")
+        
+        payload, cache_name = await self._prepare_gemini_payload(
+            system_prompt, messages, tools, model
+        )
+        
+        url = f"{self._gemini_url(model, 'generateContent')}?key={settings.gemini_api_key}"
+        response = await get_http_client(url).post(
+            url, json=payload, timeout=deadline_timeout(settings.llm_timeout)
+        )
+        
+        if cache_name and response.status_code in (400, 403, 404):
+            # Cached content expired or was deleted - resend in full
+            self.context_cache.invalidate(cache_name)
+            payload = self._build_gemini_payload(system_prompt, messages, tools)
+            response = await get_http_client(url).post(
+                url, json=payload, timeout=deadline_timeout(settings.llm_timeout)
+            )
         
         if response.status_code == 429:
             raise LLMError("Gemini rate limit exceeded")
@@ -129,7 +237,7 @@ class LLMClient:
         
         return {
             "content": text,
-            "model": "gemini-2.0-flash",
+            "model": model or self.GEMINI_MODEL,
             "tool_calls": tool_calls if tool_calls else None,
         }
     
@@ -220,37 +328,111 @@ class LLMClient:
         
         return [declarations[t] for t in tools if t in declarations]
     
-    async def _call_openrouter(
+    def _build_openrouter_payload(
         self,
         model: str,
         system_prompt: str,
         messages: list[dict],
-        tools: Optional[list[str]] = None,
     ) -> dict[str, Any]:
-        """Call OpenRouter API."""
-        if not settings.openrouter_api_key:
-            raise LLMError("OpenRouter API key not configured")
-        
+        """Build OpenRouter (OpenAI-compatible) request payload."""
         # Build messages with system prompt
         full_messages = [{"role": "system", "content": system_prompt}]
-        full_messages.extend(messages)
+        full_messages.extend(self._openai_messages(messages))
         
-        payload = {
+        return {
             "model": model,
             "messages": full_messages,
             "temperature": settings.llm_temperature,
-            "max_tokens": settings.llm_max_tokens,
+            "max_tokens": self._max_tokens(model),
         }
+    
+    @staticmethod
+    def _openai_messages(messages: list[dict]) -> list[dict]:
+        """
+        History in OpenAI tool format.
+        
+        Stored tool turns come from any provider: Gemini calls share ids
+        ("call_{name}") and node tool results may have no tool_call_id.
+        Every call gets a unique id and every result is paired with the
+        earliest open call of the same tool; calls left without a result
+        get an empty one, as OpenAI-compatible APIs require.
+        """
+        converted: list[dict] = []
+        open_calls: list[tuple[str, str]] = []  # (tool name, call id)
+        
+        def close_open_calls() -> None:
+            for _, call_id in open_calls:
+                converted.append({"role": "tool", "tool_call_id": call_id, "content": ""})
+            open_calls.clear()
+        
+        for msg in messages:
+            role = msg.get("role")
+            if role == "tool":
+                index = next(
+                    (i for i, (name, _) in enumerate(open_calls) if name == msg.get("name")),
+                    0 if open_calls else None,
+                )
+                if index is None:
+                    continue  # Result without a call - nothing to attach it to
+                _, call_id = open_calls.pop(index)
+                content = msg.get("content", "")
+                converted.append({
+                    "role": "tool",
+                    "tool_call_id": call_id,
+                    "content": content if isinstance(content, str) else json.dumps(content),
+                })
+                continue
+            
+            close_open_calls()
+            if role == "assistant" and msg.get("tool_calls"):
+                calls = []
+                for tc in msg["tool_calls"]:
+                    function = tc.get("function") or tc  # OpenAI or internal shape
+                    arguments = function.get("arguments", {})
+                    if not isinstance(arguments, str):
+                        arguments = json.dumps(arguments, ensure_ascii=False)
+                    call_id = f"call_{len(converted)}_{len(calls)}"
+                    calls.append({
+                        "id": call_id,
+                        "type": "function",
+                        "function": {"name": function.get("name"), "arguments": arguments},
+                    })
+                    open_calls.append((function.get("name"), call_id))
+                converted.append({
+                    "role": "assistant",
+                    "content": msg.get("content") or None,
+                    "tool_calls": calls,
+                })
+            else:
+                converted.append({"role": role, "content": msg.get("content", "")})
         
-        headers = {
+        close_open_calls()
+        return converted
+    
+    def _openrouter_headers(self) -> dict[str, str]:
+        return {
             "Authorization": f"Bearer {settings.openrouter_api_key}",
             "Content-Type": "application/json",
         }
+    
+    async def _call_openrouter(
+        self,
+        model: str,
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+    ) -> dict[str, Any]:
+        """Call OpenRouter API."""
+        if not settings.openrouter_api_key:
+            raise LLMError("OpenRouter API key not configured")
         
-        response = await self.http_client.post(
-            self.OPENROUTER_URL, 
-            json=payload, 
-            headers=headers
+        payload = self._build_openrouter_payload(model, system_prompt, messages)
+        
+        response = await get_http_client(self.OPENROUTER_URL).post(
+            self.OPENROUTER_URL,
+            json=payload,
+            headers=self._openrouter_headers(),
+            timeout=deadline_timeout(settings.llm_timeout),
         )
         
         if response.status_code == 429:
@@ -271,52 +453,478 @@ class LLMClient:
             "tool_calls": message.get("tool_calls"),
         }
     
+    async def _stream_gemini(
+        self,
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream Gemini response via streamGenerateContent (SSE)."""
+        if not settings.gemini_api_key:
+            raise LLMError("Gemini API key not configured")
+        
+        payload, cache_name = await self._prepare_gemini_payload(
+            system_prompt, messages, tools, model
+        )
+        url = (
+            f"{self._gemini_url(model, 'streamGenerateContent')}"
+            f"?alt=sse&key={settings.gemini_api_key}"
+        )
+        
+        async with get_http_client(url).stream(
+            "POST", url, json=payload, timeout=deadline_timeout(settings.llm_timeout)
+        ) as response:
+            if cache_name and response.status_code in (400, 403, 404):
+                # Cached content expired or was deleted - resend in full
+                self.context_cache.invalidate(cache_name)
+                payload = self._build_gemini_payload(system_prompt, messages, tools)
+                async for event in self._stream_gemini_payload(url, payload):
+                    yield event
+                return
+            
+            async for event in self._read_gemini_stream(response):
+                yield event
+    
+    async def _stream_gemini_payload(
+        self,
+        url: str,
+        payload: dict[str, Any],
+    ) -> AsyncIterator[dict[str, Any]]:
+        async with get_http_client(url).stream(
+            "POST", url, json=payload, timeout=deadline_timeout(settings.llm_timeout)
+        ) as response:
+            async for event in self._read_gemini_stream(response):
+                yield event
+    
+    async def _read_gemini_stream(
+        self,
+        response: httpx.Response,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Parse Gemini SSE response into events."""
+        if response.status_code == 429:
+            raise LLMError("Gemini rate limit exceeded")
+        response.raise_for_status()
+        
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            chunk = json.loads(line[5:])
+            
+            for candidate in chunk.get("candidates", [])[:1]:
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield {"type": "delta", "text": part["text"]}
+                    elif "functionCall" in part:
+                        fc = part["functionCall"]
+                        yield {"type": "tool_call", "tool_call": {
+                            "id": f"call_{fc['name']}",
+                            "name": fc["name"],
+                            "arguments": fc.get("args", {}),
+                        }}
+    
+    async def _stream_openrouter(
+        self,
+        model: str,
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream OpenRouter response (`stream: true`, OpenAI SSE format)."""
+        if not settings.openrouter_api_key:
+            raise LLMError("OpenRouter API key not configured")
+        
+        payload = self._build_openrouter_payload(model, system_prompt, messages)
+        payload["stream"] = True
+        
+        # Tool call fragments arrive split across chunks, keyed by index
+        partial_calls: dict[int, dict[str, Any]] = {}
+        
+        async with get_http_client(self.OPENROUTER_URL).stream(
+            "POST",
+            self.OPENROUTER_URL,
+            json=payload,
+            headers=self._openrouter_headers(),
+            timeout=deadline_timeout(settings.llm_timeout),
+        ) as response:
+            if response.status_code == 429:
+                raise LLMError(f"OpenRouter rate limit for {model}")
+            response.raise_for_status()
+            
+            async for line in response.aiter_lines():
+                # Skip keep-alive comments (": OPENROUTER PROCESSING")
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                
+                for choice in json.loads(data).get("choices", [])[:1]:
+                    delta = choice.get("delta", {})
+                    if delta.get("content"):
+                        yield {"type": "delta", "text": delta["content"]}
+                    for tc in delta.get("tool_calls") or []:
+                        call = partial_calls.setdefault(
+                            tc.get("index", 0), {"id": None, "name": "", "arguments": ""}
+                        )
+                        call["id"] = tc.get("id") or call["id"]
+                        function = tc.get("function", {})
+                        call["name"] += function.get("name") or ""
+                        call["arguments"] += function.get("arguments") or ""
+        
+        for index in sorted(partial_calls):
+            call = partial_calls[index]
+            yield {"type": "tool_call", "tool_call": {
+                "id": call["id"] or f"call_{call['name']}",
+                "name": call["name"],
+                "arguments": call["arguments"],
+            }}
+    
+    def _stream_provider(
+        self,
+        provider: str,
+        model: Optional[str],
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Streaming call to one provider/model."""
+        if provider == "gemini":
+            return self._stream_gemini(system_prompt, messages, tools, model)
+        return self._stream_openrouter(model, system_prompt, messages, tools)
+    
+    async def _call_provider(
+        self,
+        provider: str,
+        model: Optional[str],
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+    ) -> dict[str, Any]:
+        """Single call to one provider/model."""
+        if provider == "gemini":
+            return await self._call_gemini(system_prompt, messages, tools, model)
+        return await self._call_openrouter(model, system_prompt, messages, tools)
+    
+    def _breaker(self, key: str) -> CircuitBreaker:
+        """Get circuit breaker for provider/model."""
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key, self._breaker_store)
+            self._breakers[key] = breaker
+        return breaker
+    
+    async def provider_health(self) -> dict[str, float]:
+        """Breaker health score per model of the fallback chain."""
+        return {
+            model or provider: round(await self._breaker(model or provider).health(), 3)
+            for provider, model in self.FALLBACK_CHAIN
+        }
+    
+    def _reserve_tokens(self, system_prompt: str, messages: list[dict]) -> int:
+        """Tokens to reserve in the provider budget: prompt plus expected output."""
+        return estimate_tokens(messages, system_prompt) + settings.llm_ratelimit_output_reserve
+    
+    async def _acquire_budget(self, provider: str, tokens: int) -> bool:
+        if not settings.llm_ratelimit_enabled:
+            return True
+        return await self.rate_limiter.acquire(provider, tokens)
+    
+    async def _call_with_retries(
+        self,
+        provider: str,
+        model: Optional[str],
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+    ) -> dict[str, Any]:
+        """
+        Call one provider with retries on LLMError.
+        
+        Providers with an open circuit or an exhausted rate-limit budget
+        are skipped without a request, and retries stop as soon as the
+        circuit opens. Request timeouts and backoff are capped by the turn
+        deadline; once it passes DeadlineExceeded ends the whole chain.
+        """
+        key = model or provider
+        breaker = self._breaker(key)
+        route_class = self.router.request_class(tools)
+        tokens = self._reserve_tokens(system_prompt, messages)
+        last_error = None
+        
+        for attempt in range(self.max_retries):
+            # Out of turn time: stop retrying and skip remaining fallbacks
+            check_deadline()
+            
+            if settings.llm_breaker_enabled and not await breaker.allow():
+                raise last_error or LLMError(f"{key} circuit open")
+            
+            if not await self._acquire_budget(provider, tokens):
+                raise LLMError(f"{key} rate limit budget exhausted")
+            
+            start = time.monotonic()
+            try:
+                result = await self._call_provider(
+                    provider, model, system_prompt, messages, tools
+                )
+                latency = time.monotonic() - start
+                self._latencies[key].append(latency)
+                self.router.record(route_class, (provider, model), latency, True)
+                if settings.llm_breaker_enabled:
+                    await breaker.record_success(latency)
+                return result
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if deadline_passed():
+                    # Cut short by the turn deadline - not the provider's fault
+                    raise DeadlineExceeded("turn deadline exceeded") from e
+                last_error = e if isinstance(e, LLMError) else LLMError(str(e))
+                elapsed = time.monotonic() - start
+                self.router.record(route_class, (provider, model), elapsed, False)
+                if settings.llm_breaker_enabled:
+                    await breaker.record_failure(elapsed)
+                if not isinstance(e, LLMError):
+                    break
+                # Backoff before retry, never past the turn deadline
+                await asyncio.sleep(
+                    deadline_timeout(self.backoff_base * (attempt + 1))
+                )
+                continue
+        
+        raise last_error or LLMError(f"{key} failed")
+    
+    def _hedge_delay(self, provider: str, model: Optional[str]) -> float:
+        """
+        Seconds to wait for a provider before hedging to the next one.
+        
+        Uses the configured percentile of recent successful latencies,
+        or the default delay until enough samples are collected.
+        """
+        samples = self._latencies[model or provider]
+        if len(samples) < settings.llm_hedge_min_samples:
+            return settings.llm_hedge_default_delay
+        
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * settings.llm_hedge_percentile))
+        return ordered[index]
+    
+    def _chain(self, tools: Optional[list[str]], tier: str) -> list[tuple[str, Optional[str]]]:
+        """Providers to try, in order, for this request."""
+        chain = self.router.order(self.router.request_class(tools))
+        if tier == LIGHT and settings.llm_tiering_enabled:
+            light = ("gemini", settings.llm_light_model)
+            chain = [light] + [route for route in chain if route != light]
+        return chain
+    
+    async def _generate_sequential(
+        self,
+        chain: list[tuple[str, Optional[str]]],
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+    ) -> dict[str, Any]:
+        """Try each provider in order until one succeeds."""
+        last_error = None
+        
+        for provider, model in chain:
+            try:
+                return await self._call_with_retries(
+                    provider, model, system_prompt, messages, tools
+                )
+            except LLMError as e:
+                last_error = e
+                # Move to next model in chain
+                continue
+        
+        # All models failed
+        raise last_error or LLMError("All LLM providers failed")
+    
+    async def _generate_hedged(
+        self,
+        chain: list[tuple[str, Optional[str]]],
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+    ) -> dict[str, Any]:
+        """
+        Walk the fallback chain with hedged requests.
+        
+        If the in-flight provider has not answered within its hedge delay,
+        the next provider is started in parallel. The first successful
+        answer wins and the remaining calls are cancelled. A failed
+        provider hands over to the next one immediately.
+        """
+        pending: set[asyncio.Task] = set()
+        next_index = 0
+        last_error = None
+        
+        def launch() -> None:
+            nonlocal next_index
+            provider, model = chain[next_index]
+            next_index += 1
+            pending.add(asyncio.create_task(
+                self._call_with_retries(provider, model, system_prompt, messages, tools)
+            ))
+        
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if next_index < len(chain):
+                    timeout = self._hedge_delay(*chain[next_index - 1])
+                
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    # Slow provider - hedge to the next one
+                    launch()
+                    continue
+                
+                for task in done:
+                    pending.discard(task)
+                    try:
+                        return task.result()
+                    except LLMError as e:
+                        last_error = e
+                
+                if not pending and next_index < len(chain):
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        raise last_error or LLMError("All LLM providers failed")
+    
     async def generate(
         self,
         system_prompt: str,
         messages: list[dict],
         tools: Optional[list[str]] = None,
+        tier: str = HEAVY,
     ) -> dict[str, Any]:
         """
         Generate response with fallback chain.
         
-        Order: Gemini → DeepSeek V3.2 → Qwen
+        Order: Gemini → DeepSeek V3.2 → Qwen, re-ranked per request class
+        by observed latency and success (see ModelRouter). The "light" tier
+        puts `llm_light_model` in front.
+        
+        Raises DeadlineExceeded if the turn deadline passes first.
         """
-        models = [
-            ("gemini", None),
-            ("openrouter", "deepseek/deepseek-chat"),
-            ("openrouter", "qwen/qwen-2.5-72b-instruct"),
-        ]
+        chain = self._chain(tools, tier)
+        if settings.llm_hedge_enabled:
+            return await self._generate_hedged(chain, system_prompt, messages, tools)
+        return await self._generate_sequential(chain, system_prompt, messages, tools)
+    
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+        tier: str = HEAVY,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream response with fallback chain.
+        
+        Yields events:
+        - {"type": "delta", "text": ...} - text chunk
+        - {"type": "tool_call", "tool_call": {"id", "name", "arguments"}}
+        - {"type": "done", "model": ...} - end of response
         
+        Falls back to the next provider only if nothing was yielded yet;
+        a failure mid-stream raises LLMError.
+        """
+        route_class = self.router.request_class(tools)
         last_error = None
         
-        for provider, model in models:
-            for attempt in range(self.max_retries):
-                try:
-                    if provider == "gemini":
-                        return await self._call_gemini(system_prompt, messages, tools)
-                    else:
-                        return await self._call_openrouter(model, system_prompt, messages, tools)
-                        
-                except LLMError as e:
-                    last_error = e
-                    # Backoff before retry
-                    await asyncio.sleep(self.backoff_base * (attempt + 1))
-                    continue
-                except Exception as e:
-                    last_error = LLMError(str(e))
-                    break
+        for provider, model in self._chain(tools, tier):
+            check_deadline()
+            key = model or provider
+            breaker = self._breaker(key)
+            if settings.llm_breaker_enabled and not await breaker.allow():
+                continue
+            
+            tokens = self._reserve_tokens(system_prompt, messages)
+            if not await self._acquire_budget(provider, tokens):
+                last_error = LLMError(f"{key} rate limit budget exhausted")
+                continue
+            
+            started = False
+            start = time.monotonic()
+            try:
+                async for event in self._stream_provider(
+                    provider, model, system_prompt, messages, tools
+                ):
+                    started = True
+                    yield event
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if deadline_passed():
+                    # Cut short by the turn deadline - not the provider's fault
+                    raise DeadlineExceeded("turn deadline exceeded") from e
+                elapsed = time.monotonic() - start
+                self.router.record(route_class, (provider, model), elapsed, False)
+                if settings.llm_breaker_enabled:
+                    await breaker.record_failure(elapsed)
+                last_error = e if isinstance(e, LLMError) else LLMError(str(e))
+                if started:
+                    raise last_error
+                continue
             
-            # Move to next model in chain
-            continue
+            latency = time.monotonic() - start
+            self._latencies[key].append(latency)
+            self.router.record(route_class, (provider, model), latency, True)
+            if settings.llm_breaker_enabled:
+                await breaker.record_success(latency)
+            yield {"type": "done", "model": key}
+            return
         
-        # All models failed
         raise last_error or LLMError("All LLM providers failed")
+    
+    async def generate_to_sink(
+        self,
+        sink: asyncio.Queue,
+        system_prompt: str,
+        messages: list[dict],
+        tools: Optional[list[str]] = None,
+        tier: str = HEAVY,
+    ) -> dict[str, Any]:
+        """Stream response events into `sink` and return it in `generate()` format."""
+        text: list[str] = []
+        tool_calls: list[dict] = []
+        model = None
+        
+        async for event in self.generate_stream(system_prompt, messages, tools, tier):
+            if event["type"] == "delta":
+                text.append(event["text"])
+            elif event["type"] == "tool_call":
+                tool_calls.append(event["tool_call"])
+            else:
+                model = event["model"]
+                continue
+            await sink.put(event)
+        
+        return {
+            "content": "".join(text),
+            "model": model,
+            "tool_calls": tool_calls or None,
+        }
 
 
 # Global client instance
 _llm_client: Optional[LLMClient] = None
 
+# Set by streaming entry points: LLM calls made in this context push
+# delta/tool_call events into the queue while they are generated
+llm_stream_sink: ContextVar[Optional[asyncio.Queue]] = ContextVar(
+    "llm_stream_sink", default=None
+)
+
 
 def get_llm_client() -> LLMClient:
     """Get or create LLM client."""
@@ -331,6 +939,44 @@ async def get_llm_response(
     messages: list[dict],
     tools: Optional[list[str]] = None,
 ) -> dict[str, Any]:
-    """Convenience function for getting LLM response."""
+    """
+    Convenience function for getting LLM response.
+    
+    Serves exact repeats from the response cache, sends trivial turns to
+    the light model tier and streams into the active `llm_stream_sink`,
+    if any.
+    """
     client = get_llm_client()
-    return await client.generate(system_prompt, messages, tools)
+    sink = llm_stream_sink.get()
+    cache = get_response_cache()
+    tier = classify_turn(messages, tools)
+    
+    key = None
+    if settings.llm_cache_enabled:
+        if cache.is_cacheable_request(messages):
+            key = cache.make_key(system_prompt, messages, tools)
+            cached = await cache.get(key)
+            if cached:
+                if sink is not None:
+                    await _replay_to_sink(sink, cached)
+                return cached
+        else:
+            await cache.count_bypass()
+    
+    if sink is not None:
+        response = await client.generate_to_sink(sink, system_prompt, messages, tools, tier)
+    else:
+        response = await client.generate(system_prompt, messages, tools, tier)
+    
+    if key and cache.is_cacheable_response(response):
+        await cache.set(key, response)
+    
+    return response
+
+
+async def _replay_to_sink(sink: asyncio.Queue, response: dict[str, Any]) -> None:
+    """Push a cached response into the stream sink as events."""
+    if response.get("content"):
+        await sink.put({"type": "delta", "text": response["content"]})
+    for tool_call in response.get("tool_calls") or []:
+        await sink.put({"type": "tool_call", "tool_call": tool_call})
@@ -0,0 +1,140 @@
+"""Gemini context caching for static system prompts and tool declarations."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+from src.config import settings
+from src.deadline import current_deadline
+from src.http.pool import get_http_client
+from src.llm.tokens import estimate_tokens
+
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiContextCache:
+    """
+    Provider-side cached contents for static prompt prefixes.
+    
+    Agent prompts are a static role prompt plus per-turn context (cart,
+    address, phone). The static part and the tool declarations are
+    uploaded once as `cachedContents` and referenced by name, so each
+    call only sends the conversation and the per-turn context.
+    
+    Gemini only caches contents of at least `llm_context_cache_min_tokens`;
+    smaller prefixes (the agent prompts are a few hundred tokens) are never
+    uploaded and the prompt is sent in full, with the per-turn context in
+    the system instruction.
+    
+    Entries are created and extended in the background, so a turn never
+    waits for the cache API: until an entry is ready the prompt is sent
+    in full, and an entry being extended is used while it is still valid.
+    If Gemini refuses to create a cache (e.g. prompt below the minimum
+    cacheable size, or caching not available for the key), creation is
+    retried after `llm_context_cache_retry` seconds.
+    """
+    
+    API_URL = "https://generativelanguage.googleapis.com/v1beta"
+    
+    def __init__(self, model: str, static_prompts: list[str]):
+        self.model = model
+        # Longest first, so a prompt that extends another one wins
+        self.static_prompts = sorted(static_prompts, key=len, reverse=True)
+        self._entries: dict[str, tuple[str, float]] = {}  # key -> (name, expires_at)
+        self._unavailable_until: dict[str, float] = {}
+        self._too_small: set[str] = set()
+        self._pending: dict[str, asyncio.Task] = {}
+    
+    def split_prompt(self, system_prompt: str) -> tuple[Optional[str], str]:
+        """Split system prompt into (static prefix, per-turn context)."""
+        for static in self.static_prompts:
+            if system_prompt.startswith(static):
+                return static, system_prompt[len(static):].strip()
+        return None, system_prompt
+    
+    @staticmethod
+    def _key(prompt: str, declarations: list[dict]) -> str:
+        material = json.dumps([prompt, declarations], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+    
+    async def get(self, prompt: str, declarations: list[dict]) -> Optional[str]:
+        """Cached content name for prompt + tools, or None to send them in full."""
+        key = self._key(prompt, declarations)
+        now = time.monotonic()
+        
+        if key in self._too_small or self._unavailable_until.get(key, 0) > now:
+            return None
+        
+        declared = json.dumps(declarations, ensure_ascii=False)
+        if estimate_tokens([], prompt + declared) < settings.llm_context_cache_min_tokens:
+            # Below Gemini's minimum - creating it would always be refused
+            self._too_small.add(key)
+            return None
+        
+        entry = self._entries.get(key)
+        if entry and entry[1] - now > settings.llm_context_cache_refresh:
+            return entry[0]
+        
+        task = self._pending.get(key)
+        if task is None or task.done():
+            self._pending[key] = asyncio.create_task(self._refresh(key, prompt, declarations))
+        # An entry being extended is still usable until it expires
+        return entry[0] if entry and entry[1] > now else None
+    
+    async def _refresh(self, key: str, prompt: str, declarations: list[dict]) -> None:
+        """Create or extend the entry for `key`."""
+        # Runs in the background, not bound by the turn that scheduled it
+        current_deadline.set(None)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        try:
+            if entry and entry[1] > now and await self._extend(entry[0]):
+                name = entry[0]
+            else:
+                name = await self._create(prompt, declarations)
+        except Exception as e:
+            logger.warning(f"Gemini context cache unavailable, sending full prompt: {e}")
+            self._entries.pop(key, None)
+            self._unavailable_until[key] = now + settings.llm_context_cache_retry
+            return
+        finally:
+            self._pending.pop(key, None)
+        
+        self._entries[key] = (name, now + settings.llm_context_cache_ttl)
+    
+    def invalidate(self, name: str) -> None:
+        """Forget a cached content that Gemini no longer accepts."""
+        for key, (entry_name, _) in list(self._entries.items()):
+            if entry_name == name:
+                del self._entries[key]
+    
+    async def _create(self, prompt: str, declarations: list[dict]) -> str:
+        url = f"{self.API_URL}/cachedContents?key={settings.gemini_api_key}"
+        payload = {
+            "model": f"models/{self.model}",
+            "systemInstruction": {"parts": [{"text": prompt}]},
+            "ttl": f"{settings.llm_context_cache_ttl}s",
+        }
+        if declarations:
+            payload["tools"] = [{"functionDeclarations": declarations}]
+        
+        response = await get_http_client(url).post(
+            url, json=payload, timeout=settings.llm_timeout
+        )
+        response.raise_for_status()
+        name = response.json()["name"]
+        logger.info(f"Created Gemini context cache {name}")
+        return name
+    
+    async def _extend(self, name: str) -> bool:
+        url = f"{self.API_URL}/{name}?key={settings.gemini_api_key}&updateMask=ttl"
+        response = await get_http_client(url).patch(
+            url,
+            json={"ttl": f"{settings.llm_context_cache_ttl}s"},
+            timeout=settings.llm_timeout,
+        )
+        return response.status_code == 200
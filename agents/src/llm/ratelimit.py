@@ -0,0 +1,143 @@
+"""Distributed token-bucket rate limiter for LLM providers."""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from src.config import settings
+from src.db.redis import get_redis
+from src.deadline import DeadlineExceeded, deadline_timeout
+
+
+logger = logging.getLogger(__name__)
+
+
+# Two buckets (requests, tokens) checked and debited atomically.
+# Returns 0 if the request may be sent, else milliseconds to wait.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local waits = {}
+local states = {}
+
+for i = 1, 2 do
+    local rate = tonumber(ARGV[i * 3 - 1])      -- refill per ms
+    local capacity = tonumber(ARGV[i * 3])
+    local need = tonumber(ARGV[i * 3 + 1])
+    local level = capacity
+    local ts = now
+
+    if capacity > 0 then
+        local data = redis.call('HMGET', KEYS[i], 'level', 'ts')
+        if data[1] then
+            level = math.min(capacity, tonumber(data[1]) + (now - tonumber(data[2])) * rate)
+        end
+        if level < need then
+            table.insert(waits, (need - level) / rate)
+        end
+    end
+    states[i] = {level, need, capacity, rate}
+end
+
+local wait = 0
+for _, w in ipairs(waits) do
+    wait = math.max(wait, w)
+end
+
+for i = 1, 2 do
+    local level, need, capacity, rate = unpack(states[i])
+    if capacity > 0 then
+        if wait == 0 then
+            level = level - need
+        end
+        redis.call('HSET', KEYS[i], 'level', level, 'ts', now)
+        redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate) + 1000)
+    end
+end
+
+return math.ceil(wait)
+"""
+
+
+class ProviderRateLimiter:
+    """
+    Token buckets per provider, shared by all workers through Redis.
+    
+    Each provider has a requests-per-minute and a tokens-per-minute
+    bucket (0 disables a bucket). Before a call, `acquire` debits both;
+    if either is empty it waits up to `max_wait` for refill and otherwise
+    reports that the caller should use another provider.
+    """
+    
+    KEY = "llm:ratelimit:{provider}:{bucket}"
+    
+    def __init__(self):
+        self._script = None
+    
+    @staticmethod
+    def limits(provider: str) -> tuple[int, int]:
+        """(requests per minute, tokens per minute) for provider."""
+        if provider == "gemini":
+            return settings.llm_gemini_rpm, settings.llm_gemini_tpm
+        return settings.llm_openrouter_rpm, settings.llm_openrouter_tpm
+    
+    async def _try(self, provider: str, tokens: int) -> float:
+        """Try to debit buckets. Returns seconds to wait (0 = acquired)."""
+        rpm, tpm = self.limits(provider)
+        if not rpm and not tpm:
+            return 0
+        
+        redis_client = await get_redis()
+        if self._script is None:
+            self._script = redis_client.client.register_script(TOKEN_BUCKET_SCRIPT)
+        
+        wait_ms = await self._script(
+            keys=[
+                self.KEY.format(provider=provider, bucket="requests"),
+                self.KEY.format(provider=provider, bucket="tokens"),
+            ],
+            args=[
+                time.time() * 1000,
+                rpm / 60000, rpm, 1,
+                tpm / 60000, tpm, min(tokens, tpm),
+            ],
+        )
+        return int(wait_ms) / 1000
+    
+    async def acquire(
+        self,
+        provider: str,
+        tokens: int,
+        max_wait: Optional[float] = None,
+    ) -> bool:
+        """
+        Reserve one request and `tokens` tokens for provider.
+        
+        Returns False if the budget will not refill within `max_wait`
+        seconds - the caller should route to the next provider. The wait
+        is capped by the turn deadline; DeadlineExceeded is raised if the
+        refill would come after it.
+        """
+        if max_wait is None:
+            max_wait = settings.llm_ratelimit_max_wait
+        start = time.monotonic()
+        give_up_at = start + max_wait
+        turn_ends_at = start + deadline_timeout(max_wait)
+        
+        while True:
+            try:
+                wait = await self._try(provider, tokens)
+            except Exception as e:
+                # Never block LLM traffic on a limiter outage
+                logger.warning(f"LLM rate limiter unavailable: {e}")
+                return True
+            
+            if wait <= 0:
+                return True
+            ready_at = time.monotonic() + wait
+            if ready_at > give_up_at:
+                logger.info(f"{provider} budget exhausted, need {wait:.2f}s")
+                return False
+            if ready_at > turn_ends_at:
+                raise DeadlineExceeded(f"turn deadline before {provider} budget refill")
+            await asyncio.sleep(wait)
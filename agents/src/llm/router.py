@@ -0,0 +1,99 @@
+"""Latency-aware ordering of the LLM fallback chain."""
+
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+from src.config import settings
+
+
+Route = tuple[str, Optional[str]]  # (provider, model)
+
+
+@dataclass
+class RouteStats:
+    """EWMA latency and success rate of one model for one request class."""
+    latency: float
+    success: float
+    samples: int = 0
+
+
+class ModelRouter:
+    """
+    Orders the fallback chain per request class by observed performance.
+    
+    Request classes are "tools" (tool declarations sent) and "chat", since
+    models differ a lot in function-calling latency. Each model is scored
+    by expected time to a good answer - EWMA latency of successful calls
+    divided by EWMA success rate - and the chain is sorted by score.
+    Failures only lower the success rate: they are usually instant (429,
+    missing key, refused connection) and would make a broken model look
+    fast. Models without samples get `llm_routing_prior_latency` (also
+    the latency of a model that has only failed) and keep their static place
+    on ties. With probability `llm_routing_exploration` a random fallback
+    is moved to the front so its stats stay fresh.
+    
+    Policies (`llm_routing_policy`):
+    - "static": always the configured chain order
+    - "latency": sort by score as above
+    """
+    
+    MIN_SUCCESS = 0.05  # Keeps failing models ranked without dividing by zero
+    
+    def __init__(self, chain: list[Route]):
+        self.chain = list(chain)
+        self._stats: dict[tuple[str, Route], RouteStats] = {}
+    
+    @staticmethod
+    def request_class(tools: Optional[list[str]]) -> str:
+        return "tools" if tools else "chat"
+    
+    def record(self, request_class: str, route: Route, latency: float, success: bool) -> None:
+        """Fold one call outcome into the EWMA stats."""
+        stats = self._stats.get((request_class, route))
+        if stats is None:
+            self._stats[(request_class, route)] = RouteStats(
+                latency=latency if success else settings.llm_routing_prior_latency,
+                success=1.0 if success else 0.0,
+                samples=1,
+            )
+            return
+        
+        alpha = settings.llm_routing_alpha
+        if success:
+            stats.latency += alpha * (latency - stats.latency)
+        stats.success += alpha * ((1.0 if success else 0.0) - stats.success)
+        stats.samples += 1
+    
+    def score(self, request_class: str, route: Route) -> float:
+        """Expected seconds to a successful answer (lower is better)."""
+        stats = self._stats.get((request_class, route))
+        if stats is None:
+            return settings.llm_routing_prior_latency
+        return stats.latency / max(stats.success, self.MIN_SUCCESS)
+    
+    def order(self, request_class: str) -> list[Route]:
+        """Chain to try for a request of this class."""
+        if settings.llm_routing_policy != "latency":
+            return list(self.chain)
+        
+        # sorted() is stable - ties keep the configured order
+        ordered = sorted(self.chain, key=lambda route: self.score(request_class, route))
+        
+        if len(ordered) > 1 and random.random() < settings.llm_routing_exploration:
+            explored = ordered.pop(random.randrange(1, len(ordered)))
+            ordered.insert(0, explored)
+        
+        return ordered
+    
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Current stats per "class:model" for diagnostics."""
+        return {
+            f"{request_class}:{route[1] or route[0]}": {
+                "latency": round(stats.latency, 3),
+                "success": round(stats.success, 3),
+                "samples": stats.samples,
+                "score": round(self.score(request_class, route), 3),
+            }
+            for (request_class, route), stats in self._stats.items()
+        }
@@ -0,0 +1,47 @@
+"""Complexity-based model tiering: trivial turns go to a light model."""
+
+import re
+from typing import Optional
+
+from src.config import settings
+
+
+LIGHT = "light"
+HEAVY = "heavy"
+
+WORD = re.compile(r"[a-zа-яё]+")
+
+# A turn is trivial only if every word is small talk
+SMALL_TALK_WORDS = {
+    "привет", "приветствую", "здравствуйте", "здравствуй", "добрый", "доброе",
+    "доброй", "день", "утро", "вечер", "ночи", "хай", "салют",
+    "спасибо", "большое", "огромное", "благодарю", "спс", "пасиб",
+    "пока", "до", "свидания", "всего", "хорошего",
+    "hi", "hello", "hey", "thanks", "thank", "you", "bye",
+}
+
+# Confirmations can trigger create_order/add_to_cart - light only without tools
+CONFIRMATION_WORDS = {
+    "да", "ок", "окей", "ok", "хорошо", "ага", "угу", "ладно", "понятно",
+    "ясно", "отлично", "супер", "класс", "конечно", "yes",
+}
+
+
+def classify_turn(messages: list[dict], tools: Optional[list[str]] = None) -> str:
+    """
+    Pick the model tier for the next LLM call.
+    
+    Light: the last message is a short user greeting/thanks, or a bare
+    confirmation when no tools are offered. Everything else - follow-up
+    calls after tool results, questions, complaints, confirmations that
+    may place an order - stays on the heavy model.
+    """
+    if not messages or messages[-1].get("role") != "user":
+        return HEAVY
+    
+    words = WORD.findall((messages[-1].get("content") or "").lower())
+    if not words or len(words) > settings.llm_light_max_words:
+        return HEAVY
+    
+    allowed = SMALL_TALK_WORDS if tools else SMALL_TALK_WORDS | CONFIRMATION_WORDS
+    return LIGHT if all(word in allowed for word in words) else HEAVY
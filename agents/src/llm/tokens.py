@@ -0,0 +1,19 @@
+"""Token estimation for prompts."""
+
+import json
+from typing import Any
+
+
+# Rough average for mixed Russian/English text
+CHARS_PER_TOKEN = 3
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(messages: list[dict[str, Any]], system_prompt: str = "") -> int:
+    """Estimate prompt tokens for a message list (and optional system prompt)."""
+    chars = len(system_prompt)
+    for msg in messages:
+        chars += len(msg.get("content") or "")
+        if msg.get("tool_calls"):
+            chars += len(json.dumps(msg["tool_calls"], ensure_ascii=False, default=str))
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS * len(messages)
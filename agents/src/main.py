@@ -1,7 +1,7 @@
 """FastAPI application entrypoint for the agents service."""
 
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,9 +11,12 @@ from src.adapters.telegram import router as telegram_router
 from src.adapters.whatsapp import router as whatsapp_router
 from src.adapters.vk import router as vk_router
 from src.adapters.instagram import router as instagram_router
+from src.agents.classifier import load_intent_classifier
 from src.config import settings
 from src.db.session import init_db, close_db
 from src.db.redis import get_redis, close_redis
+from src.http.pool import init_http_clients, close_http_clients
+from src.llm.client import get_llm_client
 from src.queue.producer import ensure_consumer_group
 
 
@@ -24,8 +27,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     await init_db()
     await get_redis()  # Initialize Redis connection
     await ensure_consumer_group()  # Create consumer group for streams
+    await init_http_clients()  # Warm up pooled HTTP connections
+    load_intent_classifier()  # Supervisor intent model, if configured
     yield
     # Shutdown
+    await close_http_clients()
     await close_redis()
     await close_db()
 
@@ -57,9 +63,15 @@ app.include_router(instagram_router)
 
 
 @app.get("/healthz")
-async def healthz() -> dict[str, str]:
-    """Health check endpoint."""
-    return {"status": "ok"}
+async def healthz() -> dict[str, Any]:
+    """
+    Health check endpoint.
+    
+    `llm` reports circuit breaker health per model (1.0 = no errors or
+    slow calls in the window, 0 = circuit open). It is informational:
+    the service is up even while providers are degraded.
+    """
+    return {"status": "ok", "llm": await get_llm_client().provider_health()}
 
 
 if __name__ == "__main__":
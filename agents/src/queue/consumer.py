@@ -3,11 +3,14 @@
 import asyncio
 import json
 import logging
+from collections import deque
 from datetime import datetime
 from typing import Any, Callable, Optional
 
+from src.config import settings
 from src.db.redis import get_redis
 from src.queue.producer import STREAM_NAME, CONSUMER_GROUP, ensure_consumer_group
+from src.queue.retry import RETRY_KEY, RetryScheduler
 
 
 logger = logging.getLogger(__name__)
@@ -18,46 +21,121 @@ class StreamConsumer:
     Redis Streams consumer with:
     - Consumer groups for distributed processing
     - Automatic ACK on success
-    - Retry with backoff on failure
+    - Delayed retries with backoff (see RetryScheduler), never blocking reads
     - Dead-letter queue for failed messages
+    - Concurrent processing partitioned by customer
+    - Crash recovery: entries left pending by a dead worker are reclaimed
+    
+    Entries of one customer are handled in stream order, one at a time;
+    different customers run in parallel, up to `concurrency` handlers.
+    Up to twice as many entries are read ahead, so one busy customer
+    does not leave the other slots idle.
+    
+    Every `queue_reclaim_interval` the consumer takes over entries idle
+    for `queue_reclaim_min_idle` ms (XAUTOCLAIM). Its own unfinished
+    entries are re-claimed first (XCLAIM JUSTID resets their idle time),
+    so only entries of workers that stopped are taken. Attempts are
+    scheduled retries (`retry_count`) plus redeliveries from XPENDING;
+    an entry redelivered past MAX_RETRIES - e.g. one that crashes the
+    worker - is dead-lettered without running it again.
     """
     
     MAX_RETRIES = 3
     BLOCK_MS = 5000  # Wait for new messages
+    BATCH_SIZE = 10
+    READ_AHEAD = 2  # Buffered entries per concurrency slot
     DLQ_STREAM = "agents:dlq"
+    STATS_KEY = "agents:consumer:stats"
     
     def __init__(
         self,
         consumer_name: str,
         handler: Callable[[dict[str, Any]], Any],
+        concurrency: Optional[int] = None,
     ):
         self.consumer_name = consumer_name
         self.handler = handler
+        self.concurrency = concurrency or settings.queue_concurrency
         self._running = False
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._lanes: dict[str, deque[tuple[str, dict[str, Any], int]]] = {}
+        self._lane_tasks: dict[str, asyncio.Task] = {}
+        self._in_flight = 0
+        self._in_flight_ids: set[str] = set()
+        self._has_capacity = asyncio.Event()
+        self._has_capacity.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stopped = asyncio.Event()
+        self._stopped.set()
+        self.retries = RetryScheduler()
     
     async def start(self) -> None:
         """Start consuming messages."""
         await ensure_consumer_group()
         self._running = True
+        self._stopped.clear()
         
-        logger.info(f"Consumer {self.consumer_name} started")
+        logger.info(
+            f"Consumer {self.consumer_name} started (concurrency {self.concurrency})"
+        )
         
-        while self._running:
-            try:
-                await self._process_messages()
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Consumer error: {e}")
-                await asyncio.sleep(1)
+        background = [
+            asyncio.create_task(self.retries.run()),
+            asyncio.create_task(self._reclaim_loop()),
+        ]
+        try:
+            while self._running:
+                try:
+                    await self._process_messages()
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"Consumer error: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            for task in background:
+                task.cancel()
+            self._stopped.set()
     
-    async def stop(self) -> None:
-        """Stop consumer gracefully."""
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop consumer gracefully: stop reading, then wait for in-flight entries.
+        
+        Entries still unfinished after `timeout` (default
+        `queue_drain_timeout`) stay un-ACKed in the pending list.
+        """
         self._running = False
+        self._has_capacity.set()  # Wake a read waiting for capacity
         logger.info(f"Consumer {self.consumer_name} stopping")
+        
+        if timeout is None:
+            timeout = settings.queue_drain_timeout
+        try:
+            async with asyncio.timeout(timeout):
+                # The last read may still deliver entries - wait for the loop first
+                await self._stopped.wait()
+                await self._idle.wait()
+        except TimeoutError:
+            logger.warning(
+                f"Consumer {self.consumer_name} stopped with {self._in_flight} entries in flight"
+            )
+    
+    @property
+    def _capacity(self) -> int:
+        """Entries that can still be read ahead."""
+        return self.concurrency * self.READ_AHEAD - self._in_flight
     
     async def _process_messages(self) -> None:
-        """Read and process messages from stream."""
+        """Read new messages and hand them to per-customer lanes."""
+        # Bounded read-ahead: wait for a finished entry before reading more
+        while self._running and self._capacity <= 0:
+            self._has_capacity.clear()
+            await self._has_capacity.wait()
+        # stop() may have been called while waiting - read nothing more
+        if not self._running:
+            return
+        
         redis_client = await get_redis()
         
         # Read new messages
@@ -65,7 +143,7 @@ class StreamConsumer:
             groupname=CONSUMER_GROUP,
             consumername=self.consumer_name,
             streams={STREAM_NAME: ">"},  # Only new messages
-            count=10,
+            count=min(self.BATCH_SIZE, self._capacity),
             block=self.BLOCK_MS,
         )
         
@@ -74,16 +152,139 @@ class StreamConsumer:
         
         for stream_name, entries in messages:
             for entry_id, data in entries:
-                await self._handle_message(entry_id, data)
+                self._dispatch(entry_id, data)
+    
+    @staticmethod
+    def _partition(entry_id: str, data: dict[str, Any]) -> str:
+        return data.get("customer_id") or data.get("external_id") or entry_id
+    
+    def _dispatch(self, entry_id: str, data: dict[str, Any], deliveries: int = 1) -> None:
+        """Queue an entry behind earlier entries of the same customer."""
+        key = self._partition(entry_id, data)
+        self._in_flight += 1
+        self._in_flight_ids.add(entry_id)
+        self._idle.clear()
+        self._lanes.setdefault(key, deque()).append((entry_id, data, deliveries))
+        if key not in self._lane_tasks:
+            self._lane_tasks[key] = asyncio.create_task(self._run_lane(key))
+    
+    async def _run_lane(self, key: str) -> None:
+        lane = self._lanes[key]
+        try:
+            while lane:
+                entry_id, data, deliveries = lane.popleft()
+                try:
+                    async with self._slots:
+                        await self._handle_message(entry_id, data, deliveries)
+                except Exception as e:
+                    # Failure handling itself failed (e.g. Redis down) - entry stays pending
+                    logger.error(f"Could not process {entry_id}: {e}")
+                finally:
+                    self._in_flight -= 1
+                    self._in_flight_ids.discard(entry_id)
+                    self._has_capacity.set()
+                    if not self._in_flight:
+                        self._idle.set()
+        finally:
+            # No await between the empty check and here, so nothing is lost
+            self._lanes.pop(key, None)
+            self._lane_tasks.pop(key, None)
+    
+    async def _reclaim_loop(self) -> None:
+        """Reclaim stuck entries until cancelled."""
+        while True:
+            try:
+                await self.reclaim()
+            except Exception as e:
+                logger.error(f"Reclaim failed: {e}")
+            await asyncio.sleep(settings.queue_reclaim_interval)
+    
+    async def reclaim(self) -> int:
+        """Take over entries idle in the pending list; returns how many."""
+        redis_client = await get_redis()
+        client = redis_client.client
+        
+        # Heartbeat: entries we are still working on must not look idle
+        if self._in_flight_ids:
+            await client.xclaim(
+                STREAM_NAME, CONSUMER_GROUP, self.consumer_name,
+                min_idle_time=0, message_ids=list(self._in_flight_ids), justid=True,
+            )
+        
+        claimed_total, deleted_total = 0, 0
+        cursor = "0-0"
+        while self._capacity > 0:
+            result = await client.xautoclaim(
+                STREAM_NAME, CONSUMER_GROUP, self.consumer_name,
+                min_idle_time=settings.queue_reclaim_min_idle,
+                start_id=cursor,
+                count=min(self.BATCH_SIZE, self._capacity),
+            )
+            # [next cursor, entries, deleted IDs (Redis 7+)]
+            cursor, entries = result[0], result[1]
+            deleted_total += len(result[2]) if len(result) > 2 else 0
+            
+            entries = [
+                (entry_id, data) for entry_id, data in entries
+                if data and entry_id not in self._in_flight_ids
+            ]
+            if entries:
+                deliveries = await self._delivery_counts([entry_id for entry_id, _ in entries])
+                for entry_id, data in entries:
+                    self._dispatch(entry_id, data, deliveries.get(entry_id, 1))
+                claimed_total += len(entries)
+            if cursor in ("0-0", b"0-0"):
+                break
+        
+        if claimed_total or deleted_total:
+            logger.warning(
+                f"Consumer {self.consumer_name} reclaimed {claimed_total} entries "
+                f"({deleted_total} already deleted)"
+            )
+        await self._count(reclaim_runs=1, reclaimed=claimed_total, reclaim_deleted=deleted_total)
+        return claimed_total
+    
+    async def _delivery_counts(self, entry_ids: list[str]) -> dict[str, int]:
+        """Times each entry was delivered, from XPENDING (IDs in stream order)."""
+        redis_client = await get_redis()
+        pending = await redis_client.client.xpending_range(
+            STREAM_NAME, CONSUMER_GROUP,
+            min=entry_ids[0], max=entry_ids[-1],
+            count=len(entry_ids) + len(self._in_flight_ids),
+            consumername=self.consumer_name,
+        )
+        return {p["message_id"]: p["times_delivered"] for p in pending}
+    
+    async def _count(self, **counters: int) -> None:
+        """Add to the shared consumer metrics."""
+        counters = {name: n for name, n in counters.items() if n}
+        if not counters:
+            return
+        try:
+            redis_client = await get_redis()
+            pipe = redis_client.client.pipeline(transaction=False)
+            for name, n in counters.items():
+                pipe.hincrby(self.STATS_KEY, name, n)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Consumer stats update failed: {e}")
     
     async def _handle_message(
         self,
         entry_id: str,
         data: dict[str, Any],
+        deliveries: int = 1,
     ) -> None:
         """Handle single message with retries."""
         message_id = data.get("message_id", entry_id)
-        retry_count = int(data.get("retry_count", 0))
+        # Scheduled retries plus redeliveries after a worker died mid-turn
+        retry_count = int(data.get("retry_count", 0)) + deliveries - 1
+        
+        if deliveries > 1 and retry_count > self.MAX_RETRIES:
+            # Keeps failing without reaching _handle_failure - don't run it again
+            await self._count(poisoned=1)
+            await self._dead_letter(entry_id, data, f"Redelivered {deliveries} times")
+            return
         
         try:
             # Parse metadata
@@ -120,31 +321,49 @@ class StreamConsumer:
         error: str,
     ) -> None:
         """Handle failed message with retry or DLQ."""
-        redis_client = await get_redis()
-        
         if retry_count < self.MAX_RETRIES:
-            # Retry with backoff
-            await asyncio.sleep(2 ** retry_count)
-            
-            # Re-add with incremented retry count
+            # Re-added with incremented retry count once the backoff passes;
+            # the original is ACKed in the same transaction
+            delay = self.retries.backoff(retry_count)
             data["retry_count"] = str(retry_count + 1)
             data["last_error"] = error
-            await redis_client.client.xadd(STREAM_NAME, data)
-            
-            # ACK original
-            await redis_client.client.xack(STREAM_NAME, CONSUMER_GROUP, entry_id)
+            await self.retries.schedule(entry_id, data, delay)
             
-            logger.warning(f"Retrying message (attempt {retry_count + 1})")
+            logger.warning(f"Retrying message in {delay:.0f}s (attempt {retry_count + 1})")
         else:
-            # Move to DLQ
-            data["error"] = error
-            data["failed_at"] = datetime.utcnow().isoformat()
-            await redis_client.client.xadd(self.DLQ_STREAM, data)
-            
-            # ACK original
-            await redis_client.client.xack(STREAM_NAME, CONSUMER_GROUP, entry_id)
-            
-            logger.error(f"Message {data.get('message_id')} moved to DLQ after {self.MAX_RETRIES} retries")
+            await self._dead_letter(entry_id, data, error)
+    
+    async def _dead_letter(self, entry_id: str, data: dict[str, Any], error: str) -> None:
+        """Move entry to the DLQ."""
+        redis_client = await get_redis()
+        
+        data["error"] = error
+        data["failed_at"] = datetime.utcnow().isoformat()
+        await redis_client.client.xadd(self.DLQ_STREAM, data)
+        
+        # ACK original
+        await redis_client.client.xack(STREAM_NAME, CONSUMER_GROUP, entry_id)
+        
+        logger.error(f"Message {data.get('message_id')} moved to DLQ: {error}")
+
+
+async def get_queue_stats() -> dict[str, int]:
+    """Reclaim/retry counters of all consumers and current backlog sizes."""
+    redis_client = await get_redis()
+    pipe = redis_client.client.pipeline(transaction=False)
+    pipe.hgetall(StreamConsumer.STATS_KEY)
+    pipe.xpending(STREAM_NAME, CONSUMER_GROUP)
+    pipe.zcard(RETRY_KEY)
+    counters, pending, retries = await pipe.execute()
+    return {
+        "reclaim_runs": 0,
+        "reclaimed": 0,
+        "reclaim_deleted": 0,
+        "poisoned": 0,
+        **{name: int(n) for name, n in counters.items()},
+        "pending": pending["pending"],
+        "scheduled_retries": retries,
+    }
 
 
 async def create_consumer(
@@ -0,0 +1,94 @@
+"""Delayed retries for failed stream entries, scheduled in a Redis sorted set."""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Optional
+
+from src.config import settings
+from src.db.redis import get_redis
+from src.queue.producer import STREAM_NAME, CONSUMER_GROUP
+
+
+logger = logging.getLogger(__name__)
+
+
+RETRY_KEY = "agents:retry"
+
+# Moves due entries (score <= now) back to the stream. Atomic, so several
+# workers can promote at once without re-adding an entry twice.
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    local fields = {}
+    for k, v in pairs(cjson.decode(member)) do
+        table.insert(fields, k)
+        table.insert(fields, v)
+    end
+    redis.call('XADD', KEYS[2], '*', unpack(fields))
+    redis.call('ZREM', KEYS[1], member)
+end
+return #due
+"""
+
+
+class RetryScheduler:
+    """
+    Failed entries wait in `agents:retry` (score = due time) instead of
+    the consumer sleeping on them; a promoter task re-adds due entries to
+    `agents:incoming` in batches of `queue_retry_batch`.
+    """
+    
+    def __init__(self):
+        self._script = None
+        self.scheduled = 0
+        self.promoted = 0
+    
+    @staticmethod
+    def backoff(retry_count: int) -> float:
+        """Delay before attempt `retry_count + 1`, seconds."""
+        return settings.queue_retry_backoff * 2 ** retry_count
+    
+    async def schedule(self, entry_id: str, data: dict[str, Any], delay: float) -> None:
+        """Schedule `data` to be re-added after `delay` and ACK the original entry."""
+        # Stream fields are strings; sorted keys keep the member stable
+        member = json.dumps({k: str(v) for k, v in data.items()}, sort_keys=True)
+        redis_client = await get_redis()
+        pipe = redis_client.client.pipeline(transaction=True)
+        pipe.zadd(RETRY_KEY, {member: time.time() + delay})
+        pipe.xack(STREAM_NAME, CONSUMER_GROUP, entry_id)
+        await pipe.execute()
+        self.scheduled += 1
+    
+    async def promote_due(self, limit: Optional[int] = None) -> int:
+        """Re-add entries whose retry time has come; returns how many."""
+        redis_client = await get_redis()
+        if self._script is None:
+            self._script = redis_client.client.register_script(PROMOTE_SCRIPT)
+        
+        promoted = await self._script(
+            keys=[RETRY_KEY, STREAM_NAME],
+            args=[time.time(), limit or settings.queue_retry_batch],
+        )
+        self.promoted += promoted
+        return promoted
+    
+    async def run(self) -> None:
+        """Promote due retries until cancelled."""
+        while True:
+            try:
+                promoted = await self.promote_due()
+                if promoted:
+                    logger.info(f"Re-queued {promoted} retries")
+                    # A full batch may mean more are due - don't wait
+                    if promoted >= settings.queue_retry_batch:
+                        continue
+            except Exception as e:
+                logger.error(f"Retry promotion failed: {e}")
+            await asyncio.sleep(settings.queue_retry_poll_interval)
+    
+    async def pending(self) -> int:
+        """Number of scheduled retries."""
+        redis_client = await get_redis()
+        return await redis_client.client.zcard(RETRY_KEY)
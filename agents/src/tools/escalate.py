@@ -3,9 +3,8 @@
 from datetime import datetime
 from typing import Any, Optional
 
-import httpx
-
 from src.config import settings
+from src.http.pool import TELEGRAM_API_URL, get_http_client
 
 
 async def escalate_to_human(
@@ -75,12 +74,14 @@ async def _send_telegram_alert(alert: dict) -> None:
         f"Контекст:\n{alert['context']}"
     )
     
-    async with httpx.AsyncClient() as client:
-        await client.post(
-            f"https://api.telegram.org/bot{settings.telegram_bot_token}/sendMessage",
-            json={
-                "chat_id": admin_chat_id,
-                "text": text,
-                "parse_mode": "Markdown",
-            }
-        )
+    url = f"{TELEGRAM_API_URL}/bot{settings.telegram_bot_token}/sendMessage"
+    await get_http_client(url).post(
+        url,
+        json={
+            "chat_id": admin_chat_id,
+            "text": text,
+            "parse_mode": "Markdown",
+        },
+        # Not tied to the turn deadline - the operator must hear about it
+        timeout=settings.http_timeout,
+    )
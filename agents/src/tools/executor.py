@@ -0,0 +1,81 @@
+"""Tool call executor - runs independent tool calls concurrently."""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.db.session import async_session_maker
+
+
+# Tools that only read - safe to run side by side on separate sessions
+READ_ONLY_TOOLS = {"check_stock", "get_product_price", "get_order_status"}
+
+ToolRunner = Callable[[AsyncSession, str, dict], Awaitable[Any]]
+
+
+def parse_arguments(tool_call: dict) -> dict:
+    """Tool call arguments as dict (OpenRouter sends a JSON string)."""
+    args = tool_call.get("arguments", {})
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError:
+            args = {}
+    return args or {}
+
+
+async def execute_tool_calls(
+    tool_calls: list[dict],
+    run_tool: ToolRunner,
+    session: AsyncSession,
+) -> list[Any]:
+    """
+    Execute tool calls and return their results in call order.
+    
+    Consecutive read-only calls run concurrently, each on its own session
+    since an AsyncSession must not be shared between tasks. Any other
+    tool acts as a barrier: it runs alone on `session` after everything
+    before it has finished, so state mutations keep their order.
+    """
+    results: list[Any] = [None] * len(tool_calls)
+    semaphore = asyncio.Semaphore(settings.agent_tool_concurrency)
+    batch: list[int] = []
+    
+    async def run_isolated(index: int) -> None:
+        name = tool_calls[index].get("name")
+        async with semaphore, async_session_maker() as own_session:
+            results[index] = await run_tool(
+                own_session, name, parse_arguments(tool_calls[index])
+            )
+    
+    async def flush() -> None:
+        if len(batch) == 1:
+            index = batch[0]
+            results[index] = await run_tool(
+                session, tool_calls[index].get("name"), parse_arguments(tool_calls[index])
+            )
+        elif batch:
+            tasks = [asyncio.create_task(run_isolated(index)) for index in batch]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # First failure propagates as is; siblings are cancelled
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        batch.clear()
+    
+    for index, tool_call in enumerate(tool_calls):
+        name = tool_call.get("name")
+        if name in READ_ONLY_TOOLS:
+            batch.append(index)
+            continue
+        
+        await flush()
+        results[index] = await run_tool(session, name, parse_arguments(tool_call))
+    
+    await flush()
+    return results
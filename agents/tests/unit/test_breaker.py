@@ -0,0 +1,159 @@
+"""Unit tests for the LLM circuit breaker."""
+
+import time
+
+import pytest
+
+from src.config import settings
+from src.llm import breaker as breaker_module
+from src.llm.breaker import BreakerState, CircuitBreaker, MemoryBreakerStore, RedisBreakerStore
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """Breaker with in-memory store and small thresholds."""
+    monkeypatch.setattr(settings, "llm_breaker_min_calls", 3)
+    monkeypatch.setattr(settings, "llm_breaker_failure_rate", 0.5)
+    monkeypatch.setattr(settings, "llm_breaker_open_seconds", 30)
+    cb = CircuitBreaker("gemini", MemoryBreakerStore())
+    cb.STATE_CACHE_SECONDS = 0
+    return cb
+
+
+class FakeRedis:
+    """Hashes and plain keys, enough for RedisBreakerStore."""
+    
+    def __init__(self):
+        self.data: dict[str, dict | str] = {}
+    
+    async def hincrby(self, key, field, amount):
+        row = self.data.setdefault(key, {})
+        row[field] = str(int(row.get(field, 0)) + amount)
+    
+    async def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+    
+    async def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+    
+    async def expire(self, key, seconds):
+        pass
+    
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+    
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+    
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.calls = []
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append(getattr(self.redis, name)(*args, **kwargs))
+    
+    async def execute(self):
+        return [await call for call in self.calls]
+
+
+@pytest.fixture
+def redis_breaker(monkeypatch):
+    """Breaker on RedisBreakerStore backed by FakeRedis."""
+    monkeypatch.setattr(settings, "llm_breaker_min_calls", 3)
+    monkeypatch.setattr(settings, "llm_breaker_failure_rate", 0.5)
+    monkeypatch.setattr(settings, "llm_breaker_open_seconds", 30)
+    monkeypatch.setattr(settings, "llm_breaker_window", 60)
+    monkeypatch.setattr(settings, "llm_breaker_bucket", 10)
+    fake = FakeRedis()
+    redis_client = type("RedisClient", (), {"client": fake})()
+    
+    async def get_redis():
+        return redis_client
+    monkeypatch.setattr(breaker_module, "get_redis", get_redis)
+    cb = CircuitBreaker("gemini", RedisBreakerStore())
+    cb.STATE_CACHE_SECONDS = 0
+    return cb
+
+
+async def open_breaker(cb):
+    for _ in range(3):
+        await cb.record_failure(0.1)
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker state transitions."""
+    
+    async def test_starts_closed(self, breaker):
+        """Test that a fresh breaker allows calls."""
+        assert await breaker.state() == BreakerState.CLOSED
+        assert await breaker.allow() is True
+        assert await breaker.health() == 1.0
+    
+    async def test_opens_on_error_rate(self, breaker):
+        """Test that repeated failures open the circuit."""
+        await open_breaker(breaker)
+        
+        assert await breaker.state() == BreakerState.OPEN
+        assert await breaker.allow() is False
+        assert await breaker.health() == 0.0
+    
+    async def test_needs_min_calls(self, breaker):
+        """Test that a single failure does not open the circuit."""
+        await breaker.record_failure(0.1)
+        
+        assert await breaker.state() == BreakerState.CLOSED
+    
+    async def test_half_open_single_probe(self, breaker, monkeypatch):
+        """Test that only one probe passes after the open period."""
+        await open_breaker(breaker)
+        later = time.time() + 31
+        monkeypatch.setattr("src.llm.breaker.time.time", lambda: later)
+        
+        assert await breaker.state() == BreakerState.HALF_OPEN
+        assert await breaker.allow() is True
+        assert await breaker.allow() is False
+    
+    async def test_probe_success_closes(self, breaker, monkeypatch):
+        """Test that a successful probe closes the circuit."""
+        await open_breaker(breaker)
+        later = time.time() + 31
+        monkeypatch.setattr("src.llm.breaker.time.time", lambda: later)
+        
+        await breaker.allow()
+        await breaker.record_success(0.2)
+        
+        assert await breaker.state() == BreakerState.CLOSED
+    
+    async def test_probe_failure_reopens(self, breaker, monkeypatch):
+        """Test that a failed probe re-opens the circuit."""
+        await open_breaker(breaker)
+        later = time.time() + 31
+        monkeypatch.setattr("src.llm.breaker.time.time", lambda: later)
+        
+        await breaker.allow()
+        await breaker.record_failure(0.2)
+        
+        assert await breaker.state() == BreakerState.OPEN
+    
+    async def test_redis_probe_success_clears_window(self, redis_breaker, monkeypatch):
+        """Test that closing the shared circuit drops old failures; one more does not re-open it."""
+        await open_breaker(redis_breaker)
+        later = time.time() + 31
+        monkeypatch.setattr("src.llm.breaker.time.time", lambda: later)
+        
+        assert await redis_breaker.allow() is True
+        await redis_breaker.record_success(0.2)
+        await redis_breaker.record_failure(0.2)
+        
+        assert await redis_breaker.state() == BreakerState.CLOSED
+        buckets = redis_breaker._window_buckets(later)
+        assert await redis_breaker.store.window("gemini", buckets) == (1, 1, 0)
@@ -0,0 +1,360 @@
+"""Unit tests for conversation checkpoints."""
+
+import json
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from src.agents import checkpoint, graph
+from src.agents.checkpoint import ConversationCheckpointer
+from src.agents.state import AgentRunRequest, CartItem, SeafoodBusinessState
+from src.api.routes import get_state_endpoint
+from src.config import settings
+from src.db.codec import pack, unpack
+from src.db.redis import RedisClient
+
+
+class FakePipeline:
+    """Queues list/hash commands and applies them to a dict on execute()."""
+    
+    def __init__(self, store):
+        self.store = store
+        self.commands = []
+    
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+    
+    async def execute(self):
+        results = []
+        for name, args, kwargs in self.commands:
+            key = args[0]
+            if name == "rpush":
+                self.store.setdefault(key, []).extend(args[1:])
+                self.store["writes"].extend(args[1:])
+            elif name == "hset":
+                self.store.setdefault(key, {}).update(kwargs["mapping"])
+                self.store["writes"].extend(kwargs["mapping"])
+            elif name == "hdel":
+                for field in args[1:]:
+                    self.store.get(key, {}).pop(field, None)
+            elif name == "hgetall":
+                results.append({k.encode(): v for k, v in self.store.get(key, {}).items()})
+                continue
+            elif name == "hmget":
+                results.append([self.store.get(key, {}).get(k) for k in args[1]])
+                continue
+            elif name == "lrange":
+                items = self.store.get(key, [])
+                results.append(items[args[1]:])
+                continue
+            elif name == "llen":
+                results.append(len(self.store.get(key, [])))
+                continue
+            results.append(True)
+        self.commands = []
+        return results
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """RedisClient backed by a dict instead of a server."""
+    store = {"writes": []}  # Every appended message and updated field, in order
+    client = MagicMock()
+    client.pipeline = lambda transaction=True: FakePipeline(store)
+    
+    redis_client = RedisClient()
+    redis_client._client = client
+    redis_client._binary = client
+    
+    async def get_redis():
+        return redis_client
+    monkeypatch.setattr(checkpoint, "get_redis", get_redis)
+    return store
+
+
+def request(message: str) -> AgentRunRequest:
+    return AgentRunRequest(channel="telegram", customer_id="c1", external_id="1", message=message)
+
+
+class TestConversationCheckpointer:
+    """Tests for ConversationCheckpointer."""
+    
+    async def test_roundtrip(self, redis):
+        """Test that cart and messages survive save/load."""
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram", current_stage="sales",
+            messages=[{"role": "user", "content": "привет"}],
+            cart=[CartItem(
+                product_id="p1", name="Устрицы", quantity=6, unit="шт",
+                unit_price=Decimal("350.00"),
+            )],
+        )
+        cp = ConversationCheckpointer()
+        
+        await cp.save("c1", state)
+        restored = SeafoodBusinessState(**await cp.load("c1"))
+        
+        assert restored.cart == state.cart
+        assert restored.messages == state.messages
+    
+    async def test_compact_encoding(self, redis):
+        """Test that defaults and transient fields are not stored."""
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram", escalate_to_human=True,
+            available_products=[{"id": "p1"}],
+            messages=[{"role": "user", "content": "привет"}],
+        )
+        
+        await ConversationCheckpointer().save("c1", state)
+        raw = redis["agent:conv:c1:messages"][0]
+        
+        assert set(redis["agent:conv:c1:fields"]) == {"customer_id", "channel"}
+        assert "привет".encode() in raw  # UTF-8, not \\u escapes
+        assert len(raw) < len(json.dumps(state.messages[0], ensure_ascii=False))
+    
+    async def test_pause_survives_restart(self, redis):
+        """Test that a conversation handed to an operator stays paused."""
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram", is_paused_for_human=True,
+        )
+        cp = ConversationCheckpointer()
+        
+        await cp.save("c1", state)
+        
+        assert SeafoodBusinessState(**await cp.load("c1")).is_paused_for_human is True
+    
+    async def test_save_writes_only_delta(self, redis):
+        """Test that a turn appends its messages and rewrites only changed fields."""
+        cp = ConversationCheckpointer()
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram", current_stage="sales",
+            messages=[
+                {"role": "user", "content": "привет"},
+                {"role": "assistant", "content": "здравствуйте"},
+            ],
+        )
+        await cp.save("c1", state)
+        
+        saved = await cp.load("c1")
+        state = SeafoodBusinessState(**saved)
+        state.messages = state.messages + [{"role": "user", "content": "хочу устрицы"}]
+        state.current_stage = "checkout"
+        redis["writes"].clear()
+        await cp.save("c1", state, saved)
+        
+        assert len(redis["agent:conv:c1:messages"]) == 3
+        assert unpack(redis["writes"][0]) == {"role": "user", "content": "хочу устрицы"}
+        assert redis["writes"][1:] == ["current_stage"]
+    
+    async def test_load_reads_tail_window(self, redis, monkeypatch):
+        """Test that only the last messages are loaded and the rest are counted."""
+        monkeypatch.setattr(settings, "agent_state_window", 2)
+        cp = ConversationCheckpointer()
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": str(i)} for i in range(5)],
+        )
+        await cp.save("c1", state)
+        
+        saved = await cp.load("c1")
+        
+        assert [m["content"] for m in saved["messages"]] == ["3", "4"]
+        assert saved["message_offset"] == 3
+    
+    async def test_removed_field_deleted(self, redis):
+        """Test that a field reset to its default is removed from the hash."""
+        cp = ConversationCheckpointer()
+        state = SeafoodBusinessState(customer_id="c1", channel="telegram", agent_notes="vip")
+        await cp.save("c1", state)
+        saved = await cp.load("c1")
+        
+        state = SeafoodBusinessState(**saved)
+        state.agent_notes = None
+        await cp.save("c1", state, saved)
+        
+        assert "agent_notes" not in redis["agent:conv:c1:fields"]
+    
+    async def test_read_projection(self, redis):
+        """Test that a projection skips the message history."""
+        cp = ConversationCheckpointer()
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram", current_stage="checkout",
+            messages=[{"role": "user", "content": "привет"}],
+        )
+        await cp.save("c1", state)
+        
+        assert await cp.read("c1", ["current_stage", "phone"]) == {
+            "current_stage": "checkout", "phone": None,
+        }
+        assert "messages" in await cp.read("c1", ["messages"])
+        assert await cp.read("c2", ["current_stage"]) is None
+    
+    async def test_projected_defaults_filled(self, redis):
+        """Test that a projected field left at its default is returned, not dropped."""
+        cp = ConversationCheckpointer()
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": "привет"}],
+        )
+        await cp.save("c1", state)
+        
+        assert await cp.read("c1", ["current_stage", "cart"]) == {
+            "current_stage": "greeting", "cart": [],
+        }
+    
+    async def test_window_zero_reads_all_messages(self, redis):
+        """Test that window=0 returns the whole history instead of none of it."""
+        cp = ConversationCheckpointer()
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": str(i)} for i in range(5)],
+        )
+        await cp.save("c1", state)
+        
+        saved = await cp.read("c1", ["messages"], window=0)
+        
+        assert [m["content"] for m in saved["messages"]] == ["0", "1", "2", "3", "4"]
+        assert saved["message_offset"] == 0
+    
+    async def test_redis_down(self, monkeypatch):
+        """Test that an unavailable store starts a fresh conversation."""
+        async def broken():
+            raise ConnectionError("redis down")
+        monkeypatch.setattr(checkpoint, "get_redis", broken)
+        
+        assert await ConversationCheckpointer().load("c1") is None
+
+
+class TestRunAgentResume:
+    """Tests for state restore/save around run_agent."""
+    
+    async def test_second_turn_sees_first(self, redis, monkeypatch):
+        """Test that the graph gets earlier messages and cart back."""
+        seen = []
+        
+        async def fake_graph(state):
+            seen.append(list(state.messages))
+            result = state.model_dump()
+            result["messages"] = state.messages + [{"role": "assistant", "content": "ok"}]
+            result["current_stage"] = "sales"
+            return result
+        monkeypatch.setattr(graph.agent_graph, "ainvoke", fake_graph)
+        
+        first = await graph.run_agent(request("хочу устрицы"))
+        second = await graph.run_agent(request("а икра есть?"))
+        
+        assert first.state_id == second.state_id == "c1"
+        assert [m["content"] for m in seen[1]] == ["хочу устрицы", "ok", "а икра есть?"]
+        assert second.reply == "ok"
+    
+    async def test_reply_only_from_this_turn(self, redis, monkeypatch):
+        """Test that an old answer is not resent when this turn has none."""
+        async def silent_graph(state):
+            return state.model_dump()
+        
+        async def answering_graph(state):
+            result = state.model_dump()
+            result["messages"] = state.messages + [{"role": "assistant", "content": "ok"}]
+            return result
+        
+        monkeypatch.setattr(graph.agent_graph, "ainvoke", answering_graph)
+        await graph.run_agent(request("привет"))
+        monkeypatch.setattr(graph.agent_graph, "ainvoke", silent_graph)
+        response = await graph.run_agent(request("позовите оператора"))
+        
+        assert response.reply != "ok"
+    
+    async def test_conversation_id_per_state(self, redis, monkeypatch):
+        """Test that nodes get the conversation key, not the customer, and it is not stored."""
+        seen = []
+        
+        async def fake_graph(state):
+            seen.append(state.conversation_id)
+            return state.model_dump()
+        monkeypatch.setattr(graph.agent_graph, "ainvoke", fake_graph)
+        
+        await graph.run_agent(request("привет").model_copy(update={"state_id": "s1"}))
+        await graph.run_agent(request("привет").model_copy(update={"state_id": "s2"}))
+        await graph.run_agent(request("привет").model_copy(update={"state_id": "s1"}))
+        
+        assert seen == ["s1", "s2", "s1"]
+        assert "conversation_id" not in await ConversationCheckpointer().read("s1")
+
+
+class TestStateEndpoint:
+    """Tests for GET /agents/state/{state_id}."""
+    
+    @pytest.fixture(autouse=True)
+    def api_key(self, monkeypatch):
+        monkeypatch.setattr(settings, "state_api_key", "secret")
+    
+    async def test_projection(self, redis):
+        """Test that only the requested fields are returned."""
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram", current_stage="sales",
+            messages=[{"role": "user", "content": "привет"}],
+        )
+        await ConversationCheckpointer().save("c1", state)
+        
+        response = await get_state_endpoint(
+            "c1", fields="current_stage", window=20, x_api_key="secret"
+        )
+        
+        assert response.state == {"current_stage": "sales"}
+    
+    async def test_unknown_field_rejected(self, redis):
+        """Test that transient or unknown fields are a client error."""
+        with pytest.raises(HTTPException) as exc:
+            await get_state_endpoint(
+                "c1", fields="cart,available_products", window=20, x_api_key="secret"
+            )
+        
+        assert exc.value.status_code == 400
+    
+    async def test_missing_state(self, redis):
+        """Test that an unknown conversation is a 404."""
+        with pytest.raises(HTTPException) as exc:
+            await get_state_endpoint("nope", fields=None, window=20, x_api_key="secret")
+        
+        assert exc.value.status_code == 404
+    
+    @pytest.mark.parametrize("configured,sent", [("secret", ""), ("secret", "guess"), ("", "")])
+    async def test_requires_api_key(self, redis, monkeypatch, configured, sent):
+        """Test that a missing or wrong key, or no configured key, is refused."""
+        monkeypatch.setattr(settings, "state_api_key", configured)
+        await ConversationCheckpointer().save(
+            "c1", SeafoodBusinessState(customer_id="c1", channel="telegram")
+        )
+        
+        with pytest.raises(HTTPException) as exc:
+            await get_state_endpoint("c1", fields=None, window=20, x_api_key=sent)
+        
+        assert exc.value.status_code == 403
+
+class TestCodec:
+    """Tests for the binary value encoding."""
+    
+    def test_roundtrip_small(self):
+        """Test that small values are stored uncompressed."""
+        value = {"role": "user", "content": "привет", "price": Decimal("350.00")}
+        
+        data = pack(value)
+        
+        assert data[:1] == b"\x00"
+        assert unpack(data) == {**value, "price": "350.00"}
+    
+    def test_large_values_compressed(self, monkeypatch):
+        """Test that values above the threshold are zstd-compressed."""
+        monkeypatch.setattr(settings, "redis_compress_threshold", 100)
+        value = [{"role": "assistant", "content": "Устрицы Fine de Claire " * 10}] * 20
+        
+        data = pack(value)
+        
+        assert data[:1] == b"\x01"
+        assert len(data) < len(json.dumps(value)) / 5
+        assert unpack(data) == value
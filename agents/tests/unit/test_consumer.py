@@ -0,0 +1,273 @@
+"""Unit tests for the Redis Streams consumer."""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.config import settings
+from src.queue import consumer as consumer_module
+from src.queue import retry as retry_module
+from src.queue.consumer import StreamConsumer
+from src.queue.retry import RETRY_KEY, RetryScheduler
+
+
+def entry(entry_id: str, customer_id: str) -> tuple[str, dict]:
+    return entry_id, {
+        "message_id": entry_id, "channel": "telegram", "external_id": customer_id,
+        "customer_id": customer_id, "message": "привет", "retry_count": "0",
+    }
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """Redis client serving queued xreadgroup batches."""
+    client = MagicMock()
+    client.batches = []
+    client.xack = AsyncMock()
+    client.xadd = AsyncMock()
+    client.script = AsyncMock(return_value=0)
+    client.register_script = lambda source: client.script
+    client.pipe = MagicMock()
+    client.pipe.execute = AsyncMock()
+    client.pipeline = lambda transaction=True: client.pipe
+    
+    async def xreadgroup(**kwargs):
+        if client.batches:
+            return [("agents:incoming", client.batches.pop(0))]
+        await asyncio.sleep(0.01)  # BLOCK timeout
+        return []
+    client.xreadgroup = xreadgroup
+    
+    redis_client = MagicMock()
+    redis_client.client = client
+    
+    async def get_redis():
+        return redis_client
+    monkeypatch.setattr(consumer_module, "get_redis", get_redis)
+    monkeypatch.setattr(retry_module, "get_redis", get_redis)
+    monkeypatch.setattr(consumer_module, "ensure_consumer_group", AsyncMock())
+    return client
+
+
+class Recorder:
+    """Handler that records start/end of each message."""
+    
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+    
+    async def __call__(self, payload):
+        self.events.append(("start", payload["message_id"]))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        self.events.append(("end", payload["message_id"]))
+
+
+async def run_until_drained(consumer: StreamConsumer) -> None:
+    task = asyncio.create_task(consumer.start())
+    await asyncio.sleep(0.02)
+    await consumer.stop(timeout=2)
+    await task
+
+
+class TestPartitionedConsumer:
+    """Tests for concurrent, per-customer ordered processing."""
+    
+    async def test_customer_order_kept_others_parallel(self, redis):
+        """Test that one customer's entries are sequential while others overlap."""
+        redis.batches = [[entry("1", "c1"), entry("2", "c2"), entry("3", "c1")]]
+        handler = Recorder()
+        
+        await run_until_drained(StreamConsumer("w1", handler, concurrency=4))
+        
+        events = handler.events
+        assert events.index(("end", "1")) < events.index(("start", "3"))
+        assert events.index(("start", "2")) < events.index(("end", "1"))
+        assert redis.xack.await_count == 3
+    
+    async def test_concurrency_bounded(self, redis):
+        """Test that no more than `concurrency` handlers run at once."""
+        redis.batches = [[entry(str(i), f"c{i}") for i in range(6)]]
+        handler = Recorder(delay=0.02)
+        
+        await run_until_drained(StreamConsumer("w1", handler, concurrency=2))
+        
+        assert handler.max_running == 2
+        assert redis.xack.await_count == 6
+    
+    async def test_stop_drains_in_flight(self, redis):
+        """Test that stop() returns only after running handlers finished."""
+        redis.batches = [[entry("1", "c1")]]
+        handler = Recorder(delay=0.2)
+        consumer = StreamConsumer("w1", handler, concurrency=2)
+        task = asyncio.create_task(consumer.start())
+        await asyncio.sleep(0.05)
+        
+        await consumer.stop(timeout=2)
+        
+        assert handler.events[-1] == ("end", "1")
+        redis.xack.assert_awaited_once()
+        await task
+    
+    async def test_stop_timeout_leaves_entry_pending(self, redis):
+        """Test that a stuck handler does not block shutdown past the timeout."""
+        redis.batches = [[entry("1", "c1")]]
+        handler = Recorder(delay=5)
+        consumer = StreamConsumer("w1", handler, concurrency=2)
+        task = asyncio.create_task(consumer.start())
+        await asyncio.sleep(0.05)
+        
+        await consumer.stop(timeout=0.1)
+        
+        redis.xack.assert_not_awaited()
+        await task
+        for lane in list(consumer._lane_tasks.values()):
+            lane.cancel()
+    
+    async def test_no_read_after_stop_while_full(self, redis):
+        """Test that a read waiting for capacity does not run once stop() was called."""
+        redis.batches = [[entry("1", "c1"), entry("2", "c1")], [entry("3", "c2")]]
+        handler = Recorder(delay=0.1)
+        consumer = StreamConsumer("w1", handler, concurrency=1)
+        task = asyncio.create_task(consumer.start())
+        await asyncio.sleep(0.05)  # read-ahead full, next read waits
+        
+        await consumer.stop(timeout=2)
+        await task
+        
+        assert ("start", "3") not in handler.events
+        assert redis.batches == [[entry("3", "c2")]]
+
+
+class TestRetries:
+    """Tests for scheduled retries."""
+    
+    async def test_failure_scheduled_without_sleeping(self, redis):
+        """Test that a failed entry goes to the retry set and the lane moves on."""
+        async def failing(payload):
+            raise RuntimeError("LLM down")
+        consumer = StreamConsumer("w1", failing, concurrency=2)
+        
+        _, data = entry("1", "c1")
+        start = time.time()
+        await consumer._handle_message("1", data)
+        
+        assert time.time() - start < 0.5
+        (member, due), = redis.pipe.zadd.call_args.args[1].items()
+        assert json.loads(member)["retry_count"] == "1"
+        assert due == pytest.approx(start + settings.queue_retry_backoff, abs=0.5)
+        redis.pipe.xack.assert_called_once()
+        redis.pipe.execute.assert_awaited_once()
+    
+    async def test_last_attempt_goes_to_dlq(self, redis):
+        """Test that an entry out of retries is dead-lettered, not scheduled."""
+        async def failing(payload):
+            raise RuntimeError("LLM down")
+        consumer = StreamConsumer("w1", failing, concurrency=2)
+        
+        _, data = entry("1", "c1")
+        data["retry_count"] = str(StreamConsumer.MAX_RETRIES)
+        await consumer._handle_message("1", data)
+        
+        assert redis.xadd.await_args.args[0] == StreamConsumer.DLQ_STREAM
+        redis.pipe.zadd.assert_not_called()
+    
+    async def test_promote_due(self, redis):
+        """Test that due retries are moved back to the stream in batches."""
+        redis.script.return_value = 3
+        scheduler = RetryScheduler()
+        
+        assert await scheduler.promote_due(limit=50) == 3
+        
+        kwargs = redis.script.await_args.kwargs
+        assert kwargs["keys"] == [RETRY_KEY, "agents:incoming"]
+        assert kwargs["args"][1] == 50
+        assert scheduler.promoted == 3
+    
+    def test_backoff_doubles(self, monkeypatch):
+        """Test exponential backoff per attempt."""
+        monkeypatch.setattr(settings, "queue_retry_backoff", 1.0)
+        
+        assert [RetryScheduler.backoff(n) for n in range(3)] == [1.0, 2.0, 4.0]
+
+
+class TestReclaim:
+    """Tests for taking over entries of stopped workers."""
+    
+    async def test_reclaimed_entries_processed_with_delivery_count(self, redis):
+        """Test that XAUTOCLAIMed entries are run and attempts come from XPENDING."""
+        redis.xclaim = AsyncMock()
+        redis.xautoclaim = AsyncMock(
+            return_value=["0-0", [entry("1-0", "c1"), entry("2-0", "c2")], []]
+        )
+        redis.xpending_range = AsyncMock(return_value=[
+            {"message_id": "1-0", "times_delivered": 2},
+            {"message_id": "2-0", "times_delivered": 5},
+        ])
+        handler = Recorder(delay=0)
+        consumer = StreamConsumer("w2", handler, concurrency=2)
+        
+        assert await consumer.reclaim() == 2
+        await asyncio.wait_for(consumer._idle.wait(), 1)
+        
+        kwargs = redis.xautoclaim.await_args.kwargs
+        assert kwargs["min_idle_time"] == settings.queue_reclaim_min_idle
+        assert kwargs["start_id"] == "0-0"
+        assert handler.events == [("start", "1-0"), ("end", "1-0")]
+        # Delivered 5 times - dead-lettered without running the handler
+        assert redis.xadd.await_args.args[0] == StreamConsumer.DLQ_STREAM
+        assert redis.xadd.await_args.args[1]["message_id"] == "2-0"
+        redis.xclaim.assert_not_awaited()
+        redis.pipe.hincrby.assert_any_call(StreamConsumer.STATS_KEY, "reclaimed", 2)
+        redis.pipe.hincrby.assert_any_call(StreamConsumer.STATS_KEY, "poisoned", 1)
+    
+    async def test_in_flight_entries_kept_alive(self, redis):
+        """Test that the worker's own unfinished entries are re-claimed, not taken over."""
+        redis.xclaim = AsyncMock()
+        redis.xautoclaim = AsyncMock(return_value=["0-0", [entry("1-0", "c1")], []])
+        redis.xpending_range = AsyncMock()
+        consumer = StreamConsumer("w1", Recorder(), concurrency=2)
+        consumer._in_flight_ids.add("1-0")
+        
+        assert await consumer.reclaim() == 0
+        
+        kwargs = redis.xclaim.await_args.kwargs
+        assert kwargs["message_ids"] == ["1-0"]
+        assert kwargs["min_idle_time"] == 0 and kwargs["justid"] is True
+        redis.xpending_range.assert_not_awaited()
+    
+    async def test_reclaim_follows_cursor_within_capacity(self, redis):
+        """Test that reclaim pages through the pending list until the cursor wraps."""
+        redis.xclaim = AsyncMock()
+        redis.xautoclaim = AsyncMock(side_effect=[
+            ["5-0", [entry("1-0", "c1")], ["3-0"]],
+            ["0-0", [entry("6-0", "c1")], []],
+        ])
+        redis.xpending_range = AsyncMock(return_value=[])
+        consumer = StreamConsumer("w2", Recorder(delay=0), concurrency=1)
+        
+        assert await consumer.reclaim() == 2
+        await asyncio.wait_for(consumer._idle.wait(), 1)
+        
+        first, second = redis.xautoclaim.await_args_list
+        assert first.kwargs["count"] == 2
+        assert second.kwargs["start_id"] == "5-0" and second.kwargs["count"] == 1
+        redis.pipe.hincrby.assert_any_call(StreamConsumer.STATS_KEY, "reclaim_deleted", 1)
+    
+    async def test_queue_stats(self, redis):
+        """Test that metrics combine shared counters with backlog sizes."""
+        redis.pipe.execute = AsyncMock(return_value=[{"reclaimed": "4"}, {"pending": 7}, 2])
+        
+        stats = await consumer_module.get_queue_stats()
+        
+        assert stats["reclaimed"] == 4
+        assert stats["poisoned"] == 0
+        assert stats["pending"] == 7
+        assert stats["scheduled_retries"] == 2
@@ -0,0 +1,135 @@
+"""Unit tests for Gemini context caching."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.config import settings
+from src.llm.client import LLMClient
+from src.llm.context_cache import GeminiContextCache
+from src.llm.prompts import CHECKOUT_PROMPT, SALES_PROMPT
+
+
+def mock_http(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("src.llm.context_cache.get_http_client", lambda url: client)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Cache that accepts the (small) agent prompts."""
+    monkeypatch.setattr(settings, "llm_context_cache_min_tokens", 0)
+    return GeminiContextCache("gemini-2.0-flash", [SALES_PROMPT, CHECKOUT_PROMPT])
+
+
+class TestGeminiContextCache:
+    """Tests for GeminiContextCache."""
+    
+    def test_split_prompt(self, cache):
+        """Test that per-turn context is separated from the static prompt."""
+        static, context = cache.split_prompt(SALES_PROMPT + "\n\nТекущая корзина клиента:\n- X")
+        
+        assert static == SALES_PROMPT
+        assert context == "Текущая корзина клиента:\n- X"
+    
+    def test_unknown_prompt_not_split(self, cache):
+        """Test that unknown prompts are not cached."""
+        assert cache.split_prompt("custom") == (None, "custom")
+    
+    async def test_created_once_and_reused(self, cache, monkeypatch):
+        """Test that the cache is created once per prompt + tools."""
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"name": "cachedContents/abc"})
+        
+        mock_http(monkeypatch, handler)
+        
+        first = await cache.get(SALES_PROMPT, [])
+        await asyncio.gather(*cache._pending.values())
+        second = await cache.get(SALES_PROMPT, [])
+        third = await cache.get(SALES_PROMPT, [])
+        
+        assert first is None  # created in the background, full prompt meanwhile
+        assert second == third == "cachedContents/abc"
+        assert len(requests) == 1
+    
+    async def test_turn_does_not_wait_for_cache_api(self, cache, monkeypatch):
+        """Test that a slow create is not on the request path."""
+        async def slow_create(prompt, declarations):
+            await asyncio.sleep(1)
+            return "cachedContents/abc"
+        monkeypatch.setattr(cache, "_create", slow_create)
+        
+        assert await asyncio.wait_for(cache.get(SALES_PROMPT, []), timeout=0.1) is None
+        assert await cache.get(SALES_PROMPT, []) is None
+        assert len(cache._pending) == 1
+        for task in cache._pending.values():
+            task.cancel()
+    
+    async def test_failure_falls_back_and_backs_off(self, cache, monkeypatch):
+        """Test that a refused cache is not retried on every call."""
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(400, json={"error": {"message": "too small"}})
+        
+        mock_http(monkeypatch, handler)
+        
+        assert await cache.get(SALES_PROMPT, []) is None
+        await asyncio.gather(*cache._pending.values())
+        assert await cache.get(SALES_PROMPT, []) is None
+        assert not cache._pending
+        assert len(requests) == 1
+
+
+class TestCachedPayload:
+    """Tests for Gemini payloads referencing cached content."""
+    
+    async def test_small_prompt_not_cached(self, monkeypatch):
+        """Test that prompts below Gemini's minimum are never uploaded."""
+        monkeypatch.setattr(settings, "llm_context_cache_enabled", True)
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"name": "cachedContents/x"})
+        
+        mock_http(monkeypatch, handler)
+        client = LLMClient()
+        
+        payload, name = await client._prepare_gemini_payload(
+            SALES_PROMPT + "\n\nКорзина: пусто",
+            [{"role": "user", "content": "привет"}],
+            ["check_stock"],
+        )
+        
+        assert name is None and requests == []
+        assert client.context_cache._pending == {}
+        assert payload["systemInstruction"]["parts"][0]["text"].endswith("Корзина: пусто")
+        assert payload["contents"] == [{"role": "user", "parts": [{"text": "привет"}]}]
+    
+    async def test_payload_uses_cached_content(self, monkeypatch):
+        """Test that cached payload omits system prompt and tools."""
+        monkeypatch.setattr(settings, "llm_context_cache_enabled", True)
+        monkeypatch.setattr(settings, "llm_context_cache_min_tokens", 0)
+        mock_http(monkeypatch, lambda r: httpx.Response(200, json={"name": "cachedContents/x"}))
+        client = LLMClient()
+        args = (
+            SALES_PROMPT + "\n\nКорзина: пусто",
+            [{"role": "user", "content": "привет"}],
+            ["check_stock"],
+        )
+        await client._prepare_gemini_payload(*args)  # schedules the cache
+        await asyncio.gather(*client.context_cache._pending.values())
+        
+        payload, name = await client._prepare_gemini_payload(*args)
+        
+        assert name == "cachedContents/x"
+        assert payload["cachedContent"] == "cachedContents/x"
+        assert "systemInstruction" not in payload
+        assert "tools" not in payload
+        assert payload["contents"][0]["parts"][0]["text"] == "Корзина: пусто"
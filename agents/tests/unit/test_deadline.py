@@ -0,0 +1,186 @@
+"""Unit tests for per-turn deadline propagation."""
+
+import asyncio
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from src.agents import graph
+from src.agents.nodes import checkout
+from src.agents.state import AgentRunRequest, CartItem, DeliveryAddress, SeafoodBusinessState
+from src.config import settings
+from src.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    check_deadline,
+    current_deadline,
+    deadline_timeout,
+    within_deadline,
+)
+from src.llm.breaker import MemoryBreakerStore
+from src.tools import escalate
+from src.llm.client import LLMClient, LLMError
+
+
+@pytest.fixture
+def deadline():
+    """Install a deadline in the current context."""
+    def install(seconds: float) -> Deadline:
+        d = Deadline(seconds)
+        current_deadline.set(d)
+        return d
+    yield install
+    current_deadline.set(None)
+
+
+class TestDeadline:
+    """Tests for deadline helpers."""
+    
+    def test_timeout_unchanged_without_deadline(self):
+        """Test that code outside a turn keeps its own timeout."""
+        assert deadline_timeout(30) == 30
+    
+    def test_timeout_capped_by_remaining(self, deadline):
+        """Test that timeouts never exceed the time left."""
+        deadline(1.0)
+        
+        assert deadline_timeout(30) <= 1.0
+    
+    def test_expired_deadline_raises(self, deadline):
+        """Test that no new work starts after expiry."""
+        deadline(0)
+        
+        with pytest.raises(DeadlineExceeded):
+            deadline_timeout(30)
+    
+    async def test_within_deadline_cancels_slow_call(self, deadline):
+        """Test that slow tools are cut off at the deadline."""
+        deadline(0.05)
+        
+        with pytest.raises(DeadlineExceeded):
+            await within_deadline(asyncio.sleep(1))
+
+
+class TestLLMDeadline:
+    """Tests for deadline-aware LLM retries and fallbacks."""
+    
+    async def test_fallbacks_stop_at_deadline(self, deadline, monkeypatch):
+        """Test that an expired deadline skips remaining providers."""
+        monkeypatch.setattr(settings, "llm_ratelimit_enabled", False)
+        monkeypatch.setattr(settings, "llm_routing_policy", "static")
+        client = LLMClient()
+        client.backoff_base = 0
+        client._breaker_store = MemoryBreakerStore()
+        calls = []
+        
+        async def slow_failure(provider, model, system_prompt, messages, tools=None):
+            calls.append(model or provider)
+            await asyncio.sleep(0.1)
+            raise LLMError("down")
+        client._call_provider = slow_failure
+        deadline(0.15)
+        
+        with pytest.raises(DeadlineExceeded):
+            await client.generate("sys", [{"role": "user", "content": "hi"}])
+        
+        assert calls == ["gemini", "gemini"]
+    
+    async def test_deadline_timeout_not_blamed_on_provider(self, deadline, monkeypatch):
+        """Test that a call cut short by the deadline is not a breaker or router failure."""
+        monkeypatch.setattr(settings, "llm_ratelimit_enabled", False)
+        monkeypatch.setattr(settings, "llm_routing_policy", "static")
+        client = LLMClient()
+        client._breaker_store = MemoryBreakerStore()
+        
+        async def timing_out(provider, model, system_prompt, messages, tools=None):
+            await asyncio.sleep(0.1)
+            raise httpx.ReadTimeout("deadline-capped timeout")
+        client._call_provider = timing_out
+        deadline(0.05)
+        
+        with pytest.raises(DeadlineExceeded):
+            await client.generate("sys", [{"role": "user", "content": "hi"}])
+        
+        assert client.router.snapshot() == {}
+        assert await client._breaker("gemini").health() == 1.0
+
+
+class TestEscalationAlert:
+    """Tests for the operator alert at the turn deadline."""
+    
+    async def test_alert_sent_after_deadline(self, deadline, monkeypatch):
+        """Test that a late escalation still reaches the operator."""
+        monkeypatch.setattr(settings, "telegram_bot_token", "token")
+        monkeypatch.setattr(settings, "admin_chat_id", "42")
+        http = MagicMock(post=AsyncMock())
+        monkeypatch.setattr(escalate, "get_http_client", lambda url: http)
+        deadline(0)
+        
+        await escalate.escalate_to_human("c1", "telegram", "жалоба", [])
+        
+        assert http.post.await_args.kwargs["timeout"] == settings.http_timeout
+
+
+class TestRunAgentDeadline:
+    """Tests for the degraded reply on turn expiry."""
+    
+    async def test_canned_reply_on_expiry(self, monkeypatch):
+        """Test that a turn out of time returns the canned reply and keeps the message."""
+        monkeypatch.setattr(settings, "agent_turn_deadline", 0.05)
+        checkpointer = AsyncMock(load=AsyncMock(return_value=None))
+        monkeypatch.setattr(graph, "get_checkpointer", lambda: checkpointer)
+        
+        async def slow_graph(state):
+            await asyncio.sleep(0.1)
+            check_deadline()
+        monkeypatch.setattr(graph.agent_graph, "ainvoke", slow_graph)
+        
+        response = await graph.run_agent(AgentRunRequest(
+            customer_id="c1", channel="telegram", external_id="1", message="привет"
+        ))
+        
+        assert response.reply == graph.DEADLINE_REPLY
+        assert current_deadline.get() is None
+        saved_state = checkpointer.save.await_args.args[1]
+        assert [m["content"] for m in saved_state.messages] == ["привет", graph.DEADLINE_REPLY]
+    
+    async def test_order_kept_when_deadline_passes_after_create_order(self, deadline, monkeypatch):
+        """Test that an order committed at the deadline clears the cart and is confirmed."""
+        order = {
+            "success": True, "order_number": "ORD-1", "total_amount": 2100,
+            "delivery_date": "2026-10-17", "slot": "DAY",
+        }
+        
+        async def slow_create_order(**kwargs):
+            await asyncio.sleep(0.1)  # commit finishes after the deadline
+            return order
+        
+        llm = AsyncMock(side_effect=[
+            {"content": "", "tool_calls": [{"name": "create_order", "arguments": {}}]},
+            DeadlineExceeded("turn deadline exceeded"),
+        ])
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=MagicMock())
+        session.__aexit__ = AsyncMock(return_value=None)
+        monkeypatch.setattr(checkout, "async_session_maker", lambda: session)
+        monkeypatch.setattr(checkout, "prepare_history", AsyncMock(side_effect=lambda c, m, o: m))
+        monkeypatch.setattr(checkout, "get_llm_response", llm)
+        monkeypatch.setattr(checkout, "create_order", slow_create_order)
+        monkeypatch.setattr(checkout, "render_tool_reply", AsyncMock(return_value=None))
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": "оформляй"}],
+            cart=[CartItem(
+                product_id="p1", name="Устрицы", quantity=6, unit="шт", unit_price=Decimal("350"),
+            )],
+            delivery_address=DeliveryAddress(street="Ленина", house="1"),
+        )
+        deadline(0.05)
+        
+        update = await checkout.checkout_node(state)
+        
+        assert [item.quantity for item in update["cart"]] == [0]
+        assert update["messages"][1]["role"] == "tool"
+        assert "ORD-1" in update["messages"][-1]["content"]
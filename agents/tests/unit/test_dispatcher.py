@@ -0,0 +1,122 @@
+"""Unit tests for per-conversation turn dispatching."""
+
+import asyncio
+import contextvars
+import time
+
+import pytest
+
+from src.agents import dispatcher as dispatcher_module
+from src.agents.dispatcher import TurnDispatcher
+from src.agents.state import AgentRunRequest, AgentRunResponse
+from src.config import settings
+
+
+caller = contextvars.ContextVar("caller", default=None)
+
+
+def request(message: str, customer_id: str = "c1") -> AgentRunRequest:
+    return AgentRunRequest(
+        channel="telegram", customer_id=customer_id, external_id="1", message=message
+    )
+
+
+@pytest.fixture
+def turns(monkeypatch):
+    """Fake run_agent recording each turn's message and caller."""
+    calls = []
+    
+    async def fake_run_agent(req):
+        calls.append((req.message, caller.get()))
+        await asyncio.sleep(0.05)
+        if req.message == "boom":
+            raise RuntimeError("LLM down")
+        return AgentRunResponse(
+            reply=f"re: {req.message}", state_id=req.customer_id,
+            current_stage="sales", escalate_to_human=False,
+        )
+    monkeypatch.setattr(dispatcher_module, "run_agent", fake_run_agent)
+    return calls
+
+
+async def send(dispatcher: TurnDispatcher, message: str, name: str, customer_id: str = "c1"):
+    caller.set(name)
+    return await dispatcher.submit(request(message, customer_id))
+
+
+class TestTurnDispatcher:
+    """Tests for TurnDispatcher."""
+    
+    async def test_lone_message_starts_at_once(self, turns):
+        """Test that a message to an idle conversation is not delayed."""
+        dispatcher = TurnDispatcher()
+        
+        sent = time.monotonic()
+        response = await send(dispatcher, "привет", "a")
+        
+        assert response.reply == "re: привет"
+        assert time.monotonic() - sent < 0.1  # the turn itself takes 0.05
+    
+    async def test_messages_during_turn_merged(self, turns):
+        """Test that messages sent mid-turn become one next turn; only the last gets the reply."""
+        dispatcher = TurnDispatcher()
+        
+        first = asyncio.create_task(send(dispatcher, "привет", "a"))
+        await asyncio.sleep(0.01)  # first turn is running
+        results = await asyncio.gather(
+            send(dispatcher, "хочу устриц", "b"),
+            send(dispatcher, "на 6 человек", "c"),
+        )
+        
+        assert (await first).reply == "re: привет"
+        assert turns == [("привет", "a"), ("хочу устриц\nна 6 человек", "c")]
+        assert results[0] is None
+        assert results[1].reply == "re: хочу устриц\nна 6 человек"
+        assert (dispatcher.turns, dispatcher.coalesced) == (2, 1)
+    
+    async def test_message_during_turn_waits(self, turns):
+        """Test that a message sent mid-turn runs after it, not concurrently."""
+        dispatcher = TurnDispatcher()
+        
+        first = asyncio.create_task(send(dispatcher, "привет", "a"))
+        await asyncio.sleep(0.07)  # first turn is running
+        second = await send(dispatcher, "а икра есть?", "b")
+        
+        assert (await first).reply == "re: привет"
+        assert second.reply == "re: а икра есть?"
+        assert [m for m, _ in turns] == ["привет", "а икра есть?"]
+    
+    async def test_debounce_window_merges_idle_burst(self, turns, monkeypatch):
+        """Test that with a debounce window a burst to an idle conversation is one turn."""
+        monkeypatch.setattr(settings, "agent_debounce_window", 0.05)
+        dispatcher = TurnDispatcher()
+        
+        first = asyncio.create_task(send(dispatcher, "привет", "a"))
+        await asyncio.sleep(0.02)
+        second = await send(dispatcher, "есть устрицы?", "b")
+        
+        assert await first is None
+        assert second.reply == "re: привет\nесть устрицы?"
+        assert turns == [("привет\nесть устрицы?", "b")]
+    
+    async def test_customers_independent(self, turns):
+        """Test that different customers are not merged."""
+        dispatcher = TurnDispatcher()
+        
+        a, b = await asyncio.gather(
+            send(dispatcher, "привет", "a", "c1"),
+            send(dispatcher, "здравствуйте", "b", "c2"),
+        )
+        
+        assert a.reply == "re: привет"
+        assert b.reply == "re: здравствуйте"
+    
+    async def test_failure_goes_to_last_caller(self, turns):
+        """Test that a failed turn raises for its caller and the worker recovers."""
+        dispatcher = TurnDispatcher()
+        
+        with pytest.raises(RuntimeError):
+            await send(dispatcher, "boom", "a")
+        
+        assert (await send(dispatcher, "привет", "b")).reply == "re: привет"
+        assert dispatcher._workers == {}
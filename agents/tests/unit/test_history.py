@@ -0,0 +1,124 @@
+"""Unit tests for conversation history budget."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.agents import history as history_module
+from src.agents.history import HistoryManager, estimate_tokens
+from src.config import settings
+
+
+def conversation(turns: int) -> list[dict]:
+    """Conversation where every turn checks stock."""
+    messages = []
+    for i in range(turns):
+        messages += [
+            {"role": "user", "content": f"Вопрос {i} " + "x" * 300},
+            {"role": "assistant", "content": "", "tool_calls": [{"name": "check_stock"}]},
+            {"role": "tool", "name": "check_stock", "content": "{\"found\": true}" * 20},
+            {"role": "assistant", "content": f"Ответ {i} " + "y" * 300},
+        ]
+    messages.append({"role": "user", "content": "Последний вопрос"})
+    return messages
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(settings, "agent_history_token_budget", 500)
+    monkeypatch.setattr(settings, "agent_history_keep_turns", 2)
+    mgr = HistoryManager()
+    mgr._load = AsyncMock(return_value=None)
+    mgr._store = AsyncMock()
+    return mgr
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    client = MagicMock()
+    client.generate = AsyncMock(return_value={"content": "- Клиент выбирает устрицы"})
+    monkeypatch.setattr(history_module, "get_llm_client", lambda: client)
+    return client
+
+
+class TestHistoryManager:
+    """Tests for HistoryManager.prepare."""
+    
+    async def test_under_budget_unchanged(self, manager):
+        """Test that short histories are sent as is."""
+        messages = [{"role": "user", "content": "привет"}]
+        
+        assert await manager.prepare("c1", messages) is messages
+    
+    async def test_keeps_recent_turns_and_drops_old_tools(self, manager, llm):
+        """Test that old turns are folded and stale tool payloads dropped."""
+        messages = conversation(10)
+        
+        result = await manager.prepare("c1", messages)
+        
+        assert result[0]["content"].startswith("Краткое содержание")
+        assert result[-1] == messages[-1]
+        assert [m for m in result if m.get("role") == "tool"] == []
+        assert sum(1 for m in result if m.get("role") == "user") == 3  # summary + 2 turns
+        assert estimate_tokens(result) < estimate_tokens(messages)
+        assert manager.tokens_saved > 0
+    
+    async def test_summary_computed_in_background(self, manager, llm):
+        """Test that the summary is refreshed without blocking the turn."""
+        messages = conversation(10)
+        
+        result = await manager.prepare("c1", messages)
+        await asyncio.gather(*manager._pending.values())
+        
+        assert "Вопрос 0" in result[0]["content"]  # excerpt until summary is ready
+        llm.generate.assert_awaited_once()
+        stored = manager._store.await_args.args[1]
+        assert stored["text"] == "- Клиент выбирает устрицы"
+    
+    async def test_cached_summary_used(self, manager, llm):
+        """Test that an up-to-date cached summary is used as is."""
+        messages = conversation(10)
+        cut = HistoryManager._split(messages, 2)
+        manager._load.return_value = {"covered": cut, "text": "- Готовая сводка"}
+        
+        result = await manager.prepare("c1", messages)
+        
+        assert result[0]["content"].endswith("- Готовая сводка")
+        llm.generate.assert_not_awaited()
+    
+    async def test_offset_keeps_summary_aligned(self, manager, llm):
+        """Test that `covered` counts absolute positions when only a tail is loaded."""
+        messages = conversation(10)
+        cut = HistoryManager._split(messages, 2)
+        manager._load.return_value = {"covered": 100 + cut, "text": "- Готовая сводка"}
+        
+        result = await manager.prepare("c1", messages, offset=100)
+        
+        assert result[0]["content"].endswith("- Готовая сводка")
+        llm.generate.assert_not_awaited()
+    
+    async def test_offset_stored_with_summary(self, manager, llm):
+        """Test that a refreshed summary records the absolute position it covers."""
+        messages = conversation(10)
+        cut = HistoryManager._split(messages, 2)
+        
+        await manager.prepare("c1", messages, offset=100)
+        await asyncio.gather(*manager._pending.values())
+        
+        assert manager._store.await_args.args[1]["covered"] == 100 + cut
+    
+    async def test_refresh_waits_for_several_turns(self, manager, llm, monkeypatch):
+        """Test that a summary lagging by fewer than the refresh turns is not recomputed."""
+        monkeypatch.setattr(settings, "agent_summary_refresh_turns", 3)
+        messages = conversation(10)
+        cut = HistoryManager._split(messages, 2)
+        behind = HistoryManager._split(messages[:cut], 2)  # two turns not summarized yet
+        manager._load.return_value = {"covered": behind, "text": "- Готовая сводка"}
+        
+        result = await manager.prepare("c1", messages)
+        
+        assert "- Готовая сводка" in result[0]["content"]
+        assert "Вопрос 8" in result[0]["content"]  # excerpt of an uncovered turn
+        assert manager._pending == {}
+        llm.generate.assert_not_awaited()
@@ -0,0 +1,45 @@
+"""Unit tests for pooled HTTP transport."""
+
+import pytest
+
+from src.http.pool import HTTPClientRegistry
+
+
+@pytest.fixture
+async def registry():
+    """Registry closed after each test."""
+    reg = HTTPClientRegistry()
+    yield reg
+    await reg.close()
+
+
+class TestHTTPClientRegistry:
+    """Tests for HTTPClientRegistry."""
+    
+    async def test_same_host_reuses_client(self, registry):
+        """Test that URLs on one host share a pool."""
+        a = registry.get("https://api.telegram.org/bot1/sendMessage")
+        b = registry.get("https://api.telegram.org/bot1/sendChatAction")
+        
+        assert a is b
+    
+    async def test_different_hosts_get_own_pool(self, registry):
+        """Test that each host gets a separate client."""
+        tg = registry.get("https://api.telegram.org/bot1/sendMessage")
+        fb = registry.get("https://graph.facebook.com/v18.0/me/messages")
+        
+        assert tg is not fb
+    
+    async def test_closed_client_is_recreated(self, registry):
+        """Test that a closed client is replaced on next use."""
+        client = registry.get("https://api.vk.com/method/messages.send")
+        await client.aclose()
+        
+        assert registry.get("https://api.vk.com/method/users.get") is not client
+    
+    async def test_close_clears_pools(self, registry):
+        """Test that close() shuts down all clients."""
+        client = registry.get("https://openrouter.ai/api/v1/chat/completions")
+        await registry.close()
+        
+        assert client.is_closed
@@ -0,0 +1,115 @@
+"""Unit tests for the supervisor intent classifier."""
+
+import pytest
+
+from src.agents import classifier as classifier_module
+from src.agents.classifier import IntentClassifier, featurize
+from src.agents.nodes.supervisor import supervisor_node
+from src.agents.state import SeafoodBusinessState
+from src.agents.train_intent import label_from_tool_calls
+from src.config import settings
+
+
+EXAMPLES = [
+    ("где купить устрицы", "sales"),
+    ("есть свежие устрицы", "sales"),
+    ("сколько стоят креветки", "sales"),
+    ("хочу икру", "sales"),
+    ("где мой заказ", "support"),
+    ("статус заказа", "support"),
+    ("заказ не привезли", "support"),
+    ("привезли испорченные устрицы", "support"),
+    ("оформляем заказ", "checkout"),
+    ("адрес доставки ленина 5", "checkout"),
+    ("позовите менеджера", "escalate"),
+    ("соедините с оператором", "escalate"),
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    texts, labels = zip(*EXAMPLES, strict=True)
+    return IntentClassifier.train(list(texts), list(labels), dim=2 ** 12, epochs=30)
+
+
+class TestIntentClassifier:
+    """Tests for IntentClassifier."""
+    
+    def test_fits_training_data(self, model):
+        """Test that the model separates the example intents."""
+        texts, labels = zip(*EXAMPLES, strict=True)
+        
+        assert model.accuracy(list(texts), list(labels)) == 1.0
+    
+    def test_where_to_buy_is_sales(self, model):
+        """Test the keyword misroute: "где" alone does not mean support."""
+        assert model.predict("где купить устриц")[0] == "sales"
+        assert model.predict("где заказ")[0] == "support"
+    
+    def test_checkout_requires_cart(self, model):
+        """Test that checkout falls through to the next intent without a cart."""
+        assert model.predict("оформляем заказ", has_cart=True)[0] == "checkout"
+        assert model.predict("оформляем заказ", has_cart=False)[0] != "checkout"
+    
+    def test_save_load_roundtrip(self, model, tmp_path):
+        """Test that a saved model predicts identically."""
+        path = str(tmp_path / "intent.npz")
+        model.save(path)
+        loaded = IntentClassifier.load(path)
+        
+        assert loaded.labels == model.labels
+        assert loaded.predict("статус заказа") == model.predict("статус заказа")
+    
+    def test_features_are_stable(self):
+        """Test that hashing does not depend on the process."""
+        indices, value = featurize("Где мой заказ", 2 ** 12)
+        
+        assert indices.max() < 2 ** 12
+        assert list(featurize("где  мой ЗАКАЗ", 2 ** 12)[0]) == list(indices)
+    
+    def test_empty_text(self, model):
+        """Test that punctuation-only input does not crash."""
+        label, confidence = model.predict("?!")
+        
+        assert label in model.labels
+
+
+class TestTrainingLabels:
+    """Tests for labeling logged messages by tool calls."""
+    
+    def test_label_from_tool_calls(self):
+        assert label_from_tool_calls([{"name": "check_stock"}]) == "sales"
+        assert label_from_tool_calls([{"function": {"name": "get_order_status"}}]) == "support"
+        assert label_from_tool_calls(
+            [{"name": "check_stock"}, {"name": "escalate_to_human"}]
+        ) == "escalate"
+        assert label_from_tool_calls(None) is None
+
+
+class TestSupervisorWithModel:
+    """Tests for supervisor routing with a loaded model."""
+    
+    @pytest.fixture
+    def loaded(self, model, monkeypatch):
+        monkeypatch.setattr(classifier_module, "_intent_classifier", model)
+    
+    def state(self, text):
+        return SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": text}],
+        )
+    
+    async def test_model_overrides_keywords(self, loaded, monkeypatch):
+        """Test that a confident model decides instead of keywords."""
+        monkeypatch.setattr(settings, "agent_intent_min_confidence", 0.0)
+        
+        assert await supervisor_node(self.state("где купить устрицы")) == {"current_stage": "sales"}
+    
+    async def test_unsure_model_falls_back(self, loaded, monkeypatch):
+        """Test that low confidence hands over to keyword routing."""
+        monkeypatch.setattr(settings, "agent_intent_min_confidence", 1.1)
+        monkeypatch.setattr(settings, "agent_intent_llm_fallback", False)
+        
+        result = await supervisor_node(self.state("позовите оператора"))
+        
+        assert result["escalate_to_human"] is True
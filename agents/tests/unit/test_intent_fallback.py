@@ -0,0 +1,104 @@
+"""Unit tests for the LLM intent routing fallback."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.agents import intent_fallback
+from src.agents.intent_fallback import LLMIntentFallback
+from src.agents.nodes import supervisor
+from src.agents.nodes.supervisor import supervisor_node
+from src.agents.state import SeafoodBusinessState
+from src.config import settings
+from src.llm.tiering import LIGHT
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """In-memory stand-in for the Redis client."""
+    store = {}
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=lambda key: store.get(key))
+    
+    async def set_(key, value, ex=None):
+        store[key] = value
+    client.set = AsyncMock(side_effect=set_)
+    
+    async def get_redis():
+        return MagicMock(client=client)
+    monkeypatch.setattr(intent_fallback, "get_redis", get_redis)
+    return store
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    client = MagicMock()
+    client.generate = AsyncMock(return_value={"content": "SALES", "tool_calls": None})
+    monkeypatch.setattr(intent_fallback, "get_llm_client", lambda: client)
+    return client.generate
+
+
+class TestLLMIntentFallback:
+    """Tests for LLMIntentFallback.classify."""
+    
+    async def test_asks_light_model(self, redis, llm):
+        """Test that the supervisor prompt goes to the light tier."""
+        assert await LLMIntentFallback().classify("где купить устрицы", "greeting") == "sales"
+        
+        assert llm.call_args.kwargs["tier"] == LIGHT
+    
+    async def test_cached_by_normalized_text_and_stage(self, redis, llm):
+        """Test that repeats hit the cache, other stages do not."""
+        fallback = LLMIntentFallback()
+        
+        await fallback.classify("Где купить устрицы", "sales")
+        await fallback.classify("где  купить УСТРИЦЫ", "sales")
+        await fallback.classify("где купить устрицы", "checkout")
+        
+        assert llm.await_count == 2
+    
+    async def test_unexpected_answer_ignored(self, redis, llm):
+        """Test that a chatty answer is not trusted."""
+        llm.return_value = {"content": "Я думаю, это продажи", "tool_calls": None}
+        
+        assert await LLMIntentFallback().classify("где купить", "sales") is None
+        assert redis == {}
+    
+    async def test_llm_failure_returns_none(self, redis, llm):
+        """Test that errors keep the local decision."""
+        llm.side_effect = RuntimeError("all providers failed")
+        
+        assert await LLMIntentFallback().classify("где купить", "sales") is None
+
+
+class TestSupervisorFallback:
+    """Tests for when supervisor_node consults the LLM."""
+    
+    @pytest.fixture
+    def fallback(self, monkeypatch):
+        classify = AsyncMock(return_value="sales")
+        monkeypatch.setattr(
+            supervisor, "get_intent_fallback", lambda: MagicMock(classify=classify)
+        )
+        monkeypatch.setattr(settings, "agent_intent_llm_fallback", True)
+        return classify
+    
+    def state(self, text):
+        return SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": text}],
+        )
+    
+    async def test_ambiguous_keywords_ask_llm(self, fallback):
+        """Test the misroute case: "где" alone is resolved by the LLM."""
+        result = await supervisor_node(self.state("где купить устрицы"))
+        
+        assert result == {"current_stage": "sales"}
+        fallback.assert_awaited_once()
+    
+    async def test_clear_messages_skip_llm(self, fallback):
+        """Test that confident and keyword-free messages stay local."""
+        await supervisor_node(self.state("где мой заказ?"))
+        await supervisor_node(self.state("есть устрицы?"))
+        
+        fallback.assert_not_awaited()
@@ -0,0 +1,110 @@
+"""Unit tests for the LLM response cache."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.config import settings
+from src.llm import client as llm_client
+from src.llm.cache import ResponseCache
+from src.llm.prompts import SALES_PROMPT
+
+
+TOOLS = ["check_stock", "get_product_price", "add_to_cart"]
+
+
+class TestCacheKey:
+    """Tests for cache key normalization."""
+    
+    def test_same_greeting_variants_share_key(self):
+        """Test that case, spacing and trailing punctuation are ignored."""
+        a = ResponseCache.make_key(SALES_PROMPT, [{"role": "user", "content": "Привет!"}], TOOLS)
+        b = ResponseCache.make_key(SALES_PROMPT, [{"role": "user", "content": "  привет "}], TOOLS)
+        
+        assert a == b
+    
+    def test_tool_order_ignored(self):
+        """Test that tool list order does not change the key."""
+        messages = [{"role": "user", "content": "какие устрицы есть?"}]
+        
+        assert ResponseCache.make_key(SALES_PROMPT, messages, TOOLS) == \
+            ResponseCache.make_key(SALES_PROMPT, messages, list(reversed(TOOLS)))
+    
+    def test_prompt_changes_key(self):
+        """Test that a different system prompt (e.g. cart context) changes the key."""
+        messages = [{"role": "user", "content": "привет"}]
+        
+        assert ResponseCache.make_key(SALES_PROMPT, messages, TOOLS) != \
+            ResponseCache.make_key(SALES_PROMPT + "\n\nКорзина", messages, TOOLS)
+
+
+class TestCacheRules:
+    """Tests for bypass rules."""
+    
+    def test_tool_results_bypass(self):
+        """Test that requests with tool results are not cacheable."""
+        messages = [
+            {"role": "user", "content": "сколько стоит?"},
+            {"role": "assistant", "content": "", "tool_calls": [{"name": "get_product_price"}]},
+            {"role": "tool", "name": "get_product_price", "content": "{\"price\": 450}"},
+        ]
+        
+        assert ResponseCache.is_cacheable_request(messages) is False
+    
+    def test_lookup_tool_call_is_cached(self):
+        """Test that a read-only tool call response can be cached."""
+        response = {"content": "", "tool_calls": [{"name": "check_stock", "arguments": {}}]}
+        
+        assert ResponseCache.is_cacheable_response(response) is True
+    
+    def test_mutating_tool_call_not_cached(self):
+        """Test that state-changing tool calls are never cached."""
+        response = {"content": "", "tool_calls": [{"name": "create_order", "arguments": {}}]}
+        
+        assert ResponseCache.is_cacheable_response(response) is False
+    
+    def test_price_in_reply_not_cached(self):
+        """Test that replies quoting prices are not cached."""
+        response = {"content": "Fine de Claire стоят 450 ₽ за штуку", "tool_calls": None}
+        
+        assert ResponseCache.is_cacheable_response(response) is False
+
+
+class TestGetLLMResponseCache:
+    """Tests for cache integration in get_llm_response."""
+    
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        cache = ResponseCache()
+        cache.get = AsyncMock(return_value=None)
+        cache.set = AsyncMock()
+        cache.count_bypass = AsyncMock()
+        monkeypatch.setattr(llm_client, "get_response_cache", lambda: cache)
+        monkeypatch.setattr(settings, "llm_cache_enabled", True)
+        return cache
+    
+    @pytest.fixture
+    def generate(self, monkeypatch):
+        generate = AsyncMock(return_value={
+            "content": "Здравствуйте!", "model": "gemini-2.0-flash", "tool_calls": None
+        })
+        monkeypatch.setattr(llm_client.get_llm_client(), "generate", generate)
+        return generate
+    
+    async def test_hit_skips_llm(self, cache, generate):
+        """Test that a cache hit returns without calling the LLM."""
+        cache.get.return_value = {"content": "Здравствуйте!", "tool_calls": None}
+        
+        result = await llm_client.get_llm_response(
+            SALES_PROMPT, [{"role": "user", "content": "привет"}]
+        )
+        
+        assert result["content"] == "Здравствуйте!"
+        generate.assert_not_awaited()
+    
+    async def test_miss_stores_response(self, cache, generate):
+        """Test that a miss calls the LLM and stores the result."""
+        await llm_client.get_llm_response(SALES_PROMPT, [{"role": "user", "content": "привет"}])
+        
+        generate.assert_awaited_once()
+        cache.set.assert_awaited_once()
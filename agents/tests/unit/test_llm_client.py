@@ -0,0 +1,250 @@
+"""Unit tests for LLM client fallback and hedging."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.config import settings
+from src.llm.breaker import MemoryBreakerStore
+from src.llm.client import LLMClient, LLMError
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """LLM client without retry backoff, rate limits or adaptive routing."""
+    monkeypatch.setattr(settings, "llm_ratelimit_enabled", False)
+    monkeypatch.setattr(settings, "llm_routing_policy", "static")
+    llm = LLMClient()
+    llm.backoff_base = 0
+    llm._breaker_store = MemoryBreakerStore()
+    return llm
+
+
+def fake_provider(delays: dict, failures: set, calls: list):
+    """Build a _call_provider replacement with per-model delay/failure."""
+    async def call(provider, model, system_prompt, messages, tools=None):
+        key = model or provider
+        calls.append(key)
+        await asyncio.sleep(delays.get(key, 0))
+        if key in failures:
+            raise LLMError(f"{key} down")
+        return {"content": key, "model": key, "tool_calls": None}
+    return call
+
+
+class TestSequentialFallback:
+    """Tests for the default sequential fallback chain."""
+    
+    async def test_falls_back_after_retries(self, client):
+        """Test that a failing primary is retried then skipped."""
+        calls = []
+        client._call_provider = fake_provider({}, {"gemini"}, calls)
+        
+        result = await client.generate("sys", [{"role": "user", "content": "hi"}])
+        
+        assert result["model"] == "deepseek/deepseek-chat"
+        assert calls.count("gemini") == client.max_retries
+    
+    async def test_breaker_not_recorded_when_disabled(self, client, monkeypatch):
+        """Test that a disabled breaker costs no store round-trips."""
+        monkeypatch.setattr(settings, "llm_breaker_enabled", False)
+        
+        class FailingStore(MemoryBreakerStore):
+            async def record(self, *args):
+                raise AssertionError("breaker store used while disabled")
+        client._breaker_store = FailingStore()
+        client._call_provider = fake_provider({}, {"gemini"}, [])
+        
+        result = await client.generate("sys", [{"role": "user", "content": "hi"}])
+        
+        assert result["model"] == "deepseek/deepseek-chat"
+
+
+class TestHedgedGenerate:
+    """Tests for hedged requests across the chain."""
+    
+    @pytest.fixture(autouse=True)
+    def hedging(self, monkeypatch):
+        monkeypatch.setattr(settings, "llm_hedge_enabled", True)
+        monkeypatch.setattr(settings, "llm_hedge_default_delay", 0.05)
+    
+    async def test_slow_primary_is_hedged(self, client):
+        """Test that the next provider wins when the primary is slow."""
+        calls = []
+        client._call_provider = fake_provider({"gemini": 1.0}, set(), calls)
+        
+        result = await client.generate("sys", [{"role": "user", "content": "hi"}])
+        
+        assert result["model"] == "deepseek/deepseek-chat"
+        assert calls == ["gemini", "deepseek/deepseek-chat"]
+    
+    async def test_fast_primary_not_hedged(self, client):
+        """Test that no hedge is sent when the primary answers in time."""
+        calls = []
+        client._call_provider = fake_provider({}, set(), calls)
+        
+        result = await client.generate("sys", [{"role": "user", "content": "hi"}])
+        
+        assert result["model"] == "gemini"
+        assert calls == ["gemini"]
+    
+    async def test_all_fail_raises(self, client):
+        """Test that LLMError is raised when every provider fails."""
+        calls = []
+        failing = {"gemini", "deepseek/deepseek-chat", "qwen/qwen-2.5-72b-instruct"}
+        client._call_provider = fake_provider({}, failing, calls)
+        
+        with pytest.raises(LLMError):
+            await client.generate("sys", [{"role": "user", "content": "hi"}])
+    
+    def test_delay_uses_percentile(self, client, monkeypatch):
+        """Test that hedge delay follows observed latency percentile."""
+        monkeypatch.setattr(settings, "llm_hedge_min_samples", 10)
+        client._latencies["gemini"].extend(i / 100 for i in range(1, 101))
+        
+        assert client._hedge_delay("gemini", None) == pytest.approx(0.96)
+
+
+class TestCircuitBreakerIntegration:
+    """Tests for breaker-aware fallback."""
+    
+    async def test_open_provider_is_skipped(self, client, monkeypatch):
+        """Test that a provider with an open circuit gets no requests."""
+        monkeypatch.setattr(settings, "llm_breaker_min_calls", 3)
+        calls = []
+        client._call_provider = fake_provider({}, {"gemini"}, calls)
+        
+        await client.generate("sys", [{"role": "user", "content": "hi"}])
+        calls.clear()
+        client._breaker("gemini").STATE_CACHE_SECONDS = 0
+        result = await client.generate("sys", [{"role": "user", "content": "hi"}])
+        
+        assert result["model"] == "deepseek/deepseek-chat"
+        assert "gemini" not in calls
+    
+    async def test_provider_health(self, client, monkeypatch):
+        """Test that health reports an open circuit as 0 and untouched models as 1."""
+        monkeypatch.setattr(settings, "llm_breaker_min_calls", 3)
+        client._call_provider = fake_provider({}, {"gemini"}, [])
+        
+        await client.generate("sys", [{"role": "user", "content": "hi"}])
+        client._breaker("gemini").STATE_CACHE_SECONDS = 0
+        health = await client.provider_health()
+        
+        assert health["gemini"] == 0.0
+        assert health["qwen/qwen-2.5-72b-instruct"] == 1.0
+
+
+def sse_client(body: str, status_code: int = 200) -> httpx.AsyncClient:
+    """HTTP client answering every request with the given SSE body."""
+    def handler(request):
+        return httpx.Response(
+            status_code, text=body, headers={"Content-Type": "text/event-stream"}
+        )
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestGenerateStream:
+    """Tests for streaming generation."""
+    
+    @pytest.fixture(autouse=True)
+    def keys(self, monkeypatch):
+        monkeypatch.setattr(settings, "gemini_api_key", "test")
+        monkeypatch.setattr(settings, "openrouter_api_key", "test")
+    
+    async def test_gemini_deltas(self, client, monkeypatch):
+        """Test that Gemini SSE chunks become delta events."""
+        body = (
+            'data: {"candidates": [{"content": {"parts": [{"text": "Здрав"}]}}]}\n\n'
+            'data: {"candidates": [{"content": {"parts": [{"text": "ствуйте!"}]}}]}\n\n'
+        )
+        monkeypatch.setattr("src.llm.client.get_http_client", lambda url: sse_client(body))
+        
+        events = [e async for e in client.generate_stream("sys", [])]
+        
+        assert events == [
+            {"type": "delta", "text": "Здрав"},
+            {"type": "delta", "text": "ствуйте!"},
+            {"type": "done", "model": "gemini"},
+        ]
+    
+    async def test_openrouter_tool_call_fragments(self, client, monkeypatch):
+        """Test that split OpenAI tool-call chunks are reassembled."""
+        body = (
+            'data: {"choices": [{"delta": {"tool_calls": [{"index": 0, "id": "c1", '
+            '"function": {"name": "check_stock", "arguments": "{\\"product_"}}]}}]}\n\n'
+            'data: {"choices": [{"delta": {"tool_calls": [{"index": 0, '
+            '"function": {"arguments": "name\\": \\"устрицы\\"}"}}]}}]}\n\n'
+            "data: [DONE]\n\n"
+        )
+        
+        def http_client(url):
+            if "googleapis" in url:
+                return sse_client("", status_code=429)
+            return sse_client(body)
+        
+        monkeypatch.setattr("src.llm.client.get_http_client", http_client)
+        
+        sink = asyncio.Queue()
+        result = await client.generate_to_sink(sink, "sys", [])
+        
+        assert result["model"] == "deepseek/deepseek-chat"
+        assert result["tool_calls"] == [{
+            "id": "c1",
+            "name": "check_stock",
+            "arguments": '{"product_name": "устрицы"}',
+        }]
+        assert sink.qsize() == 1
+
+
+class TestRateLimitRouting:
+    """Tests for skipping providers whose budget is exhausted."""
+    
+    async def test_exhausted_provider_is_skipped(self, client, monkeypatch):
+        """Test that an empty bucket routes to the next provider."""
+        monkeypatch.setattr(settings, "llm_ratelimit_enabled", True)
+        calls = []
+        client._call_provider = fake_provider({}, set(), calls)
+        
+        async def acquire(provider, tokens, max_wait=None):
+            return provider != "gemini"
+        client.rate_limiter.acquire = acquire
+        
+        result = await client.generate("sys", [{"role": "user", "content": "hi"}])
+        
+        assert result["model"] == "deepseek/deepseek-chat"
+        assert "gemini" not in calls
+
+
+class TestOpenRouterPayload:
+    """Tests for sending stored history to the OpenAI-compatible fallback."""
+    
+    def test_gemini_tool_turns_converted(self, client):
+        """Test that Gemini-shaped calls and id-less results become paired OpenAI tool turns."""
+        history = [
+            {"role": "user", "content": "оформляй"},
+            {"role": "assistant", "content": "", "tool_calls": [
+                {"id": "call_check_stock", "name": "check_stock",
+                 "arguments": {"product": "устрицы"}},
+                {"id": "call_check_stock", "name": "check_stock",
+                 "arguments": {"product": "икра"}},
+                {"id": "call_create_order", "name": "create_order", "arguments": {}},
+            ]},
+            {"role": "tool", "name": "check_stock", "content": "{\"found\": true}"},
+            {"role": "tool", "name": "check_stock", "content": "{\"found\": false}"},
+            {"role": "assistant", "content": "Готово"},
+        ]
+        
+        messages = client._build_openrouter_payload("m", "sys", history)["messages"]
+        
+        calls = messages[2]["tool_calls"]
+        assert len({call["id"] for call in calls}) == 3
+        assert calls[0]["function"] == {
+            "name": "check_stock", "arguments": "{\"product\": \"устрицы\"}",
+        }
+        results = [m for m in messages if m["role"] == "tool"]
+        assert [r["tool_call_id"] for r in results] == [call["id"] for call in calls]
+        assert results[2]["content"] == ""  # create_order had no stored result
+        assert messages[-1] == {"role": "assistant", "content": "Готово"}
+        assert all(set(m) <= {"role", "content", "tool_calls", "tool_call_id"} for m in messages)
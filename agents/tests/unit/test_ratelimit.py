@@ -0,0 +1,96 @@
+"""Unit tests for the LLM provider rate limiter."""
+
+import pytest
+
+from src.config import settings
+from src.deadline import Deadline, DeadlineExceeded, current_deadline
+from src.llm.ratelimit import ProviderRateLimiter
+from src.llm.tokens import estimate_tokens
+
+
+@pytest.fixture
+def limiter():
+    return ProviderRateLimiter()
+
+
+def fake_try(waits: list, calls: list):
+    """Build a _try replacement returning queued wait times."""
+    async def _try(provider, tokens):
+        calls.append((provider, tokens))
+        return waits.pop(0)
+    return _try
+
+
+class TestProviderRateLimiter:
+    """Tests for ProviderRateLimiter.acquire."""
+    
+    async def test_acquires_when_budget_available(self, limiter):
+        """Test that a non-empty bucket grants immediately."""
+        calls = []
+        limiter._try = fake_try([0], calls)
+        
+        assert await limiter.acquire("gemini", 100, max_wait=1.0)
+        assert calls == [("gemini", 100)]
+    
+    async def test_waits_for_short_refill(self, limiter):
+        """Test that a refill within max_wait is awaited."""
+        calls = []
+        limiter._try = fake_try([0.01, 0], calls)
+        
+        assert await limiter.acquire("gemini", 100, max_wait=1.0)
+        assert len(calls) == 2
+    
+    async def test_rejects_long_refill(self, limiter):
+        """Test that the caller is told to route elsewhere."""
+        calls = []
+        limiter._try = fake_try([5.0], calls)
+        
+        assert not await limiter.acquire("gemini", 100, max_wait=1.0)
+        assert len(calls) == 1
+    
+    async def test_wait_capped_by_deadline(self, limiter):
+        """Test that a refill after the turn deadline raises instead of waiting."""
+        calls = []
+        limiter._try = fake_try([0.5], calls)
+        token = current_deadline.set(Deadline(0.1))
+        try:
+            with pytest.raises(DeadlineExceeded):
+                await limiter.acquire("gemini", 100, max_wait=2.0)
+        finally:
+            current_deadline.reset(token)
+        
+        assert len(calls) == 1
+    
+    async def test_long_refill_skipped_within_deadline(self, limiter):
+        """Test that a refill beyond max_wait still routes elsewhere under a short deadline."""
+        limiter._try = fake_try([5.0], [])
+        token = current_deadline.set(Deadline(0.1))
+        try:
+            assert not await limiter.acquire("gemini", 100, max_wait=2.0)
+        finally:
+            current_deadline.reset(token)
+    
+    async def test_fails_open_on_redis_error(self, limiter):
+        """Test that a limiter outage does not block traffic."""
+        async def broken(provider, tokens):
+            raise ConnectionError("redis down")
+        limiter._try = broken
+        
+        assert await limiter.acquire("gemini", 100)
+    
+    async def test_unlimited_provider_skips_redis(self, limiter, monkeypatch):
+        """Test that zero limits never touch Redis."""
+        monkeypatch.setattr(settings, "llm_openrouter_rpm", 0)
+        monkeypatch.setattr(settings, "llm_openrouter_tpm", 0)
+        
+        assert await limiter._try("openrouter", 100) == 0
+
+
+class TestEstimateTokens:
+    """Tests for token estimation."""
+    
+    def test_counts_prompt_and_messages(self):
+        """Test that system prompt and messages both count."""
+        messages = [{"role": "user", "content": "a" * 30}]
+        
+        assert estimate_tokens(messages, "b" * 30) > estimate_tokens(messages)
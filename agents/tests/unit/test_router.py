@@ -0,0 +1,76 @@
+"""Unit tests for latency-aware model routing."""
+
+import pytest
+
+from src.config import settings
+from src.llm.router import ModelRouter
+
+
+GEMINI = ("gemini", None)
+DEEPSEEK = ("openrouter", "deepseek/deepseek-chat")
+QWEN = ("openrouter", "qwen/qwen-2.5-72b-instruct")
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(settings, "llm_routing_policy", "latency")
+    monkeypatch.setattr(settings, "llm_routing_exploration", 0)
+    monkeypatch.setattr(settings, "llm_routing_alpha", 0.5)
+    monkeypatch.setattr(settings, "llm_routing_prior_latency", 3.0)
+    return ModelRouter([GEMINI, DEEPSEEK, QWEN])
+
+
+class TestModelRouter:
+    """Tests for ModelRouter ordering."""
+    
+    def test_static_order_without_samples(self, router):
+        """Test that the configured chain is kept until data arrives."""
+        assert router.order("chat") == [GEMINI, DEEPSEEK, QWEN]
+    
+    def test_faster_model_moves_first(self, router):
+        """Test that traffic follows the faster model."""
+        router.record("chat", GEMINI, 5.0, True)
+        router.record("chat", DEEPSEEK, 1.0, True)
+        
+        assert router.order("chat")[0] == DEEPSEEK
+    
+    def test_failures_demote_model(self, router):
+        """Test that a fast but failing model ranks below a reliable one."""
+        router.record("chat", GEMINI, 0.5, True)
+        for _ in range(5):
+            router.record("chat", GEMINI, 0.5, False)
+        router.record("chat", DEEPSEEK, 2.0, True)
+        
+        assert router.order("chat")[0] == DEEPSEEK
+    
+    def test_instant_failures_do_not_look_fast(self, router):
+        """Test that a model failing in 1 ms ranks below a slower healthy one."""
+        router.record("chat", GEMINI, 2.0, True)
+        for _ in range(5):
+            router.record("chat", DEEPSEEK, 0.001, False)
+        
+        assert router.order("chat")[0] == GEMINI
+        assert router.score("chat", DEEPSEEK) > router.score("chat", GEMINI)
+    
+    def test_request_classes_are_independent(self, router):
+        """Test that tool-calling stats do not affect plain chat."""
+        router.record("tools", GEMINI, 9.0, True)
+        router.record("tools", DEEPSEEK, 1.0, True)
+        
+        assert router.order("tools")[0] == DEEPSEEK
+        assert router.order("chat")[0] == GEMINI
+        assert router.request_class(["check_stock"]) == "tools"
+        assert router.request_class(None) == "chat"
+    
+    def test_exploration_promotes_fallback(self, router, monkeypatch):
+        """Test that exploration puts a non-primary model first."""
+        monkeypatch.setattr(settings, "llm_routing_exploration", 1.0)
+        
+        assert router.order("chat")[0] in (DEEPSEEK, QWEN)
+    
+    def test_static_policy(self, router, monkeypatch):
+        """Test that the static policy ignores stats."""
+        monkeypatch.setattr(settings, "llm_routing_policy", "static")
+        router.record("chat", DEEPSEEK, 0.1, True)
+        
+        assert router.order("chat") == [GEMINI, DEEPSEEK, QWEN]
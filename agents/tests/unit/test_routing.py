@@ -0,0 +1,108 @@
+"""Unit tests for supervisor intent routing."""
+
+import pytest
+
+from src.agents.nodes.supervisor import supervisor_node
+from src.agents.routing import IntentMatcher, match_intent, normalize
+from src.agents.state import CartItem, SeafoodBusinessState
+
+
+class TestIntentMatcher:
+    """Tests for the compiled keyword matcher."""
+    
+    @pytest.mark.parametrize("text,intent", [
+        ("Где мой заказ?", "support"),
+        ("Статус заказа О2410", "support"),
+        ("Привезли испорченные устрицы", "support"),
+        ("Позовите оператора", "escalate"),
+        ("Есть свежие устрицы?", "sales"),
+    ])
+    def test_intents(self, text, intent):
+        """Test routing of typical messages."""
+        assert match_intent(text).intent == intent
+    
+    @pytest.mark.parametrize("text", [
+        "хочу заказать устриц на 6 человек",
+        "есть живой краб?",
+    ])
+    def test_order_wording_not_escalated(self, text):
+        """Test that a headcount or live seafood is not a request for a human."""
+        assert match_intent(text).intent == "sales"
+    
+    @pytest.mark.parametrize("text", [
+        "позовите человека",
+        "хочу поговорить с человеком",
+        "можно живого человека?",
+    ])
+    def test_human_phrases_escalate(self, text):
+        """Test that asking for a person still escalates."""
+        assert match_intent(text).intent == "escalate"
+    
+    def test_stems_match_inflections(self):
+        """Test that a stem covers inflected forms at word start."""
+        assert match_intent("Оформляем!", has_cart=True).intent == "checkout"
+        assert match_intent("оформление", has_cart=True).intent == "checkout"
+        assert match_intent("переоформ", has_cart=True).intent == "sales"
+    
+    def test_checkout_requires_cart(self):
+        """Test that checkout keywords are ignored with an empty cart."""
+        assert match_intent("Хочу оформить").intent == "sales"
+        assert match_intent("Хочу оформить", has_cart=True).intent == "checkout"
+    
+    def test_longest_stem_wins(self):
+        """Test that "заказать" is checkout, not the support stem "заказ"."""
+        match = match_intent("хочу заказать", has_cart=True)
+        
+        assert match.intent == "checkout"
+        assert match.keywords == ["заказать"]
+    
+    def test_weak_signal_defaults_to_sales(self):
+        """Test that a low-weight keyword alone does not route."""
+        match = match_intent("когда лучше есть устрицы")
+        
+        assert match.intent == "sales"
+        assert match.confidence == 0.0
+    
+    def test_confidence_reflects_ambiguity(self):
+        """Test that mixed signals lower confidence."""
+        clear = match_intent("жалоба")
+        mixed = match_intent("жалоба, позовите менеджера")
+        
+        assert clear.confidence == 1.0
+        assert mixed.confidence < clear.confidence
+    
+    def test_normalization(self):
+        """Test case, ё and whitespace folding, incl. multi-word stems."""
+        assert normalize("  Ещё  ЗАКАЗ ") == "еще заказ"
+        assert match_intent("заказ НЕ\nпривезли").keywords == ["заказ", "не привез"]
+    
+    def test_custom_table(self):
+        """Test that a matcher can be built from any keyword table."""
+        matcher = IntentMatcher({"support": {"refund": 1.0}})
+        
+        assert matcher.match("Refund please").intent == "support"
+
+
+class TestSupervisorNode:
+    """Tests for supervisor_node routing decisions."""
+    
+    async def test_escalation(self):
+        """Test that asking for a human pauses for an operator."""
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": "соедините с менеджером"}],
+        )
+        
+        assert await supervisor_node(state) == {
+            "current_stage": "support", "escalate_to_human": True,
+        }
+    
+    async def test_checkout_with_cart(self):
+        """Test that checkout is chosen when the cart has items."""
+        state = SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": "оформляем, адрес Ленина 1"}],
+            cart=[CartItem(product_id="p1", name="Устрицы", quantity=1, unit="шт", unit_price=300)],
+        )
+        
+        assert await supervisor_node(state) == {"current_stage": "checkout"}
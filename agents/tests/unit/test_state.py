@@ -0,0 +1,89 @@
+"""Unit tests for graph state reducers."""
+
+from decimal import Decimal
+from typing import Any
+
+from langgraph.graph import END, StateGraph
+
+from src.agents.state import (
+    CartItem,
+    DeliveryAddress,
+    SeafoodBusinessState,
+    append_messages,
+    merge_address,
+    merge_cart,
+)
+
+
+def item(product_id: str, quantity: int) -> CartItem:
+    return CartItem(
+        product_id=product_id, name=product_id, quantity=quantity, unit="шт",
+        unit_price=Decimal("100"),
+    )
+
+
+class TestReducers:
+    """Tests for the state reducer functions."""
+    
+    def test_append_messages_does_not_mutate(self):
+        """Test that appending builds a new list."""
+        current = [{"role": "user", "content": "привет"}]
+        
+        result = append_messages(current, [{"role": "assistant", "content": "здравствуйте"}])
+        
+        assert len(result) == 2
+        assert len(current) == 1
+    
+    def test_merge_cart_replaces_by_product(self):
+        """Test that an update replaces the same product and keeps order."""
+        result = merge_cart([item("p1", 6), item("p2", 1)], [item("p1", 12), item("p3", 2)])
+        
+        assert [(i.product_id, i.quantity) for i in result] == [("p1", 12), ("p2", 1), ("p3", 2)]
+    
+    def test_merge_cart_zero_quantity_removes(self):
+        """Test that quantity 0 removes an item."""
+        result = merge_cart([item("p1", 6), item("p2", 1)], [item("p1", 0)])
+        
+        assert [i.product_id for i in result] == ["p2"]
+    
+    def test_merge_address_adds_details(self):
+        """Test that details for the same street/house are merged."""
+        current = DeliveryAddress(street="Ленина", house="1", comment="домофон 12")
+        
+        result = merge_address(current, DeliveryAddress(street="Ленина", house="1", flat="5"))
+        
+        assert (result.flat, result.comment) == ("5", "домофон 12")
+    
+    def test_merge_address_new_address_replaces(self):
+        """Test that a different street/house replaces the address."""
+        current = DeliveryAddress(street="Ленина", house="1", flat="5")
+        
+        result = merge_address(current, DeliveryAddress(street="Мира", house="7"))
+        
+        assert result.flat is None
+        assert merge_address(result, None) is result
+
+
+class TestGraphDeltas:
+    """Tests that node deltas are combined into the full state."""
+    
+    async def test_node_returns_only_changes(self):
+        """Test that messages are appended and the cart merged by the graph."""
+        async def node(state: SeafoodBusinessState) -> dict[str, Any]:
+            return {
+                "messages": [{"role": "assistant", "content": "Добавил."}],
+                "cart": [item("p2", 1)],
+            }
+        graph = StateGraph(SeafoodBusinessState)
+        graph.add_node("sales", node)
+        graph.set_entry_point("sales")
+        graph.add_edge("sales", END)
+        
+        result = await graph.compile().ainvoke(SeafoodBusinessState(
+            customer_id="c1", channel="telegram",
+            messages=[{"role": "user", "content": "и ещё ежа"}],
+            cart=[item("p1", 6)],
+        ))
+        
+        assert [m["content"] for m in result["messages"]] == ["и ещё ежа", "Добавил."]
+        assert [i.product_id for i in result["cart"]] == ["p1", "p2"]
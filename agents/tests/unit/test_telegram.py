@@ -0,0 +1,100 @@
+"""Unit tests for progressive Telegram replies."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.adapters import telegram
+from src.agents.state import AgentRunRequest, AgentRunResponse
+from src.config import settings
+
+
+@pytest.fixture
+def request_data():
+    return AgentRunRequest(
+        channel="telegram",
+        customer_id="tg:1",
+        external_id="1",
+        message="Какие устрицы есть?",
+    )
+
+
+def fake_stream(events):
+    async def stream(request, runner=None):
+        for event in events:
+            yield event
+    return stream
+
+
+def final(reply):
+    return {
+        "type": "final",
+        "response": AgentRunResponse(
+            reply=reply, state_id="s", current_stage="sales", escalate_to_human=False
+        ),
+    }
+
+
+class TestProgressiveReplies:
+    """Tests for _reply_progressively."""
+    
+    @pytest.fixture(autouse=True)
+    def telegram_api(self, monkeypatch):
+        self.send = AsyncMock(return_value={"ok": True, "result": {"message_id": 7}})
+        self.edit = AsyncMock(return_value={"ok": True})
+        monkeypatch.setattr(telegram, "send_telegram_message", self.send)
+        monkeypatch.setattr(telegram, "edit_telegram_message", self.edit)
+    
+    async def test_streams_into_placeholder(self, monkeypatch, request_data):
+        """Test that deltas are edited into the placeholder message."""
+        monkeypatch.setattr(settings, "telegram_edit_interval", 0)
+        monkeypatch.setattr(telegram, "run_agent_stream", fake_stream([
+            {"type": "delta", "text": "Есть "},
+            {"type": "delta", "text": "Fine de Claire"},
+            final("Есть Fine de Claire"),
+        ]))
+        
+        await telegram._reply_progressively(42, request_data)
+        
+        self.send.assert_awaited_once()
+        texts = [call.args[2] for call in self.edit.await_args_list]
+        assert texts == ["Есть ", "Есть Fine de Claire", "Есть Fine de Claire"]
+    
+    async def test_edits_are_throttled(self, monkeypatch, request_data):
+        """Test that only the final edit happens within the interval."""
+        monkeypatch.setattr(settings, "telegram_edit_interval", 60)
+        monkeypatch.setattr(telegram, "run_agent_stream", fake_stream([
+            {"type": "delta", "text": "a"},
+            {"type": "delta", "text": "b"},
+            final("ab"),
+        ]))
+        
+        await telegram._reply_progressively(42, request_data)
+        
+        assert self.edit.await_count == 1
+        assert self.edit.await_args.args[2] == "ab"
+    
+    async def test_error_replaces_placeholder(self, monkeypatch, request_data):
+        """Test that a failed turn edits the placeholder with an error."""
+        async def broken(request, runner=None):
+            raise RuntimeError("boom")
+            yield
+        
+        monkeypatch.setattr(telegram, "run_agent_stream", broken)
+        
+        await telegram._reply_progressively(42, request_data)
+        
+        assert self.edit.await_args.args[2] == telegram.ERROR_REPLY
+    
+    async def test_merged_message_removes_placeholder(self, monkeypatch, request_data):
+        """Test that a message answered with the next one leaves no placeholder."""
+        delete = AsyncMock(return_value={"ok": True})
+        monkeypatch.setattr(telegram, "delete_telegram_message", delete)
+        monkeypatch.setattr(telegram, "run_agent_stream", fake_stream([
+            {"type": "final", "response": None},
+        ]))
+        
+        await telegram._reply_progressively(42, request_data)
+        
+        delete.assert_awaited_once_with(42, 7)
+        self.edit.assert_not_awaited()
@@ -0,0 +1,100 @@
+"""Unit tests for templated tool replies."""
+
+import asyncio
+
+import pytest
+
+from src.agents.templates import ReplyTemplates
+from src.config import settings
+from src.llm.client import llm_stream_sink
+
+
+@pytest.fixture
+def templates():
+    t = ReplyTemplates()
+    counts = []
+    
+    async def count(*fields):
+        counts.extend(fields)
+    t._count = count
+    t.counts = counts
+    return t
+
+
+ORDER = {
+    "success": True,
+    "order_id": "o1",
+    "order_number": "O2410-ABCD",
+    "total_amount": 4500.0,
+    "items_count": 2,
+    "delivery_date": "2024-10-25T00:00:00",
+    "slot": "DAY",
+}
+
+
+class TestRender:
+    """Tests for ReplyTemplates.render."""
+    
+    def test_order_created(self, templates):
+        """Test that a created order is phrased locally."""
+        text = templates.render([{"name": "create_order"}], [ORDER])
+        
+        assert "O2410-ABCD" in text
+        assert "4500₽" in text
+        assert "25.10 днём" in text
+    
+    def test_order_status(self, templates):
+        """Test that found orders are listed with their status."""
+        result = [{
+            "order_number": "O1",
+            "status_label": "В доставке",
+            "delivery_date": "2024-10-25T00:00:00",
+        }]
+        
+        text = templates.render([{"name": "get_order_status"}], [result])
+        
+        assert text == "Заказ O1: В доставке, доставка 25.10"
+    
+    def test_open_ended_results_need_llm(self, templates):
+        """Test that errors, empty lookups and stock checks fall back."""
+        assert templates.render([{"name": "create_order"}], [{"error": "Cart is empty"}]) is None
+        assert templates.render([{"name": "get_order_status"}], [[]]) is None
+        assert templates.render([{"name": "check_stock"}], [{"found": True}]) is None
+    
+    def test_mixed_batch_needs_llm(self, templates):
+        """Test that one untemplated tool sends the whole batch to the LLM."""
+        tool_calls = [{"name": "check_stock"}, {"name": "create_order"}]
+        
+        assert templates.render(tool_calls, [{"found": True}, ORDER]) is None
+    
+    def test_malformed_result_needs_llm(self, templates):
+        """Test that a missing field does not raise."""
+        assert templates.render([{"name": "create_order"}], [{"success": True}]) is None
+
+
+class TestReply:
+    """Tests for ReplyTemplates.reply."""
+    
+    async def test_counts_avoided_calls(self, templates):
+        """Test that rendered and LLM-bound replies are counted."""
+        await templates.reply([{"name": "create_order"}], [ORDER])
+        await templates.reply([{"name": "check_stock"}], [{}])
+        
+        assert templates.counts == ["rendered", "rendered:create_order", "llm"]
+    
+    async def test_disabled(self, templates, monkeypatch):
+        """Test that the setting turns templating off."""
+        monkeypatch.setattr(settings, "agent_reply_templates_enabled", False)
+        
+        assert await templates.reply([{"name": "create_order"}], [ORDER]) is None
+    
+    async def test_streams_to_sink(self, templates):
+        """Test that streaming clients receive the templated reply."""
+        queue = asyncio.Queue()
+        token = llm_stream_sink.set(queue)
+        try:
+            text = await templates.reply([{"name": "escalate_to_human"}], [{"success": True}])
+        finally:
+            llm_stream_sink.reset(token)
+        
+        assert queue.get_nowait() == {"type": "delta", "text": text}
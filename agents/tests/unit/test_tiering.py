@@ -0,0 +1,84 @@
+"""Unit tests for complexity-based model tiering."""
+
+import pytest
+
+from src.config import settings
+from src.llm.breaker import MemoryBreakerStore
+from src.llm.client import LLMClient
+from src.llm.tiering import HEAVY, LIGHT, classify_turn
+
+
+def user(text: str) -> list[dict]:
+    return [{"role": "user", "content": text}]
+
+
+class TestClassifyTurn:
+    """Tests for classify_turn."""
+    
+    @pytest.mark.parametrize("text", ["Привет!", "Добрый вечер", "спасибо большое 🙏", "Hi"])
+    def test_small_talk_is_light(self, text):
+        """Test that greetings and thanks go to the light model."""
+        assert classify_turn(user(text), tools=["check_stock"]) == LIGHT
+    
+    @pytest.mark.parametrize("text", [
+        "Привет, есть устрицы?",
+        "Мне привезли испорченные устрицы",
+        "Хочу заказать 2 кг креветок на завтра",
+    ])
+    def test_real_requests_are_heavy(self, text):
+        """Test that questions, complaints and orders stay heavy."""
+        assert classify_turn(user(text), tools=["check_stock"]) == HEAVY
+    
+    def test_confirmation_with_tools_is_heavy(self):
+        """Test that "да" may place an order, so it stays heavy."""
+        assert classify_turn(user("да"), tools=["create_order"]) == HEAVY
+        assert classify_turn(user("да"), tools=None) == LIGHT
+    
+    def test_after_tool_results_is_heavy(self):
+        """Test that follow-up calls after tools stay heavy."""
+        messages = user("привет") + [{"role": "tool", "name": "check_stock", "content": "{}"}]
+        
+        assert classify_turn(messages) == HEAVY
+    
+    def test_long_small_talk_is_heavy(self, monkeypatch):
+        """Test the word limit."""
+        monkeypatch.setattr(settings, "llm_light_max_words", 2)
+        
+        assert classify_turn(user("спасибо вам большое")) == HEAVY
+
+
+class TestLightTierRouting:
+    """Tests for the light tier in LLMClient."""
+    
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(settings, "llm_ratelimit_enabled", False)
+        monkeypatch.setattr(settings, "llm_routing_policy", "static")
+        monkeypatch.setattr(settings, "llm_tiering_enabled", True)
+        llm = LLMClient()
+        llm.backoff_base = 0
+        llm._breaker_store = MemoryBreakerStore()
+        return llm
+    
+    async def test_light_model_tried_first(self, client):
+        """Test that light turns go to llm_light_model."""
+        calls = []
+        
+        async def call(provider, model, system_prompt, messages, tools=None):
+            calls.append((provider, model))
+            return {"content": "ok", "model": model, "tool_calls": None}
+        client._call_provider = call
+        
+        await client.generate("sys", user("привет"), tier=LIGHT)
+        await client.generate("sys", user("привет"))
+        
+        assert calls == [("gemini", settings.llm_light_model), ("gemini", None)]
+    
+    def test_light_model_token_cap(self, client):
+        """Test that the light model gets the low max tokens cap."""
+        payload = client._build_gemini_payload("sys", user("hi"), model=settings.llm_light_model)
+        
+        assert payload["generationConfig"]["maxOutputTokens"] == settings.llm_light_max_tokens
+        assert client._gemini_url(None, "generateContent").endswith(
+            f"{client.GEMINI_MODEL}:generateContent"
+        )
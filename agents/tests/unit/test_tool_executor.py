@@ -0,0 +1,86 @@
+"""Unit tests for the concurrent tool executor."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from src.tools import executor
+from src.tools.executor import execute_tool_calls, parse_arguments
+
+
+SHARED = object()
+
+
+@pytest.fixture(autouse=True)
+def sessions(monkeypatch):
+    """Replace the session factory with distinct dummy sessions."""
+    @asynccontextmanager
+    async def fake_session_maker():
+        yield object()
+    monkeypatch.setattr(executor, "async_session_maker", fake_session_maker)
+
+
+def recorder(events: list, delay: float = 0.05):
+    """Tool runner logging start/end and the session it got."""
+    async def run_tool(session, name, args):
+        events.append(("start", name, args.get("n")))
+        await asyncio.sleep(delay)
+        events.append(("end", name, args.get("n")))
+        return {"name": name, "n": args.get("n"), "shared": session is SHARED}
+    return run_tool
+
+
+def call(name: str, n: int) -> dict:
+    return {"id": f"call_{n}", "name": name, "arguments": {"n": n}}
+
+
+class TestExecuteToolCalls:
+    """Tests for execute_tool_calls."""
+    
+    async def test_lookups_run_concurrently(self):
+        """Test that read-only calls overlap on separate sessions."""
+        events = []
+        calls = [call("check_stock", 1), call("get_product_price", 2), call("check_stock", 3)]
+        
+        results = await execute_tool_calls(calls, recorder(events), SHARED)
+        
+        assert [e[0] for e in events[:3]] == ["start"] * 3
+        assert [r["n"] for r in results] == [1, 2, 3]
+        assert not any(r["shared"] for r in results)
+    
+    async def test_mutating_calls_are_barriers(self):
+        """Test that add_to_cart runs alone, after earlier calls finish."""
+        events = []
+        calls = [call("check_stock", 1), call("add_to_cart", 2), call("add_to_cart", 3)]
+        
+        results = await execute_tool_calls(calls, recorder(events), SHARED)
+        
+        assert events == [
+            ("start", "check_stock", 1), ("end", "check_stock", 1),
+            ("start", "add_to_cart", 2), ("end", "add_to_cart", 2),
+            ("start", "add_to_cart", 3), ("end", "add_to_cart", 3),
+        ]
+        assert [r["shared"] for r in results] == [True, True, True]
+    
+    async def test_failure_cancels_siblings(self):
+        """Test that a failing lookup propagates and cancels the rest."""
+        finished = []
+        
+        async def run_tool(session, name, args):
+            if args["n"] == 1:
+                raise ValueError("boom")
+            await asyncio.sleep(0.2)
+            finished.append(args["n"])
+        
+        with pytest.raises(ValueError):
+            await execute_tool_calls(
+                [call("check_stock", 1), call("check_stock", 2)], run_tool, SHARED
+            )
+        
+        assert finished == []
+    
+    def test_parse_string_arguments(self):
+        """Test that JSON string arguments are decoded."""
+        assert parse_arguments({"arguments": '{"product_id": "p1"}'}) == {"product_id": "p1"}
+        assert parse_arguments({"arguments": "not json"}) == {}